@@ -22,6 +22,8 @@ if config.config_file_name is not None:
 from app.models.session_model import Base
 from app.models.chat_model import Chat  # Importa o Chat para incluir na metadata
 from app.models.document_model import Document  # Importa o Document para incluir na metadata
+from app.models.nfe_model import NFe, NFeItem  # Importa as tabelas de NF-e para incluir na metadata
+from app.models.document_identifier_model import DocumentIdentifier  # Importa o índice de identificadores para incluir na metadata
 target_metadata = Base.metadata
 
 # other values from the config, defined by the needs of env.py,
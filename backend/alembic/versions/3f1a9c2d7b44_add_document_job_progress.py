@@ -0,0 +1,39 @@
+"""add document job progress
+
+Revision ID: 3f1a9c2d7b44
+Revises: cd970935e385
+Create Date: 2025-11-04 10:12:41.527310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1a9c2d7b44'
+down_revision: Union[str, Sequence[str], None] = 'cd970935e385'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('stage', sa.String(length=50), nullable=True))
+    op.add_column('documents', sa.Column('progress', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('documents', sa.Column('status_message', sa.Text(), nullable=True))
+    op.add_column('documents', sa.Column('worker_id', sa.String(length=100), nullable=True))
+    op.add_column('documents', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+
+    # Documentos já existentes foram processados de forma síncrona
+    op.execute("UPDATE documents SET progress = 100, stage = 'done' WHERE status = 'completed'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('documents', 'heartbeat_at')
+    op.drop_column('documents', 'worker_id')
+    op.drop_column('documents', 'status_message')
+    op.drop_column('documents', 'progress')
+    op.drop_column('documents', 'stage')
@@ -0,0 +1,111 @@
+"""create nfe tables
+
+Revision ID: 5d7c3e9a2f18
+Revises: 8b2e4d6f1a90
+Create Date: 2025-11-06 14:02:55.618203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d7c3e9a2f18'
+down_revision: Union[str, Sequence[str], None] = '8b2e4d6f1a90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('nfes',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('document_id', sa.String(), nullable=False),
+    sa.Column('chave', sa.String(length=44), nullable=True),
+    sa.Column('numero', sa.Integer(), nullable=True),
+    sa.Column('serie', sa.String(length=3), nullable=True),
+    sa.Column('modelo', sa.String(length=2), nullable=True),
+    sa.Column('data_emissao', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('natureza_operacao', sa.String(length=255), nullable=True),
+    sa.Column('tipo_operacao', sa.String(length=1), nullable=True),
+    sa.Column('emitente_cnpj', sa.String(length=14), nullable=True),
+    sa.Column('emitente_nome', sa.String(length=255), nullable=True),
+    sa.Column('emitente_uf', sa.String(length=2), nullable=True),
+    sa.Column('destinatario_cnpj', sa.String(length=14), nullable=True),
+    sa.Column('destinatario_nome', sa.String(length=255), nullable=True),
+    sa.Column('destinatario_uf', sa.String(length=2), nullable=True),
+    sa.Column('valor_bc_icms', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_icms', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_icms_desonerado', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_bc_icms_st', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_icms_st', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_produtos', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_frete', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_seguro', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_desconto', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_ipi', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_pis', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_cofins', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_outros', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('valor_total', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('document_id')
+    )
+    op.create_index(op.f('ix_nfes_chave'), 'nfes', ['chave'], unique=False)
+    op.create_index(op.f('ix_nfes_numero'), 'nfes', ['numero'], unique=False)
+    op.create_index(op.f('ix_nfes_data_emissao'), 'nfes', ['data_emissao'], unique=False)
+    op.create_index(op.f('ix_nfes_emitente_cnpj'), 'nfes', ['emitente_cnpj'], unique=False)
+    op.create_index(op.f('ix_nfes_destinatario_cnpj'), 'nfes', ['destinatario_cnpj'], unique=False)
+
+    op.create_table('nfe_items',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('nfe_id', sa.String(), nullable=False),
+    sa.Column('numero_item', sa.Integer(), nullable=False),
+    sa.Column('codigo', sa.String(length=60), nullable=True),
+    sa.Column('descricao', sa.String(length=500), nullable=True),
+    sa.Column('ncm', sa.String(length=8), nullable=True),
+    sa.Column('cfop', sa.String(length=4), nullable=True),
+    sa.Column('unidade', sa.String(length=6), nullable=True),
+    sa.Column('quantidade', sa.Numeric(precision=15, scale=4), nullable=True),
+    sa.Column('valor_unitario', sa.Numeric(precision=21, scale=10), nullable=True),
+    sa.Column('valor_total', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('icms_origem', sa.String(length=1), nullable=True),
+    sa.Column('icms_cst', sa.String(length=3), nullable=True),
+    sa.Column('icms_base', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('icms_aliquota', sa.Numeric(precision=7, scale=4), nullable=True),
+    sa.Column('icms_valor', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('ipi_cst', sa.String(length=2), nullable=True),
+    sa.Column('ipi_base', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('ipi_aliquota', sa.Numeric(precision=7, scale=4), nullable=True),
+    sa.Column('ipi_valor', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('pis_cst', sa.String(length=2), nullable=True),
+    sa.Column('pis_base', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('pis_aliquota', sa.Numeric(precision=7, scale=4), nullable=True),
+    sa.Column('pis_valor', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('cofins_cst', sa.String(length=2), nullable=True),
+    sa.Column('cofins_base', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('cofins_aliquota', sa.Numeric(precision=7, scale=4), nullable=True),
+    sa.Column('cofins_valor', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['nfe_id'], ['nfes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_nfe_items_nfe_id'), 'nfe_items', ['nfe_id'], unique=False)
+    op.create_index(op.f('ix_nfe_items_ncm'), 'nfe_items', ['ncm'], unique=False)
+    op.create_index(op.f('ix_nfe_items_cfop'), 'nfe_items', ['cfop'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_nfe_items_cfop'), table_name='nfe_items')
+    op.drop_index(op.f('ix_nfe_items_ncm'), table_name='nfe_items')
+    op.drop_index(op.f('ix_nfe_items_nfe_id'), table_name='nfe_items')
+    op.drop_table('nfe_items')
+    op.drop_index(op.f('ix_nfes_destinatario_cnpj'), table_name='nfes')
+    op.drop_index(op.f('ix_nfes_emitente_cnpj'), table_name='nfes')
+    op.drop_index(op.f('ix_nfes_data_emissao'), table_name='nfes')
+    op.drop_index(op.f('ix_nfes_numero'), table_name='nfes')
+    op.drop_index(op.f('ix_nfes_chave'), table_name='nfes')
+    op.drop_table('nfes')
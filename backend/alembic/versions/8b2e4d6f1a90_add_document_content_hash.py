@@ -0,0 +1,30 @@
+"""add document content hash
+
+Revision ID: 8b2e4d6f1a90
+Revises: 3f1a9c2d7b44
+Create Date: 2025-11-05 09:31:17.204418
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e4d6f1a90'
+down_revision: Union[str, Sequence[str], None] = '3f1a9c2d7b44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_documents_content_hash'), 'documents', ['content_hash'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_content_hash'), table_name='documents')
+    op.drop_column('documents', 'content_hash')
@@ -0,0 +1,41 @@
+"""create document identifiers
+
+Revision ID: a4f6c8e0b213
+Revises: 5d7c3e9a2f18
+Create Date: 2025-11-10 09:41:07.382915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4f6c8e0b213'
+down_revision: Union[str, Sequence[str], None] = '5d7c3e9a2f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('document_identifiers',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('document_id', sa.String(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=44), nullable=False),
+    sa.Column('chunk_id', sa.String(), nullable=False),
+    sa.Column('chunk_index', sa.Integer(), nullable=False, server_default='0'),
+    sa.ForeignKeyConstraint(['document_id'], ['documents.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_document_identifiers_document_id'), 'document_identifiers', ['document_id'], unique=False)
+    op.create_index('ix_document_identifiers_kind_value', 'document_identifiers', ['kind', 'value'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_document_identifiers_kind_value', table_name='document_identifiers')
+    op.drop_index(op.f('ix_document_identifiers_document_id'), table_name='document_identifiers')
+    op.drop_table('document_identifiers')
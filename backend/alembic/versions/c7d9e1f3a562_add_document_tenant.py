@@ -0,0 +1,30 @@
+"""add document tenant
+
+Revision ID: c7d9e1f3a562
+Revises: a4f6c8e0b213
+Create Date: 2025-11-12 16:18:44.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d9e1f3a562'
+down_revision: Union[str, Sequence[str], None] = 'a4f6c8e0b213'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('documents', sa.Column('tenant', sa.String(length=100), nullable=True))
+    op.create_index(op.f('ix_documents_tenant'), 'documents', ['tenant'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_documents_tenant'), table_name='documents')
+    op.drop_column('documents', 'tenant')
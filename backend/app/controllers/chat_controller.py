@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session as DBSession
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+import json
 
 from ..schemas.vector_metadata_schema import VectorMetadata
+from ..enums.retrieval_mode_enum import RetrievalMode
 
-from ..database import get_db
+from ..database import get_db, SessionLocal
 from ..services.chat_service import ChatService
 from ..services.rag_service import RAGService
 from ..models.chat_model import MessageRole
@@ -14,11 +18,13 @@ rag_service = RAGService()
 
 # CREATE CHAT - Principal endpoint para chat (sempre com RAG)
 @router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
-def create_chat(
+async def create_chat(
     session_id: str,
     question: str,
     k: Optional[int] = 5,
     metadata: VectorMetadata = None,
+    mode: Optional[RetrievalMode] = None,
+    rerank: Optional[bool] = None,
     db: DBSession = Depends(get_db)
 ):
     """
@@ -27,46 +33,159 @@ def create_chat(
     - Recebe pergunta e session_id
     - Retorna resposta do agente junto com trechos citados
     - Salva histórico da conversa
+    - Retorna 503 se o LLM estiver indisponível (a pergunta fica salva, sem resposta)
+    
+    Assíncrono: banco e busca rodam no threadpool e a espera pelo LLM não ocupa thread.
     """
     
     # Busca o histórico da conversa (últimas N mensagens)
-    chat_history = ChatService.get_chats_by_session(db, session_id, skip=0, limit=10)
+    chat_history = await run_in_threadpool(ChatService.get_chats_by_session, db, session_id, skip=0, limit=10)
     
     # Salva a pergunta do usuário no histórico
-    ChatService.create_chat(db, session_id, MessageRole.USER, question)
+    await run_in_threadpool(ChatService.create_chat, db, session_id, MessageRole.USER, question)
     
     # Processa com RAG e citações, incluindo o contexto da conversa
-    rag_result = rag_service.ask_question_with_citations(
+    rag_result = await rag_service.aask_question_with_citations(
         question=question, 
         k=k, 
         metadata=metadata,
-        chat_history=chat_history
+        chat_history=chat_history,
+        mode=mode,
+        db=db,
+        rerank=rerank
     )
     
     # Salva a resposta do assistente no histórico
-    ChatService.create_chat(db, session_id, MessageRole.ASSISTANT, rag_result["answer"])
+    await run_in_threadpool(ChatService.create_chat, db, session_id, MessageRole.ASSISTANT, rag_result["answer"])
     
     # Retorna resposta completa com trechos citados
     return {
         "question": rag_result["question"],
         "answer": rag_result["answer"],
         "cited_excerpts": rag_result["cited_excerpts"],
-        "sources": [
-            {
-                "citation": f"[{source['number']}]",
-                "filename": source["filename"],
-                "chunk_section": f"Seção {source['chunk_index'] + 1}",
-                "relevance": round(source["relevance_score"], 3)
-            }
-            for source in rag_result["sources"]
-        ],
-        "metadata": {
-            "session_id": session_id,
-            "chunks_analyzed": rag_result["chunks_used"],
-            "context_summary": rag_result["context_summary"]
+        "sources": _format_sources(rag_result),
+        "metadata": _format_metadata(session_id, rag_result)
+    }
+
+# CREATE CHAT (STREAMING) - Mesma entrada, resposta em Server-Sent Events
+@router.post("/stream")
+async def create_chat_stream(
+    session_id: str,
+    question: str,
+    k: Optional[int] = 5,
+    metadata: VectorMetadata = None,
+    mode: Optional[RetrievalMode] = None,
+    rerank: Optional[bool] = None,
+    db: DBSession = Depends(get_db)
+):
+    """
+    Versão em streaming do chat
+    
+    - Evento `sources`: trechos citados e fontes, enviado assim que a busca termina
+    - Eventos `token`: partes da resposta conforme o modelo gera
+    - Evento `done`: resposta completa e id da mensagem salva no histórico
+    - Evento `error`: o LLM falhou ou está indisponível (status 503 e Retry-After)
+      ou houve um erro inesperado (status 500)
+    
+    A resposta do assistente só é salva quando o stream termina; com erro do LLM
+    ou desconexão do cliente, nada é salvo além da pergunta.
+    """
+    chat_history = await run_in_threadpool(ChatService.get_chats_by_session, db, session_id, skip=0, limit=10)
+    await run_in_threadpool(ChatService.create_chat, db, session_id, MessageRole.USER, question)
+    
+    # A busca acontece antes de abrir o stream (usa a sessão do request)
+    rag_result = await run_in_threadpool(
+        rag_service.stream_question_with_citations,
+        question=question,
+        k=k,
+        metadata=metadata,
+        chat_history=chat_history,
+        mode=mode,
+        db=db,
+        rerank=rerank
+    )
+    
+    async def events():
+        yield _sse("sources", {
+            "question": question,
+            "cited_excerpts": rag_result["cited_excerpts"],
+            "sources": _format_sources(rag_result),
+            "metadata": _format_metadata(session_id, rag_result)
+        })
+        
+        answer_stream = rag_result["answer_stream"]
+        parts = []
+        try:
+            async for text in answer_stream:
+                parts.append(text)
+                yield _sse("token", {"text": text})
+        except HTTPException as error:
+            # Falha do provedor: avisa o cliente e não salva a resposta parcial como se fosse a resposta
+            yield _sse("error", {
+                "status_code": error.status_code,
+                "detail": error.detail,
+                "retry_after": (error.headers or {}).get("Retry-After")
+            })
+            return
+        except Exception as error:
+            # Erro inesperado (provedor ou busca): o protocolo ainda termina com um evento
+            print(f"Erro no stream do chat: {error}")
+            yield _sse("error", {
+                "status_code": status.HTTP_500_INTERNAL_SERVER_ERROR,
+                "detail": str(error) or type(error).__name__,
+                "retry_after": None
+            })
+            return
+        except BaseException:
+            # Cliente desconectou: fecha o stream do LLM (libera a vaga de concorrência);
+            # a resposta incompleta não é salva no histórico
+            await answer_stream.aclose()
+            raise
+        
+        chat = await run_in_threadpool(_save_answer, session_id, "".join(parts)) if parts else None
+        yield _sse("done", {"answer": "".join(parts), "chat_id": chat["id"] if chat else None})
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _save_answer(session_id: str, answer: str) -> Dict:
+    """Salva a resposta do assistente com uma sessão própria
+
+    A sessão do request é fechada antes do corpo da resposta em streaming ser enviado.
+    """
+    stream_db = SessionLocal()
+    try:
+        return ChatService.create_chat(stream_db, session_id, MessageRole.ASSISTANT, answer)
+    finally:
+        stream_db.close()
+
+def _format_sources(rag_result: Dict[str, Any]) -> List[Dict]:
+    return [
+        {
+            "citation": f"[{source['number']}]",
+            "filename": source["filename"],
+            "chunk_section": f"Seção {source['chunk_index'] + 1}",
+            "relevance": round(source["relevance_score"], 3)
         }
+        for source in rag_result["sources"]
+    ]
+
+def _format_metadata(session_id: str, rag_result: Dict[str, Any]) -> Dict:
+    return {
+        "session_id": session_id,
+        "chunks_analyzed": rag_result["chunks_used"],
+        "context_compression": rag_result["compression"],
+        "answer_cache": rag_result["answer_cache"],
+        "context_summary": rag_result["context_summary"]
     }
 
+def _sse(event: str, data: Dict) -> str:
+    """Mensagem no formato Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
 # READ ALL BY SESSION
 @router.get("/session/{session_id}", response_model=List[dict])
 def get_chats_by_session(
@@ -1,27 +1,51 @@
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.orm import Session as DBSession
-from typing import List
+from typing import List, Optional
 
 from ..database import get_db
 from ..services.document_service import DocumentService
-from ..services.rag_service import RAGService
 from ..enums.document_category_enum import DocumentCategory
+from ..schemas.batch_search_schema import BatchSearchRequest
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 document_service = DocumentService()
-rag_service = RAGService()
 
-# UPLOAD AND PROCESS DOCUMENT
-@router.post("/upload", response_model=dict, status_code=status.HTTP_201_CREATED)
+# UPLOAD DOCUMENT (processamento em background)
+@router.post("/upload", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
 def upload_document(
     file: UploadFile = File(...),
     category: DocumentCategory = Form(DocumentCategory.LEGISLACAO),
     tags: str = Form(""),
+    tenant: Optional[str] = Form(None),
     db: DBSession = Depends(get_db)
 ):
     print("Recebido arquivo para upload:", category, type(category))
-    """Upload e processa um documento"""
-    return document_service.upload_and_process_document(db, file, category, tags)
+    """Upload de um documento; retorna o id do job de processamento"""
+    return document_service.upload_and_process_document(db, file, category, tags, tenant or None)
+
+# BULK UPLOAD OF NF-e (XMLs e/ou ZIPs)
+@router.post("/bulk-upload", response_model=dict, status_code=status.HTTP_201_CREATED)
+def bulk_upload_nfe(
+    files: List[UploadFile] = File(...),
+    category: DocumentCategory = Form(DocumentCategory.NOTAS_FISCAIS),
+    tags: str = Form(""),
+    tenant: Optional[str] = Form(None),
+    db: DBSession = Depends(get_db)
+):
+    """Ingestão em lote de XMLs de NF-e; retorna um manifesto com o resultado de cada arquivo"""
+    return document_service.bulk_upload_nfe(db, files, category, tags, tenant or None)
+
+# BATCH SEARCH
+@router.post("/search/batch", response_model=dict)
+def search_documents_batch(request: BatchSearchRequest):
+    """Busca várias consultas em uma chamada (embeddings e busca vetorial em lote)"""
+    return document_service.search_documents_batch(request.queries, request.k, request.metadata, request.mode)
+
+# READ INGESTION JOB STATUS
+@router.get("/jobs/{job_id}", response_model=dict)
+def get_job_status(job_id: str, db: DBSession = Depends(get_db)):
+    """Status, estágio e percentual do processamento de um upload"""
+    return document_service.get_job_status(db, job_id)
 
 # READ ALL DOCUMENTS
 @router.get("/", response_model=List[dict])
@@ -57,4 +81,4 @@ def delete_document(document_id: str, db: DBSession = Depends(get_db)):
 @router.get("/vector/info", response_model=dict)
 def get_vector_store_info():
     """Informações sobre o vector store"""
-    return rag_service.vector_service.get_collection_info()
\ No newline at end of file
+    return document_service.vector_service.get_collection_info()
\ No newline at end of file
@@ -0,0 +1,6 @@
+import enum
+
+class RetrievalMode(enum.Enum):
+    VECTOR = "vector"
+    LEXICAL = "lexical"
+    HYBRID = "hybrid"
@@ -5,6 +5,8 @@ from sqlalchemy.orm import Session as DBSession
 from typing import Optional
 
 from .controllers import session_controller, chat_controller, document_controller, dashboard_controller
+from .database import SessionLocal
+from .services.vector_registry import VectorRegistry
 
 from dotenv import load_dotenv
 import os
@@ -13,12 +15,32 @@ load_dotenv()  # Carrega as variáveis de ambiente do arquivo .env
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    # Jobs de ingestão de workers que pararam (sem heartbeat recente) não vão terminar
+    job_service = document_controller.document_service.job_service
+    db = SessionLocal()
+    try:
+        job_service.fail_interrupted_jobs(db)
+    finally:
+        db.close()
+    job_service.start()
+    
+    # Carrega o modelo de embeddings uma única vez, antes da primeira requisição
+    if os.getenv("EMBEDDINGS_WARM_UP", "true").lower() == "true":
+        stats = VectorRegistry.warm_up()
+        print(
+            f"Embeddings carregados em {stats['seconds']}s "
+            f"(RSS {stats['rss_before_mb']} MB → {stats['rss_after_mb']} MB)"
+        )
+    
     yield
+    
+    document_controller.document_service.shutdown()
 
 app = FastAPI(
     title="TRIBUT.AI - Assistente Jurídico com IA",
     description="API para assistente jurídico com RAG (Retrieval-Augmented Generation)",
     version="1.0.0",
+    lifespan=lifespan,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_tags=[
@@ -77,7 +99,9 @@ def health_check():
         "services": {
             "api": "operational",
             "database": "operational"
-        }
+        },
+        "vector_registry": VectorRegistry.info(),
+        "llm_client": chat_controller.rag_service.llm_service.client.stats()
     }
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
+from sqlalchemy.orm import relationship
+
+from .session_model import Base
+
+class DocumentIdentifier(Base):
+    __tablename__ = "document_identifiers"
+    __table_args__ = (
+        Index("ix_document_identifiers_kind_value", "kind", "value"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # chave, numero, numero_serie, cnpj
+    value = Column(String(44), nullable=False)  # somente dígitos (numero_serie: "<número>/<série>")
+    chunk_id = Column(String, nullable=False)  # chunk do vector store onde o identificador aparece
+    chunk_index = Column(Integer, nullable=False, default=0)  # posição do chunk no documento (ordenação numérica)
+
+    # Relacionamento com Document
+    document = relationship("Document", back_populates="identifiers")
+
+    def __repr__(self):
+        return f"<DocumentIdentifier(kind='{self.kind}', value='{self.value}', chunk_id='{self.chunk_id}')>"
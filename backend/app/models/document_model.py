@@ -1,4 +1,5 @@
 from sqlalchemy import Column, Enum, String, DateTime, Text, Integer
+from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import uuid
 
@@ -12,12 +13,25 @@ class Document(Base):
     file_path = Column(String(500), nullable=False)
     file_type = Column(String(50), nullable=False)  # pdf, txt, docx
     file_size = Column(Integer, nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 do arquivo enviado
     content = Column(Text, nullable=True)  # texto extraído
     status = Column(String(50), default="pending")  # pending, processing, completed, error
+    stage = Column(String(50), nullable=True)  # queued, extracting, embedding, done
+    progress = Column(Integer, default=0)  # percentual concluído do processamento (0-100)
+    status_message = Column(Text, nullable=True)  # detalhes de erro/avisos do processamento
     category = Column(Enum(DocumentCategory), nullable=False, default=DocumentCategory.LEGISLACAO)
+    tenant = Column(String(100), nullable=True, index=True)  # empresa/cliente dono do documento (shard no vector store)
     chunks_count = Column(Integer, default=0)  # número de chunks gerados
+    worker_id = Column(String(100), nullable=True)  # processo que está ingerindo o documento
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)  # último sinal de vida desse processo
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     processed_at = Column(DateTime(timezone=True), nullable=True)
     
+    # Dados estruturados da NF-e (apenas para XMLs de notas fiscais)
+    nfe = relationship("NFe", back_populates="document", uselist=False, cascade="all, delete-orphan")
+    
+    # Índice de identificadores exatos (chave, número/série, CNPJ) → chunks
+    identifiers = relationship("DocumentIdentifier", back_populates="document", cascade="all, delete-orphan")
+    
     def __repr__(self):
         return f"<Document(id='{self.id}', filename='{self.filename}', status='{self.status}')>"
\ No newline at end of file
@@ -0,0 +1,99 @@
+from sqlalchemy import Column, String, DateTime, Integer, Numeric, ForeignKey
+from sqlalchemy.orm import relationship
+import uuid
+
+from .session_model import Base
+
+class NFe(Base):
+    __tablename__ = "nfes"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    document_id = Column(String, ForeignKey("documents.id", ondelete="CASCADE"), nullable=False, unique=True)
+
+    # Identificação
+    chave = Column(String(44), nullable=True, index=True)
+    numero = Column(Integer, nullable=True, index=True)
+    serie = Column(String(3), nullable=True)
+    modelo = Column(String(2), nullable=True)
+    data_emissao = Column(DateTime(timezone=True), nullable=True, index=True)
+    natureza_operacao = Column(String(255), nullable=True)
+    tipo_operacao = Column(String(1), nullable=True)  # 0 = entrada, 1 = saída
+
+    # Emitente / destinatário
+    emitente_cnpj = Column(String(14), nullable=True, index=True)
+    emitente_nome = Column(String(255), nullable=True)
+    emitente_uf = Column(String(2), nullable=True)
+    destinatario_cnpj = Column(String(14), nullable=True, index=True)  # CNPJ ou CPF
+    destinatario_nome = Column(String(255), nullable=True)
+    destinatario_uf = Column(String(2), nullable=True)
+
+    # Totais (ICMSTot)
+    valor_bc_icms = Column(Numeric(15, 2), nullable=True)
+    valor_icms = Column(Numeric(15, 2), nullable=True)
+    valor_icms_desonerado = Column(Numeric(15, 2), nullable=True)
+    valor_bc_icms_st = Column(Numeric(15, 2), nullable=True)
+    valor_icms_st = Column(Numeric(15, 2), nullable=True)
+    valor_produtos = Column(Numeric(15, 2), nullable=True)
+    valor_frete = Column(Numeric(15, 2), nullable=True)
+    valor_seguro = Column(Numeric(15, 2), nullable=True)
+    valor_desconto = Column(Numeric(15, 2), nullable=True)
+    valor_ipi = Column(Numeric(15, 2), nullable=True)
+    valor_pis = Column(Numeric(15, 2), nullable=True)
+    valor_cofins = Column(Numeric(15, 2), nullable=True)
+    valor_outros = Column(Numeric(15, 2), nullable=True)
+    valor_total = Column(Numeric(15, 2), nullable=True)
+
+    # Relacionamentos
+    document = relationship("Document", back_populates="nfe")
+    items = relationship("NFeItem", back_populates="nfe", cascade="all, delete-orphan")
+
+    def __repr__(self):
+        return f"<NFe(id='{self.id}', chave='{self.chave}', numero='{self.numero}')>"
+
+class NFeItem(Base):
+    __tablename__ = "nfe_items"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    nfe_id = Column(String, ForeignKey("nfes.id", ondelete="CASCADE"), nullable=False, index=True)
+    numero_item = Column(Integer, nullable=False)
+
+    # Produto
+    codigo = Column(String(60), nullable=True)
+    descricao = Column(String(500), nullable=True)
+    ncm = Column(String(8), nullable=True, index=True)
+    cfop = Column(String(4), nullable=True, index=True)
+    unidade = Column(String(6), nullable=True)
+    quantidade = Column(Numeric(15, 4), nullable=True)
+    valor_unitario = Column(Numeric(21, 10), nullable=True)
+    valor_total = Column(Numeric(15, 2), nullable=True)
+
+    # ICMS
+    icms_origem = Column(String(1), nullable=True)
+    icms_cst = Column(String(3), nullable=True)  # CST ou CSOSN
+    icms_base = Column(Numeric(15, 2), nullable=True)
+    icms_aliquota = Column(Numeric(7, 4), nullable=True)
+    icms_valor = Column(Numeric(15, 2), nullable=True)
+
+    # IPI
+    ipi_cst = Column(String(2), nullable=True)
+    ipi_base = Column(Numeric(15, 2), nullable=True)
+    ipi_aliquota = Column(Numeric(7, 4), nullable=True)
+    ipi_valor = Column(Numeric(15, 2), nullable=True)
+
+    # PIS
+    pis_cst = Column(String(2), nullable=True)
+    pis_base = Column(Numeric(15, 2), nullable=True)
+    pis_aliquota = Column(Numeric(7, 4), nullable=True)
+    pis_valor = Column(Numeric(15, 2), nullable=True)
+
+    # COFINS
+    cofins_cst = Column(String(2), nullable=True)
+    cofins_base = Column(Numeric(15, 2), nullable=True)
+    cofins_aliquota = Column(Numeric(7, 4), nullable=True)
+    cofins_valor = Column(Numeric(15, 2), nullable=True)
+
+    # Relacionamento com NFe
+    nfe = relationship("NFe", back_populates="items")
+
+    def __repr__(self):
+        return f"<NFeItem(nfe_id='{self.nfe_id}', numero_item={self.numero_item}, ncm='{self.ncm}')>"
@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+from typing import List, Optional
+
+from .vector_metadata_schema import VectorMetadata
+from ..enums.retrieval_mode_enum import RetrievalMode
+
+
+class BatchSearchRequest(BaseModel):
+    queries: List[str]
+    k: int = 5
+    metadata: VectorMetadata = None
+    mode: Optional[RetrievalMode] = None
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Optional
 from ..enums.document_category_enum import DocumentCategory
 
 
@@ -6,4 +7,5 @@ class VectorMetadata(BaseModel):
     filename: str = None
     file_type: str = None
     category: DocumentCategory = None
-    tags: str = None
\ No newline at end of file
+    tags: str = None
+    tenant: Optional[str] = None
\ No newline at end of file
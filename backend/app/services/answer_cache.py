@@ -0,0 +1,175 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import copy
+import threading
+import time
+
+import numpy as np
+
+
+class AnswerCache:
+    """Cache LRU com TTL das respostas do LLM, em memória no processo
+
+    A chave é a pergunta normalizada + os ids dos chunks de contexto, na ordem,
+    + o hash da janela de histórico que entra no prompt (history_key): a mesma
+    pergunta sobre o mesmo contexto e a mesma conversa reaproveita resposta e
+    fontes sem chamar o LLM; um follow-up ("e o valor dessa nota?") de outra
+    sessão não. Com similarity_threshold, perguntas com outra redação cujo
+    embedding tenha cosseno >= limiar com uma já respondida (sobre o mesmo
+    contexto e histórico) também acertam. Remover ou reingerir um documento invalida as
+    respostas que o usaram.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 500,
+        ttl_seconds: float = 3600,
+        similarity_threshold: Optional[float] = None,
+        embed: Callable[[str], List[float]] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.embed = embed
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        # (pergunta normalizada, chunks, histórico) -> (expira_em, resposta, fontes, embedding, documentos)
+        self._entries: "OrderedDict[Tuple, tuple]" = OrderedDict()
+        self._by_context: Dict[Tuple, set] = {}
+        self._by_document: Dict[str, set] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def context_key(context_chunks: List[Dict]) -> Tuple:
+        """Ids dos chunks na ordem (chunks unidos pela compactação incluem o último índice)"""
+        return tuple(
+            f"{chunk['metadata'].get('chunk_id')}:{chunk['metadata'].get('chunk_index_end', '')}"
+            for chunk in context_chunks
+        )
+
+    @staticmethod
+    def normalize(question: str) -> str:
+        return " ".join(question.lower().split())
+
+    def get(
+        self,
+        question: str,
+        context_chunks: List[Dict],
+        history_key: str = ""
+    ) -> Optional[Tuple[str, List[Dict], str]]:
+        """(resposta, fontes, "exact" ou "semantic") ou None"""
+        if not self.enabled:
+            return None
+
+        context = self.context_key(context_chunks)
+        key = (self.normalize(question), context, history_key)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= now:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry[1], copy.deepcopy(entry[2]), "exact"
+            if entry is not None:
+                self._remove(key)
+            candidates = [
+                (other, self._entries[other][3]) for other in self._by_context.get(context, ())
+                if other[2] == history_key and self._entries[other][0] >= now and self._entries[other][3] is not None
+            ]
+
+        if candidates and self.similarity_threshold is not None and self.embed is not None:
+            query = self._unit(self.embed(question))
+            best_key, best_score = max(
+                ((other, float(np.dot(query, embedding))) for other, embedding in candidates),
+                key=lambda item: item[1]
+            )
+            if best_score >= self.similarity_threshold:
+                with self._lock:
+                    entry = self._entries.get(best_key)
+                    if entry is not None:
+                        self._entries.move_to_end(best_key)
+                        self.semantic_hits += 1
+                        return entry[1], copy.deepcopy(entry[2]), "semantic"
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def set(self, question: str, context_chunks: List[Dict], answer: str, sources: List[Dict], history_key: str = ""):
+        if not self.enabled or not context_chunks:
+            return
+
+        context = self.context_key(context_chunks)
+        key = (self.normalize(question), context, history_key)
+        documents = {chunk["metadata"].get("document_id") for chunk in context_chunks} - {None}
+        # O embedding só é necessário para a comparação semântica
+        embedding = None
+        if self.similarity_threshold is not None and self.embed is not None:
+            embedding = self._unit(self.embed(question))
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, answer, copy.deepcopy(sources), embedding, documents)
+            self._by_context.setdefault(context, set()).add(key)
+            for document_id in documents:
+                self._by_document.setdefault(document_id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_documents(self, document_ids: Iterable[str]):
+        """Remove as respostas que usaram chunks dos documentos (remoção ou reingestão)"""
+        with self._lock:
+            for document_id in set(document_ids):
+                for key in list(self._by_document.get(document_id, ())):
+                    self._remove(key)
+
+    def _remove(self, key: Tuple):
+        """Remove a entrada e suas referências nos índices (com o lock adquirido)"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        context_keys = self._by_context.get(key[1])
+        if context_keys is not None:
+            context_keys.discard(key)
+            if not context_keys:
+                del self._by_context[key[1]]
+        for document_id in entry[4]:
+            document_keys = self._by_document.get(document_id)
+            if document_keys is not None:
+                document_keys.discard(key)
+                if not document_keys:
+                    del self._by_document[document_id]
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            hits = self.exact_hits + self.semantic_hits
+            total = hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "similarity_threshold": self.similarity_threshold,
+                "exact_hits": self.exact_hits,
+                "semantic_hits": self.semantic_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_context.clear()
+            self._by_document.clear()
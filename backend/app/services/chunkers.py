@@ -0,0 +1,189 @@
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from typing import Dict, List, Optional, Tuple
+import re
+
+from ..enums.document_category_enum import DocumentCategory
+
+# (texto do chunk, metadados específicos do chunk)
+Chunk = Tuple[str, Dict]
+
+# Seções do texto gerado pelo NFeParser
+NFE_ITEMS_MARKER = "--- PRODUTOS/SERVIÇOS ---"
+NFE_TOTALS_MARKER = "--- TOTAIS DA NOTA ---"
+NFE_ITEM_PATTERN = re.compile(r"^Item (\d+):$", re.M)
+
+# Dispositivos de textos legais, sempre no início da linha
+ARTICLE_PATTERN = re.compile(r"^[ \t]*Art\.\s*(\d+(?:\.\d{3})*)\s*[º°o]?(?:\s*-\s*([A-Z])\b)?", re.M)
+PARAGRAPH_PATTERN = re.compile(r"^[ \t]*(§\s*\d+\s*[º°o]?|Parágrafo único)", re.M)
+INCISO_PATTERN = re.compile(r"^[ \t]*(?:[IVXLCDM]+\s*[-–—]|[a-z]\))\s", re.M)
+
+
+def split_at(text: str, pattern: re.Pattern) -> List[str]:
+    """Fatia o texto no início de cada ocorrência (o trecho antes da primeira vem primeiro, se houver)"""
+    starts = [match.start() for match in pattern.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    return [text[start:end] for start, end in zip(starts, starts[1:] + [len(text)]) if text[start:end].strip()]
+
+
+def pack(pieces: List[str], size: int) -> List[List[str]]:
+    """Agrupa peças consecutivas sem passar de size caracteres (peças maiores ficam sozinhas)"""
+    groups, current, length = [], [], 0
+    for piece in pieces:
+        if current and length + len(piece) > size:
+            groups.append(current)
+            current, length = [], 0
+        current.append(piece)
+        length += len(piece)
+    if current:
+        groups.append(current)
+    return groups
+
+
+class TextChunker:
+    """Divisão genérica por tamanho (RecursiveCharacterTextSplitter), com overlap"""
+
+    name = "text"
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 200):
+        self.chunk_size = chunk_size
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            length_function=len,
+        )
+
+    def split(self, content: str) -> List[Chunk]:
+        return [(chunk, {}) for chunk in self.text_splitter.split_text(content)]
+
+
+class NFeChunker(TextChunker):
+    """NF-e no formato do NFeParser: cabeçalho, itens (det) inteiros agrupados e totais
+
+    Nenhum item é cortado no meio dos seus impostos, então não há overlap. Os
+    chunks de itens e totais começam com uma linha de contexto (número, série e
+    emitente) para serem autossuficientes na busca.
+    """
+
+    name = "nfe"
+
+    def split(self, content: str) -> List[Chunk]:
+        items_start = content.find(NFE_ITEMS_MARKER)
+        if items_start < 0:
+            # Texto de erro ou XML que não é NF-e
+            return super().split(content)
+
+        header = content[:items_start].strip()
+        body = content[items_start + len(NFE_ITEMS_MARKER):]
+        totals_start = body.find(NFE_TOTALS_MARKER)
+        items_text, totals = (body[:totals_start], body[totals_start:].strip()) if totals_start >= 0 else (body, "")
+
+        context = self._context(header)
+        chunks: List[Chunk] = [(header, {"section": "header"})]
+
+        items = [item.strip() for item in split_at(items_text, NFE_ITEM_PATTERN)]
+        for group in pack(items, self.chunk_size - len(context)):
+            numbers = [int(match.group(1)) for match in map(NFE_ITEM_PATTERN.match, group) if match]
+            metadata = {"section": "items"}
+            if numbers:
+                metadata.update({"item_start": numbers[0], "item_end": numbers[-1]})
+            chunks.append((f"{context}\n" + "\n\n".join(group), metadata))
+
+        if totals:
+            chunks.append((f"{context}\n{totals}", {"section": "totals"}))
+        return chunks
+
+    @staticmethod
+    def _context(header: str) -> str:
+        def field(label: str) -> str:
+            match = re.search(rf"^{label}: (.*)$", header, re.M)
+            return match.group(1).strip() if match else "N/A"
+
+        return f"[NF-e nº {field('Número')}, série {field('Série')} — {field('Razão Social')}]"
+
+
+class LegislationChunker(TextChunker):
+    """Textos legais divididos nos limites de artigo, parágrafo (§) e inciso
+
+    Artigos curtos consecutivos são agrupados até chunk_size; artigos longos são
+    divididos em parágrafos e, se preciso, incisos/alíneas, e cada parte seguinte
+    recebe a linha "Art. N (cont.)". O número do primeiro e do último artigo vai
+    nos metadados (article, article_end). Sem artigos, usa a divisão genérica.
+    """
+
+    name = "legislation"
+
+    def split(self, content: str) -> List[Chunk]:
+        if not ARTICLE_PATTERN.search(content):
+            return super().split(content)
+        articles = split_at(content, ARTICLE_PATTERN)
+
+        chunks: List[Chunk] = []
+        # Ementa/preâmbulo antes do primeiro artigo
+        if not ARTICLE_PATTERN.match(articles[0]):
+            chunks.extend(super().split(articles.pop(0).strip()))
+
+        short = []
+        for article in articles:
+            if len(article) <= self.chunk_size:
+                short.append(article)
+                continue
+            chunks.extend(self._pack_articles(short))
+            short = []
+            chunks.extend(self._split_article(article))
+        chunks.extend(self._pack_articles(short))
+        return chunks
+
+    @staticmethod
+    def _number(article: str) -> Optional[str]:
+        match = ARTICLE_PATTERN.match(article)
+        if not match:
+            return None
+        return match.group(1).replace(".", "") + (f"-{match.group(2)}" if match.group(2) else "")
+
+    def _pack_articles(self, articles: List[str]) -> List[Chunk]:
+        return [
+            ("".join(group).strip(), {"article": self._number(group[0]), "article_end": self._number(group[-1])})
+            for group in pack(articles, self.chunk_size)
+        ]
+
+    def _split_article(self, article: str) -> List[Chunk]:
+        """Divide um artigo longo em §, depois incisos/alíneas, depois por tamanho"""
+        number = self._number(article)
+        continuation = f"Art. {number} (cont.)\n"
+        size = self.chunk_size - len(continuation)
+
+        units = []
+        for paragraph in split_at(article, PARAGRAPH_PATTERN):
+            if len(paragraph) <= size:
+                units.append(paragraph)
+                continue
+            for inciso in split_at(paragraph, INCISO_PATTERN):
+                if len(inciso) <= size:
+                    units.append(inciso)
+                else:
+                    units.extend(chunk + "\n" for chunk in self.text_splitter.split_text(inciso))
+
+        chunks = []
+        for i, group in enumerate(pack(units, size)):
+            text = "".join(group).strip()
+            metadata = {"article": number, "article_end": number}
+            paragraph = PARAGRAPH_PATTERN.match(group[0])
+            if paragraph:
+                metadata["paragraph"] = paragraph.group(1).strip()
+            chunks.append((text if i == 0 else continuation + text, metadata))
+        return chunks
+
+
+def chunker_for(
+    category: Optional[DocumentCategory],
+    file_type: Optional[str],
+    chunk_size: int = 1000,
+    chunk_overlap: int = 200
+) -> TextChunker:
+    """Estratégia de divisão por categoria/tipo de arquivo"""
+    if category == DocumentCategory.NOTAS_FISCAIS and file_type == "xml":
+        return NFeChunker(chunk_size, chunk_overlap)
+    if category == DocumentCategory.LEGISLACAO:
+        return LegislationChunker(chunk_size, chunk_overlap)
+    return TextChunker(chunk_size, chunk_overlap)
@@ -0,0 +1,171 @@
+from typing import Dict, List, Tuple
+import mmh3
+import numpy as np
+
+# Primo de Mersenne 2^31 - 1: módulo das permutações (a * h + b) % p do MinHash
+MINHASH_PRIME = (1 << 31) - 1
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa de tokens (~4 caracteres por token em português)"""
+    return (len(text) + 3) // 4
+
+
+class ContextCompressor:
+    """Pós-processamento dos chunks recuperados antes de montar o prompt
+
+    1. Junta chunks adjacentes (chunk_index consecutivos) do mesmo documento,
+       removendo o texto repetido pelo overlap do splitter
+    2. Remove quase-duplicatas (similaridade de Jaccard estimada por MinHash)
+    3. Opcionalmente diversifica a seleção com MMR (relevância pela posição na
+       busca, redundância pelo MinHash)
+    """
+
+    def __init__(
+        self,
+        duplicate_threshold: float = 0.9,
+        mmr_lambda: float = None,
+        num_hashes: int = 64,
+        shingle_size: int = 5,
+        max_overlap: int = 400,
+        min_overlap: int = 30
+    ):
+        self.duplicate_threshold = duplicate_threshold
+        self.mmr_lambda = mmr_lambda
+        self.num_hashes = num_hashes
+        self.shingle_size = shingle_size
+        self.max_overlap = max_overlap
+        self.min_overlap = min_overlap
+
+        # Coeficientes das num_hashes permutações universais (fixos: assinaturas comparáveis entre chamadas).
+        # a, b e h (já reduzido mod p) abaixo de 2^31: a * h + b cabe em uint64 sem overflow
+        generator = np.random.default_rng(1)
+        self._hash_a = generator.integers(1, MINHASH_PRIME, size=num_hashes, dtype=np.uint64)
+        self._hash_b = generator.integers(0, MINHASH_PRIME, size=num_hashes, dtype=np.uint64)
+
+    def compress(self, chunks: List[Dict], k: int = None) -> Tuple[List[Dict], Dict]:
+        """Retorna os chunks compactados (na ordem da busca) e as estatísticas de economia"""
+        tokens_before = sum(estimate_tokens(chunk["content"]) for chunk in chunks)
+
+        merged = self._merge_adjacent(chunks)
+        if len(merged) > 1:
+            signatures = [self._signature(chunk["content"]) for chunk in merged]
+            deduplicated, signatures = self._drop_duplicates(merged, signatures)
+        else:
+            # Um único chunk depois da junção: não há duplicatas nem o que diversificar
+            deduplicated, signatures = merged, []
+
+        selected = deduplicated
+        if self.mmr_lambda is not None and len(deduplicated) > 1:
+            selected = self._mmr(deduplicated, signatures, k or len(deduplicated))
+
+        tokens_after = sum(estimate_tokens(chunk["content"]) for chunk in selected)
+        return selected, {
+            "chunks_before": len(chunks),
+            "chunks_after": len(selected),
+            "merged": len(chunks) - len(merged),
+            "duplicates_removed": len(merged) - len(deduplicated),
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_saved": tokens_before - tokens_after
+        }
+
+    def _merge_adjacent(self, chunks: List[Dict]) -> List[Dict]:
+        """Une sequências de chunks consecutivos do mesmo documento na posição do primeiro encontrado"""
+        by_position = {}
+        for position, chunk in enumerate(chunks):
+            metadata = chunk.get("metadata") or {}
+            key = (metadata.get("document_id"), metadata.get("chunk_index"))
+            if None in key or key in by_position:
+                continue
+            by_position[key] = position
+
+        consumed = set()
+        result = []
+        for position, chunk in enumerate(chunks):
+            if position in consumed:
+                continue
+            metadata = chunk.get("metadata") or {}
+            document_id, chunk_index = metadata.get("document_id"), metadata.get("chunk_index")
+            if document_id is None or chunk_index is None:
+                result.append(chunk)
+                continue
+
+            # Estende para trás e para frente enquanto houver vizinhos recuperados
+            first = chunk_index
+            while (document_id, first - 1) in by_position and by_position[(document_id, first - 1)] not in consumed:
+                first -= 1
+            last = chunk_index
+            while (document_id, last + 1) in by_position and by_position[(document_id, last + 1)] not in consumed:
+                last += 1
+
+            if first == last:
+                consumed.add(position)
+                result.append(chunk)
+                continue
+
+            members = [chunks[by_position[(document_id, index)]] for index in range(first, last + 1)]
+            consumed.update(by_position[(document_id, index)] for index in range(first, last + 1))
+
+            content = members[0]["content"]
+            for member in members[1:]:
+                content += self._strip_overlap(content, member["content"])
+
+            merged_metadata = {**members[0]["metadata"], "chunk_index_end": last}
+            result.append({**chunk, "content": content, "metadata": merged_metadata})
+        return result
+
+    def _strip_overlap(self, previous: str, current: str) -> str:
+        """Remove do início de current o trecho que repete o final de previous
+
+        Só conta como overlap uma repetição de ao menos min_overlap caracteres:
+        chunks sem overlap (NF-e, legislação) podem coincidir por acaso em
+        poucos caracteres ("...Anexo A" + "A partir...").
+        """
+        for size in range(min(len(previous), len(current), self.max_overlap), self.min_overlap - 1, -1):
+            if previous.endswith(current[:size]):
+                return current[size:]
+        return "\n" + current
+
+    def _signature(self, text: str) -> np.ndarray:
+        """Assinatura MinHash dos shingles de caracteres do texto normalizado
+
+        Cada shingle é hasheado uma vez (mmh3); as num_hashes funções saem de
+        permutações universais (a * h + b) % p aplicadas em bloco com numpy.
+        """
+        text = " ".join(text.lower().split())
+        shingles = {text[i:i + self.shingle_size] for i in range(max(len(text) - self.shingle_size + 1, 1))}
+        hashes = np.fromiter((mmh3.hash(shingle, signed=False) for shingle in shingles), dtype=np.uint64, count=len(shingles))
+        hashes %= np.uint64(MINHASH_PRIME)
+        permuted = (np.outer(hashes, self._hash_a) + self._hash_b) % np.uint64(MINHASH_PRIME)
+        return permuted.min(axis=0)
+
+    def _similarity(self, first: np.ndarray, second: np.ndarray) -> float:
+        return int(np.count_nonzero(first == second)) / self.num_hashes
+
+    def _drop_duplicates(self, chunks: List[Dict], signatures: List[np.ndarray]):
+        """Mantém o primeiro (mais relevante) de cada grupo de quase-duplicatas"""
+        kept, kept_signatures = [], []
+        for chunk, signature in zip(chunks, signatures):
+            if any(self._similarity(signature, other) >= self.duplicate_threshold for other in kept_signatures):
+                continue
+            kept.append(chunk)
+            kept_signatures.append(signature)
+        return kept, kept_signatures
+
+    def _mmr(self, chunks: List[Dict], signatures: List[np.ndarray], k: int) -> List[Dict]:
+        """Maximal Marginal Relevance; a relevância decai com a posição na busca"""
+        relevance = [1 - position / len(chunks) for position in range(len(chunks))]
+        selected = [0]
+        remaining = list(range(1, len(chunks)))
+
+        while remaining and len(selected) < k:
+            best = max(
+                remaining,
+                key=lambda i: self.mmr_lambda * relevance[i]
+                - (1 - self.mmr_lambda) * max(self._similarity(signatures[i], signatures[j]) for j in selected)
+            )
+            selected.append(best)
+            remaining.remove(best)
+
+        return [chunks[i] for i in sorted(selected)]
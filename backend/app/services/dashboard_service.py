@@ -3,10 +3,10 @@ from sqlalchemy import func, desc
 from ..models.document_model import Document
 from ..models.chat_model import Chat
 from ..models.session_model import Session as SessionModel
+from ..models.nfe_model import NFe, NFeItem
 from ..enums.document_category_enum import DocumentCategory
 from datetime import datetime, timedelta
 import json
-import re
 
 class DashboardService:
     def __init__(self, db: Session):
@@ -145,68 +145,51 @@ class DashboardService:
     
     def get_nfe_cfop_distribution(self):
         """
-        Extrai e analisa a distribuição de CFOPs das notas fiscais
+        Retorna a distribuição de CFOPs (número de notas fiscais em que cada CFOP aparece)
         """
-        nfe_documents = self.db.query(Document).filter(
-            Document.category == DocumentCategory.NOTAS_FISCAIS,
-            Document.status == "completed",
-            Document.content.isnot(None)
-        ).all()
-        
-        cfop_count = {}
-        
-        for doc in nfe_documents:
-            if doc.content:
-                # Extrai CFOP do conteúdo processado
-                cfop_match = re.search(r'CFOP Principal: (\d+)', doc.content)
-                if cfop_match:
-                    cfop = cfop_match.group(1)
-                    cfop_count[cfop] = cfop_count.get(cfop, 0) + 1
+        distribution = (
+            self.db.query(
+                NFeItem.cfop,
+                func.count(func.distinct(NFeItem.nfe_id)).label('count')
+            )
+            .join(NFe, NFe.id == NFeItem.nfe_id)
+            .join(Document, Document.id == NFe.document_id)
+            .filter(
+                NFeItem.cfop.isnot(None),
+                Document.category == DocumentCategory.NOTAS_FISCAIS,
+                Document.status == "completed"
+            )
+            .group_by(NFeItem.cfop)
+            .order_by(desc('count'))
+            .all()
+        )
         
         return [
             {"cfop": cfop, "count": count}
-            for cfop, count in sorted(cfop_count.items(), key=lambda x: x[1], reverse=True)
+            for cfop, count in distribution
         ]
     
     def get_nfe_ncm_top(self, limit: int = 10):
         """
-        Retorna os NCMs mais frequentes nas notas fiscais
+        Retorna os NCMs mais frequentes nos itens das notas fiscais
         """
-        nfe_documents = self.db.query(Document).filter(
-            Document.category == DocumentCategory.NOTAS_FISCAIS,
-            Document.status == "completed",
-            Document.content.isnot(None)
-        ).all()
-        
-        ncm_count = {}
-        
-        for doc in nfe_documents:
-            if doc.content:
-                print(f"Processing document: {doc.filename}")
-                print(f"Content preview: {doc.content[:500]}")  # Debug
-                
-                # Tenta diferentes padrões de regex
-                # Padrão 1: ITEM X NCM: 12345678
-                ncm_matches = re.findall(r'ITEM \d+:\s*\n\s*- CFOP: \d+\s*\n\s*- Descrição Produto: [^\n]+\s*\n\s*- Valor Produto: R\$ [\d,\.]+', doc.content)
-                
-                # Se não encontrar, tenta padrão mais simples
-                if not ncm_matches:
-                    ncm_matches = re.findall(r'NCM[:\s]+(\d{8})', doc.content)
-                
-                # Padrão original como fallback
-                if not ncm_matches:
-                    ncm_matches = re.findall(r'ITEM \d+ NCM: (\d+)', doc.content)
-                
-                print(f"Found NCMs: {ncm_matches}")  # Debug
-                
-                for ncm in ncm_matches:
-                    if ncm != "N/A" and ncm.isdigit():
-                        ncm_count[ncm] = ncm_count.get(ncm, 0) + 1
-        
-        print(f"NCM Count: {ncm_count}")  # Debug
-        
-        # Retorna os top NCMs
-        top_ncms = sorted(ncm_count.items(), key=lambda x: x[1], reverse=True)[:limit]
+        top_ncms = (
+            self.db.query(
+                NFeItem.ncm,
+                func.count(NFeItem.id).label('count')
+            )
+            .join(NFe, NFe.id == NFeItem.nfe_id)
+            .join(Document, Document.id == NFe.document_id)
+            .filter(
+                NFeItem.ncm.isnot(None),
+                Document.category == DocumentCategory.NOTAS_FISCAIS,
+                Document.status == "completed"
+            )
+            .group_by(NFeItem.ncm)
+            .order_by(desc('count'))
+            .limit(limit)
+            .all()
+        )
         
         return [
             {"ncm": ncm, "count": count}
@@ -217,79 +200,40 @@ class DashboardService:
         """
         Retorna resumo dos valores das notas fiscais
         """
-        nfe_documents = self.db.query(Document).filter(
-            Document.category == DocumentCategory.NOTAS_FISCAIS,
-            Document.status == "completed",
-            Document.content.isnot(None)
-        ).all()
-        
-        total_value = 0
-        nfe_count = 0
-        values = []
-        
-        # Estatísticas de impostos
-        total_icms = 0
-        total_ipi = 0
-        total_pis = 0
-        total_cofins = 0
+        summary = (
+            self.db.query(
+                func.count(NFe.valor_total),
+                func.sum(NFe.valor_total),
+                func.max(NFe.valor_total),
+                func.min(NFe.valor_total),
+                func.sum(NFe.valor_icms),
+                func.sum(NFe.valor_ipi),
+                func.sum(NFe.valor_pis),
+                func.sum(NFe.valor_cofins)
+            )
+            .join(Document, Document.id == NFe.document_id)
+            .filter(
+                Document.category == DocumentCategory.NOTAS_FISCAIS,
+                Document.status == "completed"
+            )
+            .one()
+        )
         
-        for doc in nfe_documents:
-            if doc.content:
-                # Extrai o VALOR TOTAL DA NOTA usando regex no novo formato
-                valor_total_match = re.search(r'VALOR TOTAL DA NOTA: R\$ ([\d,\.]+)', doc.content)
-                
-                if valor_total_match:
-                    valor_str = valor_total_match.group(1)
-                    try:
-                        # Converte string para float (formato brasileiro: 54.918,00 ou 54918.00)
-                        valor_str = valor_str.replace('.', '').replace(',', '.')  # Remove separador de milhar e converte vírgula
-                        valor = float(valor_str)
-                        
-                        values.append(valor)
-                        total_value += valor
-                        nfe_count += 1
-                    except ValueError:
-                        pass
-                
-                # Extrai valores de impostos dos totais
-                icms_match = re.search(r'Valor ICMS: R\$ ([\d,\.]+)', doc.content)
-                if icms_match:
-                    try:
-                        valor_str = icms_match.group(1).replace('.', '').replace(',', '.')
-                        total_icms += float(valor_str)
-                    except ValueError:
-                        pass
-                
-                ipi_match = re.search(r'Valor do IPI: R\$ ([\d,\.]+)', doc.content)
-                if ipi_match:
-                    try:
-                        valor_str = ipi_match.group(1).replace('.', '').replace(',', '.')
-                        total_ipi += float(valor_str)
-                    except ValueError:
-                        pass
-                
-                pis_match = re.search(r'Valor do PIS: R\$ ([\d,\.]+)', doc.content)
-                if pis_match:
-                    try:
-                        valor_str = pis_match.group(1).replace('.', '').replace(',', '.')
-                        total_pis += float(valor_str)
-                    except ValueError:
-                        pass
-                
-                cofins_match = re.search(r'Valor do COFINS: R\$ ([\d,\.]+)', doc.content)
-                if cofins_match:
-                    try:
-                        valor_str = cofins_match.group(1).replace('.', '').replace(',', '.')
-                        total_cofins += float(valor_str)
-                    except ValueError:
-                        pass
+        nfe_count, total_value, max_value, min_value, total_icms, total_ipi, total_pis, total_cofins = [
+            value if value is not None else 0 for value in summary
+        ]
+        total_value = float(total_value)
+        total_icms = float(total_icms)
+        total_ipi = float(total_ipi)
+        total_pis = float(total_pis)
+        total_cofins = float(total_cofins)
         
         return {
             "total_value": round(total_value, 2),
             "nfe_count": nfe_count,
             "average_value": round(total_value / nfe_count, 2) if nfe_count > 0 else 0,
-            "max_value": round(max(values), 2) if values else 0,
-            "min_value": round(min(values), 2) if values else 0,
+            "max_value": round(float(max_value), 2),
+            "min_value": round(float(min_value), 2),
             "tax_summary": {
                 "total_icms": round(total_icms, 2),
                 "total_ipi": round(total_ipi, 2),
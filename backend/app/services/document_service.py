@@ -1,294 +1,544 @@
 from sqlalchemy.orm import Session as DBSession
-from typing import List, Dict
+from typing import List, Dict, Tuple, Optional, BinaryIO
+from concurrent.futures import ProcessPoolExecutor
 from fastapi import HTTPException, status, UploadFile
-import PyPDF2
-import xmltodict
+import hashlib
+import tempfile
+import multiprocessing
+import threading
+import zipfile
+import uuid
 import os
 from datetime import datetime
 
+from ..database import SessionLocal
 from ..models.document_model import Document
 from .vector_service import VectorService
+from .ingestion_job_service import IngestionJobService
+from .nfe_service import NFeService
+from .identifier_service import IdentifierService
+from .nfe_parser import NFeParser
+from .pdf_extractor import PDFExtractor
 from ..enums.document_category_enum import DocumentCategory
+from ..enums.retrieval_mode_enum import RetrievalMode
 from ..schemas.vector_metadata_schema import VectorMetadata
 
 class DocumentService:
     def __init__(self):
         self.vector_service = VectorService()
+        self.job_service = IngestionJobService(self.vector_service)
         self.upload_dir = "./uploads"
+        self.upload_chunk_size = int(os.getenv("UPLOAD_CHUNK_SIZE", str(1024 * 1024)))
+        
+        # Ingestão em lote de NF-e
+        self.bulk_commit_size = int(os.getenv("BULK_COMMIT_SIZE", "200"))
+        self.bulk_max_files = int(os.getenv("BULK_MAX_FILES", "10000"))
+        self.parser_workers = int(os.getenv("PARSER_WORKERS", str(os.cpu_count() or 2)))
+        
+        # Busca em lote (jobs de conformidade)
+        self.batch_search_max_queries = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "1000"))
+        self._process_pool = None
+        self._process_pool_lock = threading.Lock()
+        self.pdf_extractor = PDFExtractor(self._get_process_pool)
+        
+        # PDFs não guardam o texto inteiro no banco, só os primeiros caracteres
+        self.pdf_content_preview_chars = int(os.getenv("PDF_CONTENT_PREVIEW_CHARS", "100000"))
         os.makedirs(self.upload_dir, exist_ok=True)
 
-    def upload_and_process_document(self, db: DBSession, file: UploadFile, category: DocumentCategory, tags: str) -> Dict:
-        """Upload e processa um documento"""
+    def upload_and_process_document(
+        self,
+        db: DBSession,
+        file: UploadFile,
+        category: DocumentCategory,
+        tags: str,
+        tenant: Optional[str] = None
+    ) -> Dict:
+        """Salva o upload e enfileira o processamento em background"""
         
-        # Salva o arquivo
-        file_path = os.path.join(self.upload_dir, file.filename)
-        with open(file_path, "wb") as buffer:
-            buffer.write(file.file.read())
+        # Salva o arquivo (streaming, com hash e tamanho calculados na mesma passada)
+        file_path, content_hash, file_size = self._save_upload(file)
+        
+        # Reaproveita um documento idêntico já processado (ou em processamento)
+        existing = self._find_document_by_hash(db, content_hash, category, tenant)
+        if existing:
+            os.remove(file_path)
+            return {
+                "job_id": existing.id,
+                "id": existing.id,
+                "filename": existing.filename,
+                "content_hash": content_hash,
+                "status": existing.status,
+                "stage": existing.stage,
+                "progress": existing.progress,
+                "deduplicated": True
+            }
         
         # Cria registro no banco
         document = Document(
             filename=file.filename,
             file_path=file_path,
             file_type=file.filename.split('.')[-1].lower(),
-            file_size=os.path.getsize(file_path),
-            status="processing",
-            category=category
+            file_size=file_size,
+            content_hash=content_hash,
+            status="pending",
+            stage="queued",
+            progress=0,
+            category=category,
+            tenant=tenant
         )
+        self.job_service.claim(document)
         
         db.add(document)
         db.commit()
         db.refresh(document)
         
+        # Enfileira a extração + ingestão; o id do documento é o id do job
         try:
-            # Extrai o conteúdo
-            content = self._extract_content(file_path, document.file_type)
+            self.job_service.submit(self._process_document_job, document.id, tags)
+        except HTTPException:
+            document.status = "error"
+            document.status_message = "Ingestion queue is full"
+            db.commit()
+            raise
+        
+        return {
+            "job_id": document.id,
+            "id": document.id,
+            "filename": document.filename,
+            "content_hash": content_hash,
+            "status": document.status,
+            "stage": document.stage,
+            "progress": document.progress,
+            "deduplicated": False
+        }
+    
+    def _find_document_by_hash(
+        self,
+        db: DBSession,
+        content_hash: str,
+        category: DocumentCategory,
+        tenant: Optional[str] = None
+    ) -> Optional[Document]:
+        """Busca um documento da mesma categoria e tenant com o mesmo conteúdo que não tenha falhado
+        
+        A categoria faz parte da chave: o mesmo arquivo enviado em outra categoria
+        vai para outro shard e precisa ser ingerido de novo.
+        """
+        candidates = db.query(Document).filter(
+            Document.content_hash == content_hash,
+            Document.category == category,
+            Document.tenant.is_(None) if tenant is None else Document.tenant == tenant,
+            Document.status.in_(["completed", "processing", "pending"])
+        ).all()
+        
+        # Prefere um documento já concluído a um job ainda em andamento
+        candidates.sort(key=lambda doc: doc.status != "completed")
+        return candidates[0] if candidates else None
+    
+    def _save_upload(self, file: UploadFile) -> Tuple[str, str, int]:
+        """Grava o upload em disco em blocos, retornando (caminho, sha256, tamanho)"""
+        return self._save_stream(file.file, file.filename)
+    
+    def _save_stream(self, stream: BinaryIO, filename: str) -> Tuple[str, str, int]:
+        """Copia um stream para ./uploads em blocos, calculando sha256 e tamanho na mesma passada"""
+        sha256 = hashlib.sha256()
+        file_size = 0
+        
+        # Grava num arquivo temporário e renomeia atomicamente ao final,
+        # com um prefixo único para que uploads de mesmo nome não se sobrescrevam
+        fd, temp_path = tempfile.mkstemp(dir=self.upload_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as buffer:
+                while True:
+                    chunk = stream.read(self.upload_chunk_size)
+                    if not chunk:
+                        break
+                    sha256.update(chunk)
+                    buffer.write(chunk)
+                    file_size += len(chunk)
             
-            # Atualiza o conteúdo no banco
-            document.content = content
-
-            # Ingere no vector store
-            chunk_ids = self.vector_service.ingest_document(
-                document_id=document.id,
+            safe_name = os.path.basename(filename)
+            file_path = os.path.join(self.upload_dir, f"{uuid.uuid4().hex}_{safe_name}")
+            os.replace(temp_path, file_path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        
+        return file_path, sha256.hexdigest(), file_size
+    
+    def bulk_upload_nfe(
+        self,
+        db: DBSession,
+        files: List[UploadFile],
+        category: DocumentCategory,
+        tags: str,
+        tenant: Optional[str] = None
+    ) -> Dict:
+        """Ingestão em lote de XMLs de NF-e (arquivos soltos e/ou ZIPs), retornando um manifesto por arquivo"""
+        manifest = []
+        staged = []
+        seen_hashes = {}
+        
+        # 1. Grava os XMLs em disco (expandindo ZIPs) e descarta duplicados
+        for file in files:
+            if file.filename.lower().endswith(".zip"):
+                try:
+                    with zipfile.ZipFile(file.file) as archive:
+                        for member in archive.infolist():
+                            if member.is_dir():
+                                continue
+                            if not member.filename.lower().endswith(".xml"):
+                                manifest.append({"filename": member.filename, "status": "skipped", "error": "Unsupported file type"})
+                                continue
+                            with archive.open(member) as stream:
+                                self._stage_bulk_file(db, stream, member.filename, manifest, staged, seen_hashes, category, tenant)
+                except zipfile.BadZipFile:
+                    manifest.append({"filename": file.filename, "status": "error", "error": "Invalid ZIP archive"})
+            elif file.filename.lower().endswith(".xml"):
+                self._stage_bulk_file(db, file.file, file.filename, manifest, staged, seen_hashes, category, tenant)
+            else:
+                manifest.append({"filename": file.filename, "status": "skipped", "error": "Unsupported file type"})
+        
+        # 2. Extrai o conteúdo de todos os XMLs em paralelo no pool de processos
+        pool = self._get_process_pool()
+        results = list(pool.map(
+            _parse_xml_worker,
+            [item["file_path"] for item in staged],
+            chunksize=16
+        ))
+        
+        # 3. Grava os documentos e os embeddings em grupos (uma transação por grupo)
+        for start in range(0, len(staged), self.bulk_commit_size):
+            group = staged[start:start + self.bulk_commit_size]
+            group_results = results[start:start + self.bulk_commit_size]
+            self._ingest_bulk_group(db, group, group_results, category, tags, tenant)
+        
+        return {
+            "total_files": len(manifest),
+            "completed": sum(1 for entry in manifest if entry["status"] == "completed"),
+            "duplicates": sum(1 for entry in manifest if entry["status"] == "duplicate"),
+            "errors": sum(1 for entry in manifest if entry["status"] == "error"),
+            "skipped": sum(1 for entry in manifest if entry["status"] == "skipped"),
+            "files": manifest
+        }
+    
+    def _stage_bulk_file(
+        self,
+        db: DBSession,
+        stream: BinaryIO,
+        filename: str,
+        manifest: List[Dict],
+        staged: List[Dict],
+        seen_hashes: Dict[str, Dict],
+        category: DocumentCategory,
+        tenant: Optional[str] = None
+    ):
+        """Grava um XML do lote em disco e o registra no manifesto"""
+        if len(staged) >= self.bulk_max_files:
+            manifest.append({"filename": filename, "status": "skipped", "error": "Bulk file limit reached"})
+            return
+        
+        file_path, content_hash, file_size = self._save_stream(stream, filename)
+        
+        # Duplicado dentro do próprio lote ou de um documento já existente
+        existing = seen_hashes.get(content_hash)
+        if existing is None:
+            document = self._find_document_by_hash(db, content_hash, category, tenant)
+            if document:
+                existing = {"document_id": document.id, "filename": document.filename}
+        
+        if existing is not None:
+            os.remove(file_path)
+            manifest.append({
+                "filename": filename,
+                "status": "duplicate",
+                "document_id": existing["document_id"],
+                "duplicate_of": existing["filename"]
+            })
+            return
+        
+        entry = {
+            "filename": filename,
+            "status": "pending",
+            "document_id": str(uuid.uuid4())
+        }
+        seen_hashes[content_hash] = entry
+        manifest.append(entry)
+        staged.append({
+            "entry": entry,
+            "file_path": file_path,
+            "content_hash": content_hash,
+            "file_size": file_size
+        })
+    
+    def _ingest_bulk_group(
+        self,
+        db: DBSession,
+        group: List[Dict],
+        results: List[Tuple[Optional[str], Optional[Dict], Optional[str]]],
+        category: DocumentCategory,
+        tags: str,
+        tenant: Optional[str] = None
+    ):
+        """Cria os documentos de um grupo e gera os embeddings de todos numa só chamada"""
+        documents = []
+        for item, (content, nfe_record, error) in zip(group, results):
+            entry = item["entry"]
+            if not error and nfe_record is None:
+                # XML inválido ou que não é uma NF-e: o texto retornado descreve o problema
+                error = content.split("\n", 1)[0]
+            document = Document(
+                id=entry["document_id"],
+                filename=os.path.basename(entry["filename"]),
+                file_path=item["file_path"],
+                file_type="xml",
+                file_size=item["file_size"],
+                content_hash=item["content_hash"],
                 content=content,
-                metadata=VectorMetadata(
-                    filename=document.filename,
-                    file_type=document.file_type,
-                    category=document.category,
-                    tags=tags
-                )
+                status="error" if error else "processing",
+                stage="error" if error else "embedding",
+                progress=0,
+                status_message=error,
+                category=category,
+                tenant=tenant
             )
-            
-            # Atualiza status
-            document.status = "completed"
-            document.chunks_count = len(chunk_ids)
-            document.processed_at = datetime.utcnow()
-            
-            db.commit()
-            
-            return {
-                "id": document.id,
-                "filename": document.filename,
-                "status": document.status,
-                "chunks_count": document.chunks_count,
-                "processed_at": document.processed_at
-            }
-            
+            self.job_service.claim(document)
+            db.add(document)
+            if nfe_record and not error and category == DocumentCategory.NOTAS_FISCAIS:
+                NFeService.save_record(db, document.id, nfe_record)
+                IdentifierService.index_document(
+                    db, document.id, nfe_record, self.vector_service.split_chunks(document.id, content, document.category, document.file_type)
+                )
+            if error:
+                entry["status"] = "error"
+                entry["error"] = error
+            else:
+                documents.append(document)
+        db.commit()
+        
+        try:
+            ids_by_document = self.vector_service.ingest_documents([
+                (
+                    entry_document.id,
+                    entry_document.content,
+                    VectorMetadata(
+                        filename=entry_document.filename,
+                        file_type=entry_document.file_type,
+                        category=category,
+                        tags=tags,
+                        tenant=tenant
+                    )
+                )
+                for entry_document in documents
+            ])
         except Exception as e:
-            document.status = "error"
+            for document in documents:
+                self.job_service.discard_partial_ingestion(db, document)
+                document.status = "error"
+                document.stage = "error"
+                document.status_message = str(e)
             db.commit()
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail=f"Error processing document: {str(e)}"
-            )
+            for item in group:
+                if item["entry"]["status"] == "pending":
+                    item["entry"]["status"] = "error"
+                    item["entry"]["error"] = str(e)
+            return
+        
+        processed_at = datetime.utcnow()
+        for document in documents:
+            document.status = "completed"
+            document.stage = "done"
+            document.progress = 100
+            document.chunks_count = len(ids_by_document.get(document.id, []))
+            document.processed_at = processed_at
+        db.commit()
+        
+        for item in group:
+            entry = item["entry"]
+            if entry["status"] == "pending":
+                entry["status"] = "completed"
+                entry["chunks_count"] = len(ids_by_document.get(entry["document_id"], []))
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Pool de processos compartilhado para parsing (criado sob demanda)"""
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.parser_workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._process_pool
+    
+    def shutdown(self):
+        """Encerra os pools de background"""
+        self.job_service.shutdown(wait=False)
+        with self._process_pool_lock:
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait=False, cancel_futures=True)
+                self._process_pool = None
+    
+    def _process_document_job(self, document_id: str, tags: str):
+        """Job de background: extrai o conteúdo e ingere no vector store"""
+        db = SessionLocal()
+        try:
+            document = db.query(Document).filter(Document.id == document_id).first()
+            if not document:
+                return
+            
+            try:
+                self._process_document(db, document, tags)
+            except Exception as e:
+                db.rollback()
+                self.job_service.discard_partial_ingestion(db, document)
+                self.job_service.update_progress(
+                    db, document, "error", document.progress or 0,
+                    status="error", message=str(e)
+                )
+        finally:
+            db.close()
+    
+    def _process_document(self, db: DBSession, document: Document, tags: str):
+        """Extrai, divide em chunks e gera embeddings de um documento"""
+        self.job_service.update_progress(db, document, "extracting", 5, status="processing")
+        
+        # PDFs são extraídos por páginas em paralelo e ingeridos em streaming
+        if document.file_type == "pdf":
+            self._process_pdf_document(db, document, tags)
+            return
+        
+        # Extrai o conteúdo (XMLs de NF-e na categoria de notas fiscais também geram o registro estruturado)
+        if document.file_type == "xml":
+            content, nfe_record = self._parse_xml(document.file_path)
+            if nfe_record and document.category == DocumentCategory.NOTAS_FISCAIS:
+                NFeService.save_record(db, document.id, nfe_record)
+                IdentifierService.index_document(
+                    db, document.id, nfe_record, self.vector_service.split_chunks(document.id, content, document.category, document.file_type)
+                )
+        else:
+            content = self._extract_content(document.file_path, document.file_type)
+        
+        # Atualiza o conteúdo no banco
+        document.content = content
+        self.job_service.update_progress(db, document, "embedding", 30)
+        
+        # Ingere no vector store (embeddings ocupam 30% → 95% do progresso)
+        def on_progress(done: int, total: int):
+            self.job_service.update_progress(db, document, "embedding", 30 + 65 * done // max(total, 1))
+        
+        chunk_ids = self.vector_service.ingest_document(
+            document_id=document.id,
+            content=content,
+            metadata=VectorMetadata(
+                filename=document.filename,
+                file_type=document.file_type,
+                category=document.category,
+                tags=tags,
+                tenant=document.tenant
+            ),
+            progress_callback=on_progress
+        )
+        
+        # Atualiza status
+        document.status = "completed"
+        document.chunks_count = len(chunk_ids)
+        document.processed_at = datetime.utcnow()
+        self.job_service.update_progress(db, document, "done", 100)
+    
+    def _process_pdf_document(self, db: DBSession, document: Document, tags: str):
+        """Extrai as páginas do PDF em paralelo e as envia direto para o chunking/embeddings"""
+        total_pages = self.pdf_extractor.count_pages(document.file_path)
+        self.job_service.update_progress(db, document, "embedding", 10)
+        
+        page_errors = []
+        pages_done = 0
+        pages_extracted = 0
+        preview = []
+        preview_size = 0
+        
+        def page_texts():
+            nonlocal pages_extracted, preview_size
+            for page_number, text, error in self.pdf_extractor.iter_pages(document.file_path, total_pages):
+                if error:
+                    page_errors.append(page_number)
+                    print(f"Erro ao extrair página {page_number} de {document.filename}: {error}")
+                    # Gravado no próximo update_progress, visível no status do job durante a ingestão
+                    document.status_message = self._page_errors_message(page_errors, total_pages)
+                elif text.strip():
+                    pages_extracted += 1
+                if preview_size < self.pdf_content_preview_chars:
+                    preview.append(text[:self.pdf_content_preview_chars - preview_size])
+                    preview_size += len(preview[-1]) + 1
+                yield text
+        
+        def on_page():
+            nonlocal pages_done
+            pages_done += 1
+            # Atualiza o banco a cada ~5% das páginas
+            if pages_done == total_pages or pages_done % max(total_pages // 20, 1) == 0:
+                self.job_service.update_progress(db, document, "embedding", 10 + 85 * pages_done // max(total_pages, 1))
+        
+        chunk_ids = self.vector_service.ingest_document_stream(
+            document_id=document.id,
+            texts=page_texts(),
+            metadata=VectorMetadata(
+                filename=document.filename,
+                file_type=document.file_type,
+                category=document.category,
+                tags=tags,
+                tenant=document.tenant
+            ),
+            progress_callback=on_page
+        )
+        
+        # Sem nenhuma página com texto o documento não tem conteúdo: o job falha (e os chunks são descartados)
+        if pages_extracted == 0:
+            message = f"Nenhuma página com texto extraída de {document.filename}"
+            if page_errors:
+                message += f". {self._page_errors_message(page_errors, total_pages)}"
+            raise ValueError(message)
+        
+        # O texto completo não é mantido em memória: o banco recebe só o início (PDF_CONTENT_PREVIEW_CHARS)
+        document.content = "\n".join(preview).strip()
+        if page_errors:
+            document.status_message = self._page_errors_message(page_errors, total_pages)
+        
+        document.status = "completed"
+        document.chunks_count = len(chunk_ids)
+        document.processed_at = datetime.utcnow()
+        self.job_service.update_progress(db, document, "done", 100)
+    
+    @staticmethod
+    def _page_errors_message(page_errors: List[int], total_pages: int, limit: int = 50) -> str:
+        """Mensagem de status com as páginas do PDF que falharam na extração"""
+        pages = ", ".join(map(str, page_errors[:limit]))
+        if len(page_errors) > limit:
+            pages += f" (+{len(page_errors) - limit})"
+        return f"Falha na extração de {len(page_errors)} de {total_pages} página(s): {pages}"
+    
+    def get_job_status(self, db: DBSession, job_id: str) -> Dict:
+        """Retorna status, estágio e percentual de um job de ingestão"""
+        return self.job_service.get_job_status(db, job_id)
     
     def _extract_content(self, file_path: str, file_type: str) -> str:
-        """Extrai conteúdo baseado no tipo de arquivo"""
-        if file_type == "pdf":
-            return self._extract_pdf_content(file_path)
-        elif file_type == "txt":
+        """Extrai conteúdo baseado no tipo de arquivo (PDFs seguem por _process_pdf_document)"""
+        if file_type == "txt":
             return self._extract_txt_content(file_path)
         elif file_type == "xml":
             return self._extract_xml_content(file_path)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
         
-    def _extract_xml_content(self, file_path: str) -> str:
+    @staticmethod
+    def _extract_xml_content(file_path: str) -> str:
         """Extrai e formata dados completos do XML de NF-e para análise RAG"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                xml_content = file.read()
-        except UnicodeDecodeError:
-            # Tenta com encoding diferente se UTF-8 falhar
-            try:
-                with open(file_path, 'r', encoding='iso-8859-1') as file:
-                    xml_content = file.read()
-            except:
-                with open(file_path, 'r', encoding='latin-1') as file:
-                    xml_content = file.read()
-        
-        # Remove BOM e caracteres problemáticos no início
-        xml_content = xml_content.strip()
-        if xml_content.startswith('\ufeff'):
-            xml_content = xml_content[1:]
-        
-        try:
-            # Converte XML para dicionário
-            data_dict = xmltodict.parse(xml_content)
-        except Exception as e:
-            # Se falhar, retorna o conteúdo como texto simples
-            return f"Erro ao processar XML: {str(e)}\n\nConteúdo original:\n{xml_content[:1000]}..."
-        
-        # 1. Obter a parte principal da NF-e (caminho varia dependendo do leiaute)
-        infNFe = data_dict.get('nfeProc', {}).get('NFe', {}).get('infNFe', {})
-        
-        if not infNFe: 
-            # Tenta outros caminhos comuns
-            infNFe = data_dict.get('NFe', {}).get('infNFe', {})
-            if not infNFe:
-                infNFe = data_dict.get('infNFe', {})
-        
-        if not infNFe:
-            return f"Dados fiscais não encontrados ou estrutura inválida.\n\nEstrutura encontrada: {list(data_dict.keys())}"
-
-        # 2. CABEÇALHO DA NOTA
-        ide = infNFe.get('ide', {})
-        summary = "=== NOTA FISCAL ELETRÔNICA ===\n\n"
-        summary += f"Chave de Acesso: {infNFe.get('@Id', 'N/A').replace('NFe', '')}\n"
-        summary += f"Número: {ide.get('nNF', 'N/A')}\n"
-        summary += f"Série: {ide.get('serie', 'N/A')}\n"
-        summary += f"Modelo: {ide.get('mod', 'N/A')}\n"
-        summary += f"Data de Emissão: {ide.get('dhEmi', 'N/A')}\n"
-        summary += f"Data de Saída/Entrada: {ide.get('dhSaiEnt', ide.get('dhEmi', 'N/A'))}\n"
-        summary += f"Natureza da Operação: {ide.get('natOp', 'N/A')}\n"
-        summary += f"Tipo de Operação: {'Saída' if ide.get('tpNF') == '1' else 'Entrada' if ide.get('tpNF') == '0' else 'N/A'}\n"
-        summary += f"Finalidade: {ide.get('finNFe', 'N/A')}\n"
-        summary += f"CFOP Principal: {ide.get('CFOP', 'N/A')}\n\n"
-        
-        # 3. EMITENTE
-        emit = infNFe.get('emit', {})
-        enderEmit = emit.get('enderEmit', {})
-        summary += "--- EMITENTE ---\n"
-        summary += f"CNPJ: {emit.get('CNPJ', 'N/A')}\n"
-        summary += f"Razão Social: {emit.get('xNome', 'N/A')}\n"
-        summary += f"Nome Fantasia: {emit.get('xFant', 'N/A')}\n"
-        summary += f"IE: {emit.get('IE', 'N/A')}\n"
-        summary += f"Endereço: {enderEmit.get('xLgr', 'N/A')}, {enderEmit.get('nro', 'N/A')}\n"
-        summary += f"Bairro: {enderEmit.get('xBairro', 'N/A')}\n"
-        summary += f"Município: {enderEmit.get('xMun', 'N/A')} - {enderEmit.get('UF', 'N/A')}\n"
-        summary += f"CEP: {enderEmit.get('CEP', 'N/A')}\n\n"
-        
-        # 4. DESTINATÁRIO
-        dest = infNFe.get('dest', {})
-        enderDest = dest.get('enderDest', {})
-        summary += "--- DESTINATÁRIO ---\n"
-        summary += f"CNPJ/CPF: {dest.get('CNPJ', dest.get('CPF', 'N/A'))}\n"
-        summary += f"Nome/Razão Social: {dest.get('xNome', 'N/A')}\n"
-        summary += f"IE: {dest.get('IE', dest.get('indIEDest', 'N/A'))}\n"
-        summary += f"Endereço: {enderDest.get('xLgr', 'N/A')}, {enderDest.get('nro', 'N/A')}\n"
-        summary += f"Bairro: {enderDest.get('xBairro', 'N/A')}\n"
-        summary += f"Município: {enderDest.get('xMun', 'N/A')} - {enderDest.get('UF', 'N/A')}\n"
-        summary += f"CEP: {enderDest.get('CEP', 'N/A')}\n\n"
-        
-        # 5. PRODUTOS/SERVIÇOS
-        det = infNFe.get('det', [])
-        if not isinstance(det, list): 
-            det = [det]
-        
-        summary += "--- PRODUTOS/SERVIÇOS ---\n"
-        for idx, item in enumerate(det, 1):
-            prod = item.get('prod', {})
-            imposto = item.get('imposto', {})
-            
-            summary += f"\nItem {idx}:\n"
-            summary += f"  Código: {prod.get('cProd', 'N/A')}\n"
-            summary += f"  Descrição: {prod.get('xProd', 'N/A')}\n"
-            summary += f"  NCM: {prod.get('NCM', 'N/A')}\n"
-            summary += f"  CFOP: {prod.get('CFOP', 'N/A')}\n"
-            summary += f"  Unidade Comercial: {prod.get('uCom', 'N/A')}\n"
-            summary += f"  Quantidade: {prod.get('qCom', 'N/A')}\n"
-            summary += f"  Valor Unitário: R$ {prod.get('vUnCom', 'N/A')}\n"
-            summary += f"  Valor Total: R$ {prod.get('vProd', 'N/A')}\n"
-            
-            # IMPOSTOS DETALHADOS
-            summary += f"  IMPOSTOS:\n"
-            
-            # ICMS
-            icms = imposto.get('ICMS', {})
-            icms_detail = None
-            for key in icms.keys():
-                if key.startswith('ICMS'):
-                    icms_detail = icms[key]
-                    break
-            
-            if icms_detail:
-                summary += f"    ICMS:\n"
-                summary += f"      Origem: {icms_detail.get('orig', 'N/A')}\n"
-                summary += f"      CST/CSOSN: {icms_detail.get('CST', icms_detail.get('CSOSN', 'N/A'))}\n"
-                summary += f"      Modalidade BC: {icms_detail.get('modBC', 'N/A')}\n"
-                summary += f"      Base de Cálculo: R$ {icms_detail.get('vBC', '0.00')}\n"
-                summary += f"      Alíquota: {icms_detail.get('pICMS', '0.00')}%\n"
-                summary += f"      Valor ICMS: R$ {icms_detail.get('vICMS', '0.00')}\n"
-            
-            # IPI
-            ipi = imposto.get('IPI', {})
-            if ipi:
-                ipi_trib = ipi.get('IPITrib', {})
-                if ipi_trib:
-                    summary += f"    IPI:\n"
-                    summary += f"      CST: {ipi_trib.get('CST', 'N/A')}\n"
-                    summary += f"      Base de Cálculo: R$ {ipi_trib.get('vBC', '0.00')}\n"
-                    summary += f"      Alíquota: {ipi_trib.get('pIPI', '0.00')}%\n"
-                    summary += f"      Valor IPI: R$ {ipi_trib.get('vIPI', '0.00')}\n"
-            
-            # PIS
-            pis = imposto.get('PIS', {})
-            pis_detail = None
-            for key in pis.keys():
-                if key.startswith('PIS'):
-                    pis_detail = pis[key]
-                    break
-            
-            if pis_detail:
-                summary += f"    PIS:\n"
-                summary += f"      CST: {pis_detail.get('CST', 'N/A')}\n"
-                summary += f"      Base de Cálculo: R$ {pis_detail.get('vBC', '0.00')}\n"
-                summary += f"      Alíquota: {pis_detail.get('pPIS', '0.00')}%\n"
-                summary += f"      Valor PIS: R$ {pis_detail.get('vPIS', '0.00')}\n"
-            
-            # COFINS
-            cofins = imposto.get('COFINS', {})
-            cofins_detail = None
-            for key in cofins.keys():
-                if key.startswith('COFINS'):
-                    cofins_detail = cofins[key]
-                    break
-            
-            if cofins_detail:
-                summary += f"    COFINS:\n"
-                summary += f"      CST: {cofins_detail.get('CST', 'N/A')}\n"
-                summary += f"      Base de Cálculo: R$ {cofins_detail.get('vBC', '0.00')}\n"
-                summary += f"      Alíquota: {cofins_detail.get('pCOFINS', '0.00')}%\n"
-                summary += f"      Valor COFINS: R$ {cofins_detail.get('vCOFINS', '0.00')}\n"
-        
-        # 6. TOTAIS
-        total = infNFe.get('total', {}).get('ICMSTot', {})
-        summary += "\n--- TOTAIS DA NOTA ---\n"
-        summary += f"Base de Cálculo ICMS: R$ {total.get('vBC', '0.00')}\n"
-        summary += f"Valor ICMS: R$ {total.get('vICMS', '0.00')}\n"
-        summary += f"Valor ICMS Desonerado: R$ {total.get('vICMSDeson', '0.00')}\n"
-        summary += f"Base de Cálculo ICMS ST: R$ {total.get('vBCST', '0.00')}\n"
-        summary += f"Valor ICMS ST: R$ {total.get('vST', '0.00')}\n"
-        summary += f"Valor Total dos Produtos: R$ {total.get('vProd', '0.00')}\n"
-        summary += f"Valor do Frete: R$ {total.get('vFrete', '0.00')}\n"
-        summary += f"Valor do Seguro: R$ {total.get('vSeg', '0.00')}\n"
-        summary += f"Valor do Desconto: R$ {total.get('vDesc', '0.00')}\n"
-        summary += f"Valor do IPI: R$ {total.get('vIPI', '0.00')}\n"
-        summary += f"Valor do PIS: R$ {total.get('vPIS', '0.00')}\n"
-        summary += f"Valor do COFINS: R$ {total.get('vCOFINS', '0.00')}\n"
-        summary += f"Outras Despesas: R$ {total.get('vOutro', '0.00')}\n"
-        summary += f"VALOR TOTAL DA NOTA: R$ {total.get('vNF', '0.00')}\n"
-        
-        # 7. INFORMAÇÕES ADICIONAIS
-        infAdic = infNFe.get('infAdic', {})
-        if infAdic:
-            summary += "\n--- INFORMAÇÕES ADICIONAIS ---\n"
-            if infAdic.get('infCpl'):
-                summary += f"{infAdic.get('infCpl')}\n"
-            if infAdic.get('infAdFisco'):
-                summary += f"Informações Fiscais: {infAdic.get('infAdFisco')}\n"
-        
-        print(summary)
-        return summary.strip()
-
-    def _extract_pdf_content(self, file_path: str) -> str:
-        """Extrai texto de PDF"""
-        with open(file_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
-        return text.strip()
+        return DocumentService._parse_xml(file_path)[0]
     
+    @staticmethod
+    def _parse_xml(file_path: str) -> Tuple[str, Optional[Dict]]:
+        """Retorna o texto formatado da NF-e e o registro estruturado (None se não for uma NF-e válida)"""
+        return NFeParser().parse(file_path)
+
     def _extract_txt_content(self, file_path: str) -> str:
         """Extrai texto de arquivo TXT"""
         with open(file_path, 'r', encoding='utf-8') as file:
@@ -296,7 +546,36 @@ class DocumentService:
     
     def search_documents(self, query: str, k: int = 5) -> List[Dict]:
         """Busca documentos por similaridade"""
-        return self.vector_service.similarity_search(query, k)
+        return self.vector_service.search(query, k, mode=RetrievalMode.VECTOR)
+    
+    def search_documents_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        metadata: VectorMetadata = None,
+        mode: RetrievalMode = None
+    ) -> Dict:
+        """Busca várias consultas de uma vez; resultados na ordem das consultas"""
+        if not queries:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No queries provided")
+        if len(queries) > self.batch_search_max_queries:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Too many queries (max {self.batch_search_max_queries})"
+            )
+        
+        mode = mode or RetrievalMode.VECTOR
+        results = self.vector_service.search_batch(
+            queries, k, self.vector_service.build_filter(metadata), mode
+        )
+        return {
+            "mode": mode.value,
+            "count": len(queries),
+            "results": [
+                {"query": query, "chunks": chunks}
+                for query, chunks in zip(queries, results)
+            ]
+        }
     
     def delete_document(self, db: DBSession, document_id: str):
         """Deleta documento do banco e do vector store"""
@@ -309,7 +588,7 @@ class DocumentService:
             )
         
         # Remove do vector store
-        self.vector_service.delete_document(document_id)
+        self.vector_service.delete_document(document_id, document.category.value, document.tenant)
         
         # Remove arquivo físico
         if os.path.exists(document.file_path):
@@ -333,7 +612,17 @@ class DocumentService:
                 "chunks_count": doc.chunks_count,
                 "created_at": doc.created_at,
                 "processed_at": doc.processed_at,
-                "category": doc.category.value
+                "category": doc.category.value,
+                "tenant": doc.tenant
             }
             for doc in documents
-        ]
\ No newline at end of file
+        ]
+
+
+def _parse_xml_worker(file_path: str) -> Tuple[Optional[str], Optional[Dict], Optional[str]]:
+    """Executado no pool de processos: retorna (conteúdo, registro da NF-e, erro) de um XML"""
+    try:
+        content, nfe_record = DocumentService._parse_xml(file_path)
+        return content, nfe_record, None
+    except Exception as e:
+        return None, None, str(e)
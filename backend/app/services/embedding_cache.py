@@ -0,0 +1,180 @@
+from langchain_core.embeddings import Embeddings
+from typing import Dict, List
+import hashlib
+import sqlite3
+import threading
+import time
+import os
+import numpy as np
+
+
+class CachedEmbeddings(Embeddings):
+    """Cache em disco (SQLite) na frente de um modelo de embeddings
+
+    A chave é o SHA-256 de (modelo, texto), então chunks repetidos (boilerplate de
+    NF-e, legislação reenviada, reprocessamento após falha) e consultas repetidas
+    não passam pelo modelo. O tamanho é limitado a max_entries com despejo LRU.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        model_key: str,
+        path: str,
+        max_entries: int = 200000,
+        touch_flush_size: int = 256
+    ):
+        self.embeddings = embeddings
+        self.model_key = model_key
+        self.max_entries = max_entries
+        self.touch_flush_size = touch_flush_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+
+        # Estimativa de ocupação deste processo: só decide quando conferir o despejo
+        self._count = self._entries()
+        # last_used pendentes (chave → horário do acerto), gravados em lote
+        self._touched: Dict[str, float] = {}
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_key}\0{text}".encode("utf-8")).hexdigest()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        keys = [self._key(text) for text in texts]
+        cached = self._get_many(set(keys))
+
+        # Textos repetidos no mesmo lote são calculados uma única vez
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        with self._lock:
+            self.hits += len(texts) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._put_many(computed)
+            cached.update(computed)
+
+        return [list(cached[key]) for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self._key(text)
+        cached = self._get_many({key})
+        if key in cached:
+            with self._lock:
+                self.hits += 1
+            return list(cached[key])
+
+        with self._lock:
+            self.misses += 1
+        vector = self.embeddings.embed_query(text)
+        self._put_many({key: vector})
+        return vector
+
+    def _get_many(self, keys) -> Dict[str, List[float]]:
+        if not keys:
+            return {}
+
+        keys = list(keys)
+        found = {}
+        with self._lock:
+            # Limite de variáveis por consulta do SQLite
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            if found:
+                # Marca como usados recentemente para o LRU, gravando em lote (sem commit por acerto)
+                now = time.time()
+                self._touched.update((key, now) for key in found)
+                if len(self._touched) >= self.touch_flush_size:
+                    self._flush_touched()
+                    self._conn.commit()
+        return found
+
+    def _flush_touched(self):
+        """Grava os last_used pendentes (sem commit; chamado com o lock)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(used, key) for key, used in self._touched.items()]
+            )
+            self._touched.clear()
+
+    def _entries(self) -> int:
+        """Número de entradas lido do banco (outros processos também gravam nele)"""
+        return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _put_many(self, vectors: Dict[str, List[float]]):
+        now = time.time()
+        rows = [(key, np.asarray(vector, dtype=np.float32).tobytes(), now) for key, vector in vectors.items()]
+
+        with self._lock:
+            # Aproveita o commit da inserção para gravar os last_used pendentes
+            self._flush_touched()
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)", rows
+            )
+            self._count += self._conn.total_changes - before
+
+            if self._count > self.max_entries:
+                # Outros processos também gravam no banco: confere o total antes de despejar
+                self._count = self._entries()
+                if self._count > self.max_entries:
+                    # Remove os menos usados, deixando folga para não despejar a cada inserção
+                    excess = self._count - int(self.max_entries * 0.9)
+                    cursor = self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN ("
+                        "SELECT key FROM embeddings ORDER BY last_used LIMIT ?)", (excess,)
+                    )
+                    self._count -= cursor.rowcount
+                    self.evictions += cursor.rowcount
+
+            self._conn.commit()
+
+    def stats(self) -> Dict:
+        """Ocupação do cache (lida do banco) e contadores de acertos/faltas deste processo"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": self._entries(),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions
+            }
+
+    def clear(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self._touched.clear()
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._count = 0
@@ -0,0 +1,118 @@
+from sqlalchemy.orm import Session as DBSession
+from sqlalchemy import and_, or_
+from typing import Dict, List, Tuple
+import re
+
+from ..models.document_model import Document
+from ..models.document_identifier_model import DocumentIdentifier
+
+# Sequências de dígitos com separadores (chave em blocos, CNPJ formatado)
+DIGIT_GROUP_PATTERN = re.compile(r"\d[\d\s./\-]*\d")
+# Número só conta depois de "NF-e"/"nota fiscal" ("qual o número 3 da lista" não é NF-e)
+NUMERO_PATTERN = re.compile(
+    r"\b(?:nf-?e?|nota\s+fiscal(?:\s+eletr[ôo]nica)?)\s*(?:d[eo]\s+)?"
+    r"(?:n[úu]mero\s*|n[º°o]\.?\s*)?(\d{1,9})\b",
+    re.IGNORECASE
+)
+SERIE_PATTERN = re.compile(r"\bs[ée]rie\s*(\d{1,3})\b", re.IGNORECASE)
+
+# (tipo, valor)
+Identifier = Tuple[str, str]
+
+class IdentifierService:
+    """Índice de identificadores exatos de NF-e (chave, número/série, CNPJ) → documento e chunks
+
+    Montado na ingestão; perguntas que citam esses identificadores buscam os chunks
+    diretamente, sem embeddings nem busca vetorial.
+    """
+
+    @staticmethod
+    def build_entries(record: Dict) -> List[Tuple[str, str, str]]:
+        """(tipo, valor, regex procurada no texto) a partir do registro da NF-e
+
+        Os padrões não aceitam dígitos colados: "Número: 123" não casa com
+        "Número: 1234", nem um CNPJ com o trecho da chave de acesso que o contém.
+        """
+        entries = []
+        if record.get("chave"):
+            entries.append(("chave", record["chave"], rf"(?<!\d){re.escape(record['chave'])}(?!\d)"))
+
+        numero = record.get("numero")
+        if numero is not None:
+            numero_pattern = rf"Número:\s*{re.escape(str(numero))}(?!\d)"
+            entries.append(("numero", str(numero), numero_pattern))
+            serie = record.get("serie")
+            if serie:
+                serie = str(int(serie)) if serie.isdigit() else serie
+                entries.append(("numero_serie", f"{numero}/{serie}", numero_pattern))
+
+        for cnpj in {record.get("emitente_cnpj"), record.get("destinatario_cnpj")}:
+            if cnpj:
+                entries.append(("cnpj", cnpj, rf"(?<!\d){re.escape(cnpj)}(?!\d)"))
+        return entries
+
+    @staticmethod
+    def index_document(db: DBSession, document_id: str, record: Dict, chunks: List[Tuple[str, str]]):
+        """Adiciona na sessão os identificadores da NF-e apontando para os chunks em que aparecem
+
+        chunks: (chunk_id, texto) na mesma divisão usada no vector store. O commit fica com quem chama.
+        """
+        if not chunks:
+            return
+
+        for kind, value, pattern in IdentifierService.build_entries(record):
+            positions = [index for index, (_, text) in enumerate(chunks) if re.search(pattern, text)] or [0]
+            for index in positions:
+                db.add(DocumentIdentifier(
+                    document_id=document_id, kind=kind, value=value, chunk_id=chunks[index][0], chunk_index=index
+                ))
+
+    @staticmethod
+    def detect(question: str) -> List[Identifier]:
+        """Identificadores citados na pergunta"""
+        identifiers = []
+
+        def extract(match):
+            digits = re.sub(r"\D", "", match.group(0))
+            if len(digits) == 44:
+                identifiers.append(("chave", digits))
+            elif len(digits) in (11, 14):
+                identifiers.append(("cnpj", digits))
+            else:
+                return match.group(0)
+            # Remove a chave/CNPJ para que seus blocos não sejam lidos como número da nota
+            return " "
+
+        remaining = DIGIT_GROUP_PATTERN.sub(extract, question)
+
+        serie = SERIE_PATTERN.search(remaining)
+        for numero in NUMERO_PATTERN.findall(remaining):
+            numero = str(int(numero))
+            if serie:
+                identifiers.append(("numero_serie", f"{numero}/{int(serie.group(1))}"))
+            else:
+                identifiers.append(("numero", numero))
+
+        return list(dict.fromkeys(identifiers))
+
+    @staticmethod
+    def lookup(db: DBSession, identifiers: List[Identifier], limit: int = 20) -> List[Tuple[str, str]]:
+        """(document_id, chunk_id) dos documentos processados com algum dos identificadores, mais recentes primeiro"""
+        if not identifiers:
+            return []
+
+        rows = (
+            db.query(DocumentIdentifier.document_id, DocumentIdentifier.chunk_id)
+            .join(Document, Document.id == DocumentIdentifier.document_id)
+            .filter(
+                Document.status == "completed",
+                or_(*[
+                    and_(DocumentIdentifier.kind == kind, DocumentIdentifier.value == value)
+                    for kind, value in identifiers
+                ])
+            )
+            .order_by(Document.processed_at.desc(), DocumentIdentifier.document_id, DocumentIdentifier.chunk_index)
+            .limit(limit * 4)
+            .all()
+        )
+        return list(dict.fromkeys((document_id, chunk_id) for document_id, chunk_id in rows))[:limit]
@@ -0,0 +1,181 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from datetime import datetime, timedelta
+from sqlalchemy import or_
+from sqlalchemy.orm import Session as DBSession
+from typing import Callable, Dict, Optional
+from fastapi import HTTPException, status
+import threading
+import socket
+import uuid
+import os
+from dotenv import load_dotenv
+
+from ..database import SessionLocal
+from ..models.document_model import Document
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+class IngestionJobService:
+    """Fila limitada de jobs de ingestão executados em background
+
+    Cada documento em processamento guarda o worker_id do processo dono e um
+    heartbeat_at renovado a cada INGESTION_HEARTBEAT_SECONDS. Só jobs sem sinal
+    de vida há mais de INGESTION_STALE_SECONDS são dados como interrompidos, de
+    modo que um processo que sobe não derruba os jobs de outros workers.
+    """
+
+    def __init__(self, vector_service=None, max_workers: int = None, max_pending: int = None):
+        # Vector store de onde saem os chunks de ingestões que falharam ou foram interrompidas
+        self.vector_service = vector_service
+
+        # Número de workers e tamanho máximo da fila de espera
+        self.max_workers = max_workers or int(os.getenv("INGESTION_WORKERS", "2"))
+        self.max_pending = max_pending or int(os.getenv("INGESTION_QUEUE_SIZE", "50"))
+
+        # Threads: extração e embeddings liberam o GIL na maior parte do tempo
+        # (I/O, PyPDF2 e torch), e o modelo de embeddings fica compartilhado
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="ingestion"
+        )
+
+        # Limita jobs em execução + enfileirados para não crescer sem controle
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_pending)
+
+        # Identificação deste processo e intervalo do heartbeat dos seus jobs
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.heartbeat_seconds = float(os.getenv("INGESTION_HEARTBEAT_SECONDS", "30"))
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+
+    def claim(self, document: Document):
+        """Marca o documento como processado por este worker (sem commit)"""
+        document.worker_id = self.worker_id
+        document.heartbeat_at = datetime.utcnow()
+
+    def start(self):
+        """Inicia a thread que renova o heartbeat dos jobs deste processo e falha os abandonados"""
+        if self._monitor is None:
+            self._monitor = threading.Thread(target=self._run_monitor, name="ingestion-heartbeat", daemon=True)
+            self._monitor.start()
+
+    def _run_monitor(self):
+        while not self._stop.wait(self.heartbeat_seconds):
+            db = SessionLocal()
+            try:
+                db.query(Document).filter(
+                    Document.worker_id == self.worker_id,
+                    Document.status.in_(["pending", "processing"])
+                ).update({Document.heartbeat_at: datetime.utcnow()}, synchronize_session=False)
+                db.commit()
+                self.fail_interrupted_jobs(db)
+            except Exception as e:
+                db.rollback()
+                print(f"Erro ao renovar heartbeat dos jobs de ingestão: {e}")
+            finally:
+                db.close()
+
+    def submit(self, fn: Callable, *args) -> Future:
+        """Enfileira um job; retorna 503 se a fila estiver cheia"""
+        if not self._slots.acquire(blocking=False):
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingestion queue is full, try again later"
+            )
+
+        try:
+            future = self.executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    @staticmethod
+    def update_progress(
+        db: DBSession,
+        document: Document,
+        stage: str,
+        progress: int,
+        status: Optional[str] = None,
+        message: Optional[str] = None
+    ):
+        """Atualiza estágio e percentual de um job no banco"""
+        document.stage = stage
+        document.progress = max(0, min(100, int(progress)))
+        if status is not None:
+            document.status = status
+        if message is not None:
+            document.status_message = message
+        db.commit()
+
+    @staticmethod
+    def get_job_status(db: DBSession, job_id: str) -> Dict:
+        """Retorna o estado de um job de ingestão (o id do job é o id do documento)"""
+        document = db.query(Document).filter(Document.id == job_id).first()
+
+        if not document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Job not found"
+            )
+
+        return {
+            "job_id": document.id,
+            "document_id": document.id,
+            "filename": document.filename,
+            "status": document.status,
+            "stage": document.stage,
+            "progress": document.progress or 0,
+            "message": document.status_message,
+            "chunks_count": document.chunks_count,
+            "created_at": document.created_at,
+            "processed_at": document.processed_at
+        }
+
+    def discard_partial_ingestion(self, db: DBSession, document: Document):
+        """Desfaz o que uma ingestão que falhou já gravou (sem commit)
+
+        Remove os chunks do vector store e do índice léxico, o registro da NF-e e os
+        identificadores, para que buscas não encontrem um documento marcado como erro.
+        """
+        if self.vector_service is not None:
+            try:
+                self.vector_service.delete_document(document.id, document.category.value, document.tenant)
+            except Exception as e:
+                print(f"Erro ao remover chunks do documento {document.id} após falha: {e}")
+
+        if document.nfe is not None:
+            db.delete(document.nfe)
+        for identifier in list(document.identifiers):
+            db.delete(identifier)
+        document.chunks_count = 0
+
+    def fail_interrupted_jobs(self, db: DBSession, stale_seconds: float = None) -> int:
+        """Marca como erro os jobs pendentes cujo worker parou de dar sinal de vida
+
+        O que esses jobs já tinham gravado é descartado, como numa ingestão que
+        falhou. Jobs de outros processos ainda ativos (heartbeat recente) não são tocados.
+        """
+        stale_seconds = stale_seconds or float(os.getenv("INGESTION_STALE_SECONDS", "120"))
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_seconds)
+        interrupted = db.query(Document).filter(
+            Document.status.in_(["pending", "processing"]),
+            or_(Document.heartbeat_at.is_(None), Document.heartbeat_at < cutoff)
+        ).all()
+
+        for document in interrupted:
+            self.discard_partial_ingestion(db, document)
+            document.status = "error"
+            document.stage = "error"
+            document.status_message = "Processamento interrompido: o worker parou de responder"
+
+        db.commit()
+        return len(interrupted)
+
+    def shutdown(self, wait: bool = False):
+        """Encerra o pool de workers e o heartbeat"""
+        self._stop.set()
+        self.executor.shutdown(wait=wait, cancel_futures=not wait)
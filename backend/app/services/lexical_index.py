@@ -0,0 +1,305 @@
+from typing import Dict, List, Optional
+from collections import Counter
+import json
+import math
+import re
+import sqlite3
+import threading
+import unicodedata
+import os
+
+# Palavras e números; números formatados (CNPJ, NCM com pontos, chave com espaços)
+# também são indexados só com os dígitos
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+NUMBER_PATTERN = re.compile(r"\d(?:[\d./\- ]*\d)?")
+
+# Palavras funcionais (já sem acento) ignoradas nas consultas: presentes em quase
+# todos os chunks, não ajudam no ranking e custam uma varredura das postings
+STOPWORDS = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela ele eles em entre
+essa esse esta este eu foi ha isso isto ja la lhe mais mas me mesmo meu minha na
+nas nem no nos o os ou para pela pelas pelo pelos por qual quais quando que quem
+se sem ser seu seus sua suas sao tem tambem um uma umas uns
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Minúsculas, sem acentos; números formatados geram também o token só com dígitos"""
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+
+    tokens = WORD_PATTERN.findall(text)
+    for match in NUMBER_PATTERN.findall(text):
+        digits = re.sub(r"\D", "", match)
+        if digits != match and len(digits) >= 4:
+            tokens.append(digits)
+    return tokens
+
+
+def matches_filter(metadata: Dict, where: Optional[Dict]) -> bool:
+    """Avalia um filtro no formato do ChromaDB ($eq, $ne, $in, $lt, $gt, $and, $or...) sobre os metadados"""
+    if not where:
+        return True
+    if "$and" in where:
+        return all(matches_filter(metadata, condition) for condition in where["$and"])
+    if "$or" in where:
+        return any(matches_filter(metadata, condition) for condition in where["$or"])
+
+    for field, condition in where.items():
+        value = metadata.get(field)
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for operator, expected in condition.items():
+            if operator == "$eq" and value != expected:
+                return False
+            if operator == "$ne" and value == expected:
+                return False
+            if operator == "$in" and value not in expected:
+                return False
+            if operator == "$nin" and value in expected:
+                return False
+            if operator in ("$lt", "$lte", "$gt", "$gte"):
+                if not isinstance(value, (int, float)):
+                    return False
+                if operator == "$lt" and not value < expected:
+                    return False
+                if operator == "$lte" and not value <= expected:
+                    return False
+                if operator == "$gt" and not value > expected:
+                    return False
+                if operator == "$gte" and not value >= expected:
+                    return False
+    return True
+
+
+class LexicalIndex:
+    """Índice invertido BM25 em SQLite, mantido em sincronia com a collection do ChromaDB
+
+    Atualizado de forma incremental: cada chunk ingerido adiciona suas postings e
+    ajusta df/estatísticas globais; remover um documento desfaz apenas as dele.
+    Escritas são serializadas; buscas não esperam pela ingestão.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        k1: float = 1.2,
+        b: float = 0.75,
+        max_df_ratio: float = 0.5,
+        prune_min_chunks: int = 1000,
+        prune_min_terms: int = 3
+    ):
+        self.k1 = k1
+        self.b = b
+        # Termos em mais que essa fração dos chunks são ignorados na consulta, só em
+        # collections com ao menos prune_min_chunks chunks e consultas com ao menos
+        # prune_min_terms termos: em shards pequenos a varredura é barata e o corte
+        # reduziria a consulta ao termo mais raro
+        self.max_df_ratio = max_df_ratio
+        self.prune_min_chunks = prune_min_chunks
+        self.prune_min_terms = prune_min_terms
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        # O lock serializa só as escritas; leituras usam uma conexão por thread (WAL permite leitores concorrentes)
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                chunk_id TEXT PRIMARY KEY,
+                collection TEXT NOT NULL,
+                document_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL,
+                length INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_chunks_document ON chunks (document_id);
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                chunk_id TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, chunk_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS ix_postings_chunk ON postings (chunk_id);
+            CREATE TABLE IF NOT EXISTS terms (
+                collection TEXT NOT NULL,
+                term TEXT NOT NULL,
+                df INTEGER NOT NULL,
+                PRIMARY KEY (collection, term)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS stats (
+                collection TEXT PRIMARY KEY,
+                chunk_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def add_chunks(self, collection: str, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        """Indexa chunks novos (chunks já indexados com o mesmo id são substituídos)"""
+        with self._lock:
+            self._delete_chunks(ids)
+
+            chunk_rows, posting_rows = [], []
+            df_delta: Counter = Counter()
+            total_length = 0
+
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                frequencies = Counter(tokenize(text))
+                length = sum(frequencies.values())
+                total_length += length
+                chunk_rows.append((
+                    chunk_id, collection, metadata.get("document_id", ""), text,
+                    json.dumps(metadata, ensure_ascii=False), length
+                ))
+                posting_rows.extend((term, chunk_id, tf) for term, tf in frequencies.items())
+                df_delta.update(frequencies.keys())
+
+            self._conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?)", chunk_rows)
+            self._conn.executemany("INSERT INTO postings VALUES (?, ?, ?)", posting_rows)
+            self._conn.executemany(
+                "INSERT INTO terms VALUES (?, ?, ?) "
+                "ON CONFLICT (collection, term) DO UPDATE SET df = df + excluded.df",
+                [(collection, term, df) for term, df in df_delta.items()]
+            )
+            self._update_stats(collection, len(chunk_rows), total_length)
+            self._conn.commit()
+
+    def delete_document(self, collection: str, document_id: str):
+        """Remove todos os chunks de um documento do índice"""
+        with self._lock:
+            ids = [row[0] for row in self._conn.execute(
+                "SELECT chunk_id FROM chunks WHERE collection = ? AND document_id = ?",
+                (collection, document_id)
+            )]
+            self._delete_chunks(ids)
+            self._conn.commit()
+
+    def delete_chunks(self, ids: List[str]):
+        """Remove chunks específicos do índice (de qualquer collection)"""
+        with self._lock:
+            self._delete_chunks(ids)
+            self._conn.commit()
+
+    def _delete_chunks(self, ids: List[str]):
+        """Remove chunks, postings e ajusta df/estatísticas da collection de cada um (sem commit)"""
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+
+            stats = self._conn.execute(
+                f"SELECT collection, COUNT(*), SUM(length) FROM chunks "
+                f"WHERE chunk_id IN ({placeholders}) GROUP BY collection", batch
+            ).fetchall()
+            if not stats:
+                continue
+
+            df_delta = self._conn.execute(
+                f"SELECT c.collection, p.term, COUNT(*) FROM postings p "
+                f"JOIN chunks c ON c.chunk_id = p.chunk_id "
+                f"WHERE p.chunk_id IN ({placeholders}) GROUP BY c.collection, p.term", batch
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE terms SET df = df - ? WHERE collection = ? AND term = ?",
+                [(count, collection, term) for collection, term, count in df_delta]
+            )
+            self._conn.execute(f"DELETE FROM postings WHERE chunk_id IN ({placeholders})", batch)
+            self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+            for collection, count, length in stats:
+                self._conn.execute("DELETE FROM terms WHERE collection = ? AND df <= 0", (collection,))
+                self._update_stats(collection, -count, -length)
+
+    def _update_stats(self, collection: str, chunk_delta: int, length_delta: int):
+        self._conn.execute(
+            "INSERT INTO stats VALUES (?, ?, ?) ON CONFLICT (collection) DO UPDATE SET "
+            "chunk_count = chunk_count + excluded.chunk_count, "
+            "total_length = total_length + excluded.total_length",
+            (collection, chunk_delta, length_delta)
+        )
+
+    def _reader(self) -> sqlite3.Connection:
+        """Conexão de leitura da thread atual"""
+        conn = getattr(self._readers, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._readers.conn = conn
+        return conn
+
+    def search(self, collection: str, query: str, k: int = 5, filter_metadata: Dict = None) -> List[Dict]:
+        """Busca BM25; retorna no mesmo formato de VectorService.similarity_search (score maior = melhor)
+
+        Stopwords são descartadas da consulta; em collections grandes, consultas
+        longas também perdem os termos muito frequentes (df acima de max_df_ratio
+        dos chunks) e, se sobrar nada, fica o termo mais raro. A pontuação é somada
+        no SQLite e só os melhores candidatos voltam para o Python.
+        """
+        terms = list(dict.fromkeys(term for term in tokenize(query) if term not in STOPWORDS))
+        if not terms:
+            return []
+
+        conn = self._reader()
+        stats = conn.execute(
+            "SELECT chunk_count, total_length FROM stats WHERE collection = ?", (collection,)
+        ).fetchone()
+        if not stats or not stats[0]:
+            return []
+        chunk_count, total_length = stats
+        avg_length = total_length / chunk_count
+
+        placeholders = ",".join("?" * len(terms))
+        document_frequencies = conn.execute(
+            f"SELECT term, df FROM terms WHERE collection = ? AND term IN ({placeholders})",
+            [collection, *terms]
+        ).fetchall()
+        if not document_frequencies:
+            return []
+        selected = document_frequencies
+        if chunk_count >= self.prune_min_chunks and len(document_frequencies) >= self.prune_min_terms:
+            selected = [(term, df) for term, df in document_frequencies if df <= chunk_count * self.max_df_ratio]
+            if not selected:
+                selected = [min(document_frequencies, key=lambda item: item[1])]
+
+        weights = [
+            (term, math.log(1 + (chunk_count - df + 0.5) / (df + 0.5)))
+            for term, df in selected
+        ]
+        values = ",".join("(?, ?)" for _ in weights)
+        # Pontua e ordena só com ids e comprimentos; texto e metadados apenas dos candidatos do bloco
+        sql = (
+            f"WITH query_terms (term, idf) AS (VALUES {values}) "
+            "SELECT s.chunk_id, c.content, c.metadata, s.score FROM ("
+            "SELECT p.chunk_id, SUM(q.idf * p.tf * ? / (p.tf + ? * (1 - ? + ? * c.length / ?))) AS score "
+            "FROM query_terms q JOIN postings p ON p.term = q.term "
+            "JOIN chunks c ON c.chunk_id = p.chunk_id "
+            "WHERE c.collection = ? "
+            "GROUP BY p.chunk_id ORDER BY score DESC LIMIT ? OFFSET ?"
+            ") s JOIN chunks c ON c.chunk_id = s.chunk_id ORDER BY s.score DESC"
+        )
+        parameters = [value for pair in weights for value in pair]
+        parameters += [self.k1 + 1, self.k1, self.b, self.b, avg_length, collection]
+
+        # Busca os candidatos em blocos até completar k resultados que passem no filtro
+        results = []
+        block = max(k * 4, 50)
+        offset = 0
+        while True:
+            rows = conn.execute(sql, parameters + [block, offset]).fetchall()
+            for _, content, metadata, score in rows:
+                metadata = json.loads(metadata)
+                if matches_filter(metadata, filter_metadata):
+                    results.append({"content": content, "metadata": metadata, "score": score})
+                    if len(results) >= k:
+                        return results
+            if len(rows) < block:
+                return results
+            offset += block
+            block *= 2
+
+    def count(self, collection: str) -> int:
+        row = self._reader().execute("SELECT chunk_count FROM stats WHERE collection = ?", (collection,)).fetchone()
+        return row[0] if row else 0
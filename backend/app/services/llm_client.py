@@ -0,0 +1,267 @@
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import random
+import threading
+import time
+
+# Status HTTP (atributo code dos erros do google.api_core e do ProviderError) que valem nova tentativa
+RETRYABLE_CODES = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """Abre após failure_threshold falhas seguidas e recusa chamadas por reset_seconds
+
+    Passado esse tempo, deixa uma única chamada de teste (meio-aberto): sucesso
+    fecha o circuito, falha o abre de novo.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if time.monotonic() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.reset_seconds and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def retry_after(self) -> int:
+        """Segundos até a próxima chamada de teste"""
+        if self.opened_at is None:
+            return 0
+        return max(1, int(self.reset_seconds - (time.monotonic() - self.opened_at) + 0.999))
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+    def release(self):
+        """Chamada interrompida sem resultado (ex.: cancelada): libera a vaga de teste sem contar falha"""
+        with self._lock:
+            self._trial = False
+
+
+class AsyncLLMClient:
+    """Chamadas assíncronas ao modelo (generate_content_async) com limites de concorrência e falha
+
+    - Semáforo global: no máximo max_concurrency chamadas em andamento no processo
+    - Timeout por tentativa (timeout_seconds) e prazo total da chamada (deadline_seconds)
+    - Erros 429/5xx e timeouts são repetidos até max_retries vezes, com backoff
+      exponencial e jitter completo (espera aleatória entre 0 e base * 2^tentativa)
+    - Circuit breaker: com o provedor fora do ar, recusa na hora
+
+    Quando não há resposta, levanta HTTPException 503 (com Retry-After) em vez de
+    devolver o texto do erro como se fosse a resposta. stream faz o mesmo para
+    respostas em partes. O breaker é consultado antes de esperar pelo semáforo
+    (com o circuito aberto a chamada falha na hora, mesmo com todas as vagas
+    presas em chamadas lentas) e de novo ao conseguir a vaga. Ele registra um
+    único resultado por chamada, depois das retentativas: uma requisição lenta
+    não abre o circuito sozinha.
+    """
+
+    def __init__(
+        self,
+        model,
+        max_concurrency: int = 8,
+        timeout_seconds: float = 30,
+        deadline_seconds: float = 60,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8,
+        breaker: CircuitBreaker = None
+    ):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @staticmethod
+    def is_retryable(error: Exception) -> bool:
+        return isinstance(error, asyncio.TimeoutError) or getattr(error, "code", None) in RETRYABLE_CODES
+
+    async def generate(self, prompt: str, generation_config: Dict = None, model=None) -> str:
+        """Texto gerado para o prompt; HTTPException 503 se o modelo não responder
+
+        model substitui o modelo do cliente nesta chamada (ex.: o modelo sem
+        system_instruction do chat simples), com os mesmos limites.
+        """
+        model = model or self.model
+        deadline = time.monotonic() + self.deadline_seconds
+
+        async with self._slot():
+            attempt = 0
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    response = await asyncio.wait_for(
+                        model.generate_content_async(prompt, generation_config=generation_config),
+                        timeout=min(self.timeout_seconds, max(remaining, 0))
+                    )
+                    text = response.text
+                except Exception as error:
+                    if not self.is_retryable(error):
+                        # Erro da requisição (ex.: prompt inválido): o provedor respondeu
+                        self.breaker.record_success()
+                        raise self._unavailable(f"LLM provider rejected the request: {str(error) or type(error).__name__}") from error
+                    if isinstance(error, asyncio.TimeoutError):
+                        self.timeouts += 1
+
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    attempt += 1
+                    if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                        # Uma falha no breaker por chamada, só depois de esgotar as retentativas
+                        self.breaker.record_failure()
+                        raise self._unavailable(f"LLM provider failed: {str(error) or type(error).__name__}") from error
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                    continue
+                except BaseException:
+                    # Cancelada (ex.: cliente desconectou): não conta como falha do provedor
+                    self.breaker.release()
+                    raise
+
+                self.breaker.record_success()
+                return text
+
+    async def stream(self, prompt: str, generation_config: Dict = None) -> AsyncIterator[str]:
+        """Partes do texto conforme o modelo gera; HTTPException 503 se o modelo falhar
+
+        O iterador síncrono do provedor (generate_content com stream=True) avança
+        numa thread, com timeout_seconds para cada parte. Falhas antes da primeira
+        parte são repetidas como em generate; depois dela, o texto já foi entregue
+        e a falha encerra o stream com 503.
+        """
+        deadline = time.monotonic() + self.deadline_seconds
+
+        async with self._slot():
+            attempt = 0
+            while True:
+                started = False
+                try:
+                    response = await self._in_thread(
+                        self.model.generate_content, prompt, generation_config=generation_config, stream=True
+                    )
+                    parts = iter(response)
+                    while True:
+                        chunk = await self._in_thread(next, parts, None)
+                        if chunk is None:
+                            break
+                        if chunk.text:
+                            started = True
+                            yield chunk.text
+                except Exception as error:
+                    retryable = self.is_retryable(error)
+                    if isinstance(error, asyncio.TimeoutError):
+                        self.timeouts += 1
+
+                    delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                    attempt += 1
+                    if started or not retryable or attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                        if retryable:
+                            self.breaker.record_failure()
+                        else:
+                            self.breaker.record_success()
+                        raise self._unavailable(f"LLM provider failed: {str(error) or type(error).__name__}") from error
+                    self.retries += 1
+                    await asyncio.sleep(delay)
+                    continue
+                except BaseException:
+                    # Stream fechado pelo consumidor ou cancelado: libera a vaga de teste do breaker
+                    self.breaker.release()
+                    raise
+
+                self.breaker.record_success()
+                return
+
+    @asynccontextmanager
+    async def _slot(self):
+        """Vaga no semáforo, com o breaker consultado antes e depois da espera
+
+        A consulta antes da espera faz a chamada falhar na hora com o circuito
+        aberto; a de depois recusa a chamada se o circuito abriu enquanto ela
+        esperava. As retentativas não consultam de novo.
+        """
+        self._admit()
+        try:
+            await self._semaphore.acquire()
+        except BaseException:
+            # Cancelada na fila: libera a vaga de teste do breaker, se era dela
+            self.breaker.release()
+            raise
+        try:
+            if self.breaker.state == "open":
+                self._reject()
+            self.in_flight += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+        finally:
+            self._semaphore.release()
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self._reject()
+
+    def _reject(self):
+        self.rejected += 1
+        raise self._unavailable("LLM provider unavailable (circuit open)", self.breaker.retry_after())
+
+    async def _in_thread(self, fn, *args, **kwargs):
+        """Executa uma chamada bloqueante do provedor numa thread, com timeout_seconds
+
+        No timeout a thread não é interrompida, apenas abandonada.
+        """
+        return await asyncio.wait_for(run_in_threadpool(fn, *args, **kwargs), timeout=self.timeout_seconds)
+
+    def _unavailable(self, detail: str, retry_after: int = None) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after or self.breaker.retry_after() or 1)}
+        )
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected
+        }
@@ -0,0 +1,145 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional
+import json
+import os
+
+import httpx
+
+
+class TextResponse:
+    """Resposta (ou parte de resposta) com a mesma interface usada do Gemini (.text)"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ProviderError(Exception):
+    """Falha do provedor; code é o status HTTP (429, 503...), usado nas retentativas do AsyncLLMClient"""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class LLMProvider(ABC):
+    """Modelo de linguagem usado pelo LLMService e pelo AsyncLLMClient
+
+    Mesma interface do GenerativeModel do Gemini: generate_content retorna um
+    objeto com .text (com stream=True, um iterador deles) e
+    generate_content_async é a versão assíncrona sem streaming.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def generate_content(self, prompt: str, generation_config: Dict = None, stream: bool = False):
+        raise NotImplementedError
+
+    @abstractmethod
+    async def generate_content_async(self, prompt: str, generation_config: Dict = None):
+        raise NotImplementedError
+
+
+class GeminiProvider(LLMProvider):
+    """Google Gemini (google-generativeai), com a chave em GEMINI_KEY"""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str, system_instruction: str = None):
+        import google.generativeai as genai
+
+        api_key = os.getenv("GEMINI_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_KEY not found in environment variables")
+
+        genai.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name, system_instruction=system_instruction)
+
+    def generate_content(self, prompt: str, generation_config: Dict = None, stream: bool = False):
+        return self.model.generate_content(prompt, generation_config=generation_config, stream=stream)
+
+    async def generate_content_async(self, prompt: str, generation_config: Dict = None):
+        return await self.model.generate_content_async(prompt, generation_config=generation_config)
+
+
+class HTTPProvider(LLMProvider):
+    """Provedor atrás de um serviço HTTP local (ex.: scripts.fake_llm_server)
+
+    POST {url}/generate com prompt, system_instruction, generation_config e
+    stream; a resposta é {"text": ...} ou, com stream, uma linha JSON por parte.
+    Status de erro e falhas de conexão viram ProviderError com o código HTTP.
+    """
+
+    name = "http"
+
+    def __init__(self, url: str, system_instruction: str = None, timeout_seconds: float = 60):
+        self.url = url.rstrip("/") + "/generate"
+        self.system_instruction = system_instruction
+        self.timeout_seconds = timeout_seconds
+
+    def _payload(self, prompt: str, generation_config: Dict, stream: bool) -> Dict:
+        return {
+            "prompt": prompt,
+            "system_instruction": self.system_instruction,
+            "generation_config": generation_config,
+            "stream": stream
+        }
+
+    @staticmethod
+    def _check(response: httpx.Response):
+        if response.status_code >= 400:
+            raise ProviderError(f"HTTP {response.status_code}: {response.text[:200]}", response.status_code)
+
+    def generate_content(self, prompt: str, generation_config: Dict = None, stream: bool = False):
+        if stream:
+            return self._stream(self._payload(prompt, generation_config, True))
+        try:
+            response = httpx.post(self.url, json=self._payload(prompt, generation_config, False), timeout=self.timeout_seconds)
+        except httpx.TransportError as error:
+            raise ProviderError(str(error) or type(error).__name__, 503) from error
+        self._check(response)
+        return TextResponse(response.json()["text"])
+
+    def _stream(self, payload: Dict) -> Iterator[TextResponse]:
+        try:
+            with httpx.stream("POST", self.url, json=payload, timeout=self.timeout_seconds) as response:
+                if response.status_code >= 400:
+                    response.read()
+                self._check(response)
+                for line in response.iter_lines():
+                    if line:
+                        yield TextResponse(json.loads(line)["text"])
+        except httpx.TransportError as error:
+            raise ProviderError(str(error) or type(error).__name__, 503) from error
+
+    async def generate_content_async(self, prompt: str, generation_config: Dict = None):
+        try:
+            async with httpx.AsyncClient(timeout=self.timeout_seconds) as client:
+                response = await client.post(self.url, json=self._payload(prompt, generation_config, False))
+        except httpx.TransportError as error:
+            raise ProviderError(str(error) or type(error).__name__, 503) from error
+        self._check(response)
+        return TextResponse(response.json()["text"])
+
+
+def create_provider(name: Optional[str], system_instruction: str = None) -> LLMProvider:
+    """Provedor configurado em LLM_PROVIDER: gemini (padrão), fake ou http"""
+    if name == "fake":
+        from .stub_llm import StubGenerativeModel
+
+        seed = os.getenv("LLM_FAKE_SEED")
+        return StubGenerativeModel(
+            latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", "0")),
+            tokens_per_second=float(os.getenv("LLM_FAKE_TOKENS_PER_SECOND", "50")),
+            error_rate=float(os.getenv("LLM_FAKE_ERROR_RATE", "0")),
+            error_code=int(os.getenv("LLM_FAKE_ERROR_CODE", "429")),
+            seed=int(seed) if seed else None,
+            system_instruction=system_instruction
+        )
+    if name == "http":
+        return HTTPProvider(
+            os.getenv("LLM_HTTP_URL", "http://localhost:8001"),
+            system_instruction=system_instruction,
+            timeout_seconds=float(os.getenv("LLM_HTTP_TIMEOUT_SECONDS", "60"))
+        )
+    return GeminiProvider(os.getenv("LLM_MODEL", "gemini-2.0-flash-exp"), system_instruction=system_instruction)
@@ -1,22 +1,47 @@
-import google.generativeai as genai
-from typing import List, Dict, Tuple, Optional
+from typing import List, Dict, Tuple, Optional, AsyncIterator
 import os
 from dotenv import load_dotenv
 
+from .llm_provider import create_provider
+from .prompt_builder import PromptBuilder, SYSTEM_INSTRUCTION
+from .llm_client import AsyncLLMClient, CircuitBreaker
+
 # Carrega variáveis de ambiente
 load_dotenv()
 
 class LLMService:
     def __init__(self):
-        # Configura o Gemini
-        api_key = os.getenv("GEMINI_KEY")
-        if not api_key:
-            raise ValueError("GEMINI_KEY not found in environment variables")
+        # gemini (padrão), fake (modelo local determinístico) ou http (serviço local, ex.: scripts.fake_llm_server)
+        provider = os.getenv("LLM_PROVIDER", "gemini").lower()
+        if os.getenv("LLM_STUB", "false").lower() == "true":
+            provider = "fake"
+        
+        # As instruções fixas do RAG vão como system_instruction (prefixo igual em todas as requisições);
+        # o chat simples usa o modelo sem elas
+        self.model = create_provider(provider, system_instruction=SYSTEM_INSTRUCTION)
+        self.simple_model = create_provider(provider)
         
-        genai.configure(api_key=api_key)
+        # Orçamento de tokens do prompt (instruções + pergunta + contexto + histórico)
+        self.prompt_builder = PromptBuilder(
+            max_tokens=int(os.getenv("PROMPT_TOKEN_BUDGET", "8000")),
+            history_messages=int(os.getenv("PROMPT_HISTORY_MESSAGES", "6")),
+            min_chunk_tokens=int(os.getenv("PROMPT_MIN_CHUNK_TOKENS", "100"))
+        )
         
-        # Usa o modelo Gemini 2.0 Flash Exp
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        # Cliente do chat: concorrência, timeouts, retentativas e circuit breaker (também nas rotas síncronas e no streaming)
+        self.client = AsyncLLMClient(
+            self.model,
+            max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+            timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "30")),
+            deadline_seconds=float(os.getenv("LLM_DEADLINE_SECONDS", "60")),
+            max_retries=int(os.getenv("LLM_MAX_RETRIES", "3")),
+            backoff_base=float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5")),
+            backoff_max=float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8")),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+                reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+            )
+        )
         
         # Configurações do modelo
         self.generation_config = {
@@ -26,129 +51,56 @@ class LLMService:
             "max_output_tokens": 2048,
         }
     
-    def generate_response_with_citations(
-        self, 
-        prompt: str, 
-        context_chunks: List[Dict] = None,
+    async def agenerate_response_with_citations(
+        self,
+        prompt: str,
+        context_chunks: List[Dict],
         chat_history: List[Dict] = None
     ) -> Tuple[str, List[Dict]]:
-        """Gera resposta usando o contexto recuperado do RAG com citações numeradas e histórico de conversa"""
-        
-        if not context_chunks:
-            return self.generate_simple_response(prompt), []
-        
-        # 1. Monta o histórico da conversa se existir
-        history_context = ""
-        if chat_history and len(chat_history) > 0:
-            history_context = "\n=== HISTÓRICO DA CONVERSA ===\n"
-            for msg in chat_history[-6:]:  # Últimas 3 interações (6 mensagens)
-                role = "USUÁRIO" if msg["role"] == "user" else "ASSISTENTE"
-                history_context += f"{role}: {msg['content']}\n\n"
-            history_context += "=== FIM DO HISTÓRICO ===\n\n"
-        
-        # 2. Monta o contexto numerado para citações
-        context_with_numbers = ""
-        sources = []
-        
-        for i, chunk in enumerate(context_chunks, 1):
-            filename = chunk.get('metadata', {}).get('filename', 'Documento desconhecido')
-            chunk_index = chunk.get('metadata', {}).get('chunk_index', 0)
-            
-            context_with_numbers += f"\n[{i}] Fonte: {filename} (Seção {chunk_index + 1})\n"
-            context_with_numbers += f"Conteúdo: {chunk['content']}\n"
-            
-            # Adiciona à lista de fontes para retorno
-            sources.append({
-                "number": i,
-                "filename": filename,
-                "chunk_index": chunk_index,
-                "content_preview": chunk['content'][:200] + "..." if len(chunk['content']) > 200 else chunk['content'],
-                "relevance_score": chunk.get('score', 0)
-            })
-        
-        # 3. Prompt otimizado para citações com contexto de conversa
-        system_prompt = """Você é um assistente especializado em legislação tributária brasileira e análise de documentos fiscais eletrônicos (NF-e, CT-e, NFS-e).
-
-# SEU PAPEL
-Você auxilia profissionais contábeis, fiscais e empresariais na interpretação de legislação tributária e análise de documentos fiscais, fornecendo respostas precisas, fundamentadas e com citações claras.
-
-# INSTRUÇÕES OBRIGATÓRIAS
-
-## Uso de Fontes
-1. Use EXCLUSIVAMENTE as informações dos documentos fornecidos no "CONTEXTO DOS DOCUMENTOS"
-2. SEMPRE cite as fontes usando números entre colchetes [1], [2], etc. ao mencionar informações específicas
-3. Se a informação solicitada NÃO estiver nos documentos, responda: "Esta informação não está disponível nos documentos fornecidos"
-4. Não invente, deduza ou extrapole informações que não estejam explícitas nos documentos
-
-## Continuidade da Conversa
-5. Se houver "HISTÓRICO DA CONVERSA", use-o para:
-   - Entender referências indiretas ("essa nota", "dele", "o fornecedor anterior", etc.)
-   - Manter coerência entre perguntas relacionadas
-   - Conectar informações de perguntas anteriores com a atual
-6. Quando o usuário fizer perguntas de acompanhamento, identifique a que documento ou informação ele se refere
-
-## Estilo e Formato
-7. Seja preciso, objetivo e profissional
-8. Use linguagem técnica apropriada para a área contábil/fiscal brasileira
-9. Organize respostas complexas em tópicos ou tabelas quando apropriado
-10. Para valores monetários, use sempre formato brasileiro: R$ 1.234,56
-
-## Domínio Específico
-11. Ao analisar Notas Fiscais, priorize: impostos (ICMS, IPI, PIS, COFINS), NCM, CFOP, valores, datas
-12. Ao analisar legislação, identifique: artigos, parágrafos, incisos, vigência, aplicabilidade
-13. Conecte NFe com legislação quando relevante (ex: CFOP 5102 → operação interna com mercadoria)
-
-# EXEMPLOS DE RESPOSTAS
-
-## Exemplo 1: Análise de NF-e
-Usuário: "Qual o valor total de ICMS da nota 35240?"
-Resposta: "De acordo com a Nota Fiscal 35240 [1], o valor total de ICMS é R$ 1.234,56. A base de cálculo foi de R$ 6.858,67 com alíquota de 18% [1]."
-
-## Exemplo 2: Com histórico
-Histórico: Usuário perguntou sobre NF-e do fornecedor ABC
-Usuário: "Qual o NCM do primeiro item?"
-Resposta: "O primeiro item da Nota Fiscal do fornecedor ABC possui NCM 84159000 [2], classificado como 'Máquinas para fabricação' [2]."
-
-## Exemplo 3: Sem informação
-Usuário: "Esta operação está isenta de IPI?"
-Resposta: "Esta informação não está disponível nos documentos fornecidos. Para determinar a isenção de IPI, seria necessário consultar a legislação específica ou o detalhamento do imposto na nota fiscal."
-
-## Exemplo 4: Cruzamento NF-e + Legislação
-Usuário: "O CFOP 6102 está correto para esta venda?"
-Resposta: "Segundo a nota fiscal [1], foi utilizado CFOP 6102 (Venda de mercadoria adquirida de terceiros). De acordo com o Anexo do RICMS [3], o CFOP 6102 é aplicável para operações interestaduais de venda de mercadoria. Como a operação tem origem em SP e destino em MG [1], o CFOP está correto."
-
-{history}
-
-# CONTEXTO DOS DOCUMENTOS
-{context}
-
-# PERGUNTA ATUAL DO USUÁRIO
-{question}
-
-# SUA RESPOSTA (com citações):"""
-        
-        final_prompt = system_prompt.format(
-            history=history_context,
-            context=context_with_numbers,
-            question=prompt
+        """Gera resposta usando o contexto recuperado do RAG com citações numeradas e histórico de conversa
+
+        A chamada passa pelo AsyncLLMClient (concorrência, timeouts, retentativas e
+        circuit breaker); falhas do provedor levantam HTTPException 503 em vez de
+        virar texto da resposta.
+        """
+        final_prompt, sources = self.build_prompt(prompt, context_chunks, chat_history)
+        answer = await self.client.generate(final_prompt, self.generation_config)
+        return answer, sources
+    
+    def stream_response_with_citations(
+        self,
+        prompt: str,
+        context_chunks: List[Dict],
+        chat_history: List[Dict] = None
+    ) -> Tuple[AsyncIterator[str], List[Dict]]:
+        """Como agenerate_response_with_citations, mas a resposta é entregue em partes conforme é gerada
+
+        As partes vêm do AsyncLLMClient (semáforo, timeout por parte e circuit breaker);
+        uma falha do provedor levanta HTTPException 503 durante a iteração.
+        """
+        final_prompt, sources = self.build_prompt(prompt, context_chunks, chat_history)
+        return self.client.stream(final_prompt, self.generation_config), sources
+    
+    def build_prompt(
+        self,
+        prompt: str,
+        context_chunks: List[Dict],
+        chat_history: List[Dict] = None
+    ) -> Tuple[str, List[Dict]]:
+        """Monta o texto da requisição (histórico, contexto numerado, pergunta) dentro do orçamento de tokens
+
+        As instruções fixas não entram no texto: vão como system_instruction do modelo.
+        """
+        final_prompt, sources, stats = self.prompt_builder.build(prompt, context_chunks, chat_history)
+        print(
+            f"Prompt: {stats['prompt_tokens']}/{stats['budget']} tokens "
+            f"(instruções {stats['system_tokens']}, contexto {stats['context_tokens']}, "
+            f"histórico {stats['history_tokens']}, pergunta {stats['question_tokens']}) | "
+            f"chunks {stats['chunks_used']} usados, {stats['chunks_truncated']} truncados, "
+            f"{stats['chunks_dropped']} descartados | {stats['history_messages']} mensagens de histórico"
         )
-        
-        try:
-            response = self.model.generate_content(
-                final_prompt,
-                generation_config=self.generation_config
-            )
-            return response.text, sources
-        except Exception as e:
-            return f"Erro ao gerar resposta: {str(e)}", sources
+        return final_prompt, sources
     
-    def generate_simple_response(self, prompt: str) -> str:
-        """Gera resposta simples sem contexto RAG"""
-        try:
-            response = self.model.generate_content(
-                prompt,
-                generation_config=self.generation_config
-            )
-            return response.text
-        except Exception as e:
-            return f"Erro ao gerar resposta: {str(e)}"
\ No newline at end of file
+    async def agenerate_simple_response(self, prompt: str) -> str:
+        """Gera resposta simples sem contexto RAG, pelo AsyncLLMClient (HTTPException 503 se o provedor falhar)"""
+        return await self.client.generate(prompt, self.generation_config, model=self.simple_model)
\ No newline at end of file
@@ -0,0 +1,400 @@
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from .lexical_index import matches_filter
+from .vector_backend import StoredChunk, VectorBackend
+
+# Linhas convertidas para float32 por vez no produto com a consulta
+SEARCH_BLOCK_ROWS = 65536
+# Consultas pontuadas juntas por leitura da matriz (limita a matriz de scores em memória)
+SEARCH_QUERY_BLOCK = 64
+INITIAL_CAPACITY = 1024
+
+
+class MemmapCollection:
+    """Uma collection em disco: matriz float16 memory-mapped + tabela de metadados em SQLite
+
+    vectors.npy só cresce (append); cada chunk ocupa uma linha com o vetor já
+    normalizado. Remover ou substituir um chunk apaga a linha da tabela e marca
+    a linha da matriz como tombstone, liberada só na compactação.
+
+    Vários processos podem abrir a mesma collection: escritas e compactação
+    seguram um flock exclusivo no arquivo .lock do diretório, e buscas um
+    compartilhado. Cada escrita incrementa a geração gravada em meta; ao ver uma
+    geração diferente, o processo recarrega tamanho, matriz e linhas vivas.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.vectors_path = os.path.join(directory, "vectors.npy")
+        self.lock_path = os.path.join(directory, ".lock")
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(os.path.join(directory, "metadata.sqlite"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                row INTEGER PRIMARY KEY,
+                chunk_id TEXT NOT NULL UNIQUE,
+                document_id TEXT NOT NULL,
+                content TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS ix_chunks_document ON chunks (document_id);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+        with self._file_lock(fcntl.LOCK_SH):
+            self._load()
+
+    @contextmanager
+    def _file_lock(self, operation: int):
+        """flock no arquivo .lock da collection (LOCK_EX para escrita, LOCK_SH para leitura)
+
+        Cada chamada abre o arquivo de novo: flocks de descritores diferentes se
+        excluem também entre threads do mesmo processo. Deve ser adquirido antes
+        de self._lock.
+        """
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _meta(self, key: str) -> int:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _load(self):
+        """Lê do disco o estado da collection (tamanho, matriz e linhas vivas)"""
+        # Linhas gravadas na matriz (vivas + tombstones); o restante é capacidade livre
+        self.size = self._meta("size")
+        self.generation = self._meta("generation")
+
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+") if os.path.exists(self.vectors_path) else None
+        self._alive = np.zeros(len(self._vectors) if self._vectors is not None else 0, dtype=bool)
+        self._alive[[row for row, in self._conn.execute("SELECT row FROM chunks")]] = True
+
+    def _sync(self):
+        """Recarrega o estado se outro processo alterou a collection (com algum flock e self._lock)"""
+        if self._meta("generation") != self.generation:
+            self._load()
+
+    def _commit(self):
+        """Incrementa a geração e confirma a escrita (com o flock exclusivo)"""
+        self.generation += 1
+        self._conn.execute(
+            "INSERT INTO meta VALUES ('generation', ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (self.generation,)
+        )
+        self._conn.commit()
+
+    @property
+    def live_count(self) -> int:
+        """Linhas vivas do estado carregado (sem _sync; use count() fora do lock)"""
+        return int(self._alive[:self.size].sum())
+
+    def count(self) -> int:
+        """Linhas vivas, recarregando antes o que outros processos gravaram"""
+        with self._file_lock(fcntl.LOCK_SH), self._lock:
+            self._sync()
+            return self.live_count
+
+    def add(self, ids: List[str], embeddings: List[List[float]], texts: List[str], metadatas: List[Dict]):
+        """Acrescenta chunks ao final da matriz; ids já existentes viram tombstones"""
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms == 0, 1, norms)
+
+        with self._file_lock(fcntl.LOCK_EX), self._lock:
+            self._sync()
+            self._delete(ids)
+            self._ensure_capacity(self.size + len(ids), vectors.shape[1])
+
+            start = self.size
+            self._vectors[start:start + len(ids)] = vectors.astype(np.float16)
+            self._vectors.flush()
+
+            # A tabela só passa a apontar para as linhas depois que a matriz foi gravada
+            self._conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?, ?, ?)",
+                [
+                    (start + i, chunk_id, metadata.get("document_id", ""), text, json.dumps(metadata, ensure_ascii=False))
+                    for i, (chunk_id, text, metadata) in enumerate(zip(ids, texts, metadatas))
+                ]
+            )
+            self._set_size(start + len(ids))
+            self._commit()
+            self._alive[start:start + len(ids)] = True
+
+    def _ensure_capacity(self, required: int, dim: int):
+        """Dobra a capacidade do arquivo (cópia + troca atômica) quando necessário"""
+        if self._vectors is not None and self._vectors.shape[1] != dim:
+            raise ValueError(f"Dimensão {dim} diferente da collection ({self._vectors.shape[1]})")
+        capacity = len(self._vectors) if self._vectors is not None else 0
+        if required <= capacity:
+            return
+        self._resize(max(required, capacity * 2, INITIAL_CAPACITY), dim)
+
+    def _resize(self, capacity: int, dim: int, rows: Optional[np.ndarray] = None):
+        """Grava uma nova matriz com as linhas atuais (ou só as indicadas, na ordem) e substitui a anterior"""
+        temporary_path = self.vectors_path + ".tmp"
+        resized = np.lib.format.open_memmap(temporary_path, mode="w+", dtype=np.float16, shape=(capacity, dim))
+        if self._vectors is not None:
+            source = np.arange(self.size) if rows is None else rows
+            for start in range(0, len(source), SEARCH_BLOCK_ROWS):
+                block = source[start:start + SEARCH_BLOCK_ROWS]
+                resized[start:start + len(block)] = self._vectors[block]
+        resized.flush()
+        del resized
+        os.replace(temporary_path, self.vectors_path)
+
+        self._vectors = np.load(self.vectors_path, mmap_mode="r+")
+        alive = np.zeros(capacity, dtype=bool)
+        kept = min(capacity, len(self._alive))
+        alive[:kept] = self._alive[:kept]
+        self._alive = alive
+
+    def _set_size(self, size: int):
+        self.size = size
+        self._conn.execute(
+            "INSERT INTO meta VALUES ('size', ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value", (size,)
+        )
+
+    def search(self, embedding: List[float], k: int, filter_metadata: Dict = None) -> List[Dict]:
+        """Top-k exato por cosseno; retorna a distância L2² entre vetores unitários (2 - 2·cos)"""
+        return self.search_many([embedding], k, filter_metadata)[0]
+
+    def search_many(self, embeddings: List[List[float]], k: int, filter_metadata: Dict = None) -> List[List[Dict]]:
+        """Top-k de várias consultas com uma única leitura da matriz (um produto por bloco para todas)"""
+        # O flock compartilhado impede que uma compactação renumere as linhas durante a busca
+        with self._file_lock(fcntl.LOCK_SH):
+            return self._search_many(embeddings, k, filter_metadata)
+
+    def _search_many(self, embeddings: List[List[float]], k: int, filter_metadata: Dict = None) -> List[List[Dict]]:
+        with self._lock:
+            self._sync()
+            if self._vectors is None or self.size == 0:
+                return [[] for _ in embeddings]
+            vectors, size = self._vectors, self.size
+            alive = self._alive[:size].copy()
+        live = int(alive.sum())
+        if live == 0:
+            return [[] for _ in embeddings]
+
+        queries = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries /= np.where(norms == 0, 1, norms)
+
+        results = []
+        for query_start in range(0, len(queries), SEARCH_QUERY_BLOCK):
+            group = queries[query_start:query_start + SEARCH_QUERY_BLOCK]
+            scores = np.empty((len(group), size), dtype=np.float32)
+            for start in range(0, size, SEARCH_BLOCK_ROWS):
+                block = vectors[start:min(start + SEARCH_BLOCK_ROWS, size)]
+                scores[:, start:start + len(block)] = group @ block.astype(np.float32).T
+            scores[:, ~alive] = -np.inf
+            results.extend(self._top_k(query_scores, live, k, filter_metadata) for query_scores in scores)
+        return results
+
+    def _top_k(self, scores: np.ndarray, live: int, k: int, filter_metadata: Dict = None) -> List[Dict]:
+        # Com filtro, busca mais candidatos até completar k ou esgotar as linhas vivas
+        size = len(scores)
+        fetch = min(k if not filter_metadata else max(k * 4, 50), live)
+        while True:
+            top = np.argpartition(-scores, fetch - 1)[:fetch] if fetch < size else np.arange(size)
+            top = top[np.argsort(-scores[top])]
+            top = top[np.isfinite(scores[top])]
+
+            results = []
+            for row, (content, metadata) in zip(top, self._rows(top.tolist())):
+                if content is None or not matches_filter(metadata, filter_metadata):
+                    continue
+                results.append({"content": content, "metadata": metadata, "score": max(float(2 - 2 * scores[row]), 0.0)})
+                if len(results) >= k:
+                    return results
+            if fetch >= live:
+                return results
+            fetch = min(fetch * 4, live)
+
+    def _rows(self, rows: List[int]) -> List:
+        """(conteúdo, metadados) de cada linha, na ordem pedida; (None, None) se a linha foi removida"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(rows), 500):
+                batch = rows[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for row, content, metadata in self._conn.execute(
+                    f"SELECT row, content, metadata FROM chunks WHERE row IN ({placeholders})", batch
+                ):
+                    found[row] = (content, json.loads(metadata))
+        return [found.get(row, (None, None)) for row in rows]
+
+    def get(self, ids: List[str] = None, where: Dict = None) -> List[StoredChunk]:
+        """Chunks pelo id e/ou filtro de metadados, sem tocar na matriz"""
+        query, params = "SELECT chunk_id, content, metadata FROM chunks", []
+        if ids is not None:
+            if not ids:
+                return []
+            query += f" WHERE chunk_id IN ({','.join('?' * len(ids))})"
+            params = list(ids)
+        elif self._document_id(where):
+            query += " WHERE document_id = ?"
+            params = [self._document_id(where)]
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY row", params).fetchall()
+        chunks = [(chunk_id, content, json.loads(metadata)) for chunk_id, content, metadata in rows]
+        return [chunk for chunk in chunks if matches_filter(chunk[2], where)]
+
+    @staticmethod
+    def _document_id(where: Optional[Dict]) -> Optional[str]:
+        """document_id de uma condição de igualdade no filtro (no topo ou dentro de $and)"""
+        for condition in (where or {}).get("$and", [where or {}]):
+            value = condition.get("document_id")
+            if isinstance(value, dict):
+                value = value.get("$eq")
+            if isinstance(value, str):
+                return value
+        return None
+
+    def delete(self, ids: List[str]):
+        with self._file_lock(fcntl.LOCK_EX), self._lock:
+            self._sync()
+            self._delete(ids)
+            self._commit()
+
+    def _delete(self, ids: List[str]):
+        """Tombstone: remove a linha da tabela e a marca como morta na matriz (sem commit)"""
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            placeholders = ",".join("?" * len(batch))
+            rows = [row for row, in self._conn.execute(
+                f"SELECT row FROM chunks WHERE chunk_id IN ({placeholders})", batch
+            )]
+            if rows:
+                self._conn.execute(f"DELETE FROM chunks WHERE chunk_id IN ({placeholders})", batch)
+                self._alive[rows] = False
+
+    def compact(self) -> Dict:
+        """Reescreve a matriz só com as linhas vivas, renumerando a tabela de metadados"""
+        with self._file_lock(fcntl.LOCK_EX), self._lock:
+            self._sync()
+            before = self.size
+            if self._vectors is None:
+                return {"rows_before": 0, "rows_after": 0}
+
+            rows = np.flatnonzero(self._alive[:self.size])
+            self._resize(max(len(rows), INITIAL_CAPACITY), self._vectors.shape[1], rows)
+
+            # Em ordem crescente a nova posição nunca colide com uma linha ainda não movida
+            self._conn.executemany(
+                "UPDATE chunks SET row = ? WHERE row = ?",
+                [(new, int(old)) for new, old in enumerate(rows)]
+            )
+            self._set_size(len(rows))
+            self._commit()
+
+            self._alive[:] = False
+            self._alive[:len(rows)] = True
+            return {"rows_before": before, "rows_after": len(rows)}
+
+    def stats(self) -> Dict:
+        with self._file_lock(fcntl.LOCK_SH), self._lock:
+            self._sync()
+            live = self.live_count
+            return {
+                "rows": self.size,
+                "live": live,
+                "tombstones": self.size - live,
+                "capacity": len(self._alive),
+                "dim": self._vectors.shape[1] if self._vectors is not None else None
+            }
+
+
+class MemmapBackend(VectorBackend):
+    """Busca exata (força bruta) sobre matrizes float16 memory-mapped, uma por collection
+
+    Sem índice aproximado: o recall é exato e a memória é só a da matriz
+    (2 bytes por dimensão por chunk), paginada pelo sistema operacional.
+    """
+
+    name = "memmap"
+
+    def __init__(self, directory: str, embeddings: Callable):
+        self.directory = directory
+        # Função que retorna o modelo de embeddings (carregado só quando necessário)
+        self._embeddings = embeddings
+        self._collections: Dict[str, MemmapCollection] = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def collection(self, name: str) -> MemmapCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            with self._lock:
+                collection = self._collections.get(name)
+                if collection is None:
+                    collection = MemmapCollection(os.path.join(self.directory, name))
+                    self._collections[name] = collection
+        return collection
+
+    def list_collections(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if os.path.exists(os.path.join(self.directory, name, "metadata.sqlite"))
+        )
+
+    def _exists(self, name: str) -> bool:
+        return name in self._collections or name in self.list_collections()
+
+    def add_texts(self, collection: str, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        embeddings = self._embeddings().embed_documents(texts)
+        self.collection(collection).add(ids, embeddings, texts, metadatas)
+
+    def search_by_vector(self, collection: str, embedding: List[float], k: int, filter_metadata: Dict = None) -> List[Dict]:
+        if not self._exists(collection):
+            return []
+        return self.collection(collection).search(embedding, k, filter_metadata)
+
+    def search_by_vectors(self, collection: str, embeddings: List[List[float]], k: int, filter_metadata: Dict = None) -> List[List[Dict]]:
+        if not self._exists(collection):
+            return [[] for _ in embeddings]
+        return self.collection(collection).search_many(embeddings, k, filter_metadata)
+
+    def get(self, collection: str, ids: List[str] = None, where: Dict = None) -> List[StoredChunk]:
+        if not self._exists(collection):
+            return []
+        return self.collection(collection).get(ids, where)
+
+    def delete(self, collection: str, ids: List[str]):
+        if ids and self._exists(collection):
+            self.collection(collection).delete(ids)
+
+    def count(self, collection: str) -> int:
+        return self.collection(collection).count() if self._exists(collection) else 0
+
+    def describe(self, collection: str) -> Dict:
+        return self.collection(collection).stats() if self._exists(collection) else {}
+
+    def compact(self, collection: str) -> Dict:
+        return self.collection(collection).compact()
+
+    def stats(self) -> Dict:
+        return {name: self.collection(name).stats() for name in self.list_collections()}
@@ -0,0 +1,341 @@
+import xml.etree.ElementTree as ET
+from typing import Dict, List, Optional, Tuple
+import codecs
+
+from .nfe_service import NFeService
+
+class NFeParser:
+    """Parser incremental de XML de NF-e
+
+    Lê o arquivo uma única vez em blocos, respeita o encoding declarado no
+    prólogo e percorre os filhos de infNFe conforme são fechados. Cada filho é
+    convertido no mesmo formato de dicionário do xmltodict e descartado em
+    seguida, então os itens (det) são formatados um a um sem manter a árvore
+    inteira em memória. O texto gerado é idêntico ao formato anterior.
+    """
+
+    # Caminhos aceitos até o elemento infNFe (nfeProc/NFe, NFe ou raiz)
+    INFNFE_PARENTS = (["nfeProc", "NFe"], ["NFe"], [])
+
+    def __init__(self, chunk_size: int = 64 * 1024):
+        self.chunk_size = chunk_size
+
+    def parse(self, file_path: str) -> Tuple[str, Optional[Dict]]:
+        """Retorna o texto formatado da NF-e e o registro estruturado (None se não for uma NF-e válida)"""
+        try:
+            result = self._parse(file_path, fallback_encoding=None)
+        except ET.ParseError as e:
+            # Arquivos em ISO-8859-1 sem declaração de encoding
+            try:
+                result = self._parse(file_path, fallback_encoding="iso-8859-1")
+            except ET.ParseError:
+                return f"Erro ao processar XML: {str(e)}\n\nConteúdo original:\n{self._read_preview(file_path)}...", None
+
+        root_tag, infNFe, has_det, det_parts, items = result
+
+        if not infNFe and not has_det:
+            return f"Dados fiscais não encontrados ou estrutura inválida.\n\nEstrutura encontrada: {[root_tag]}", None
+
+        parts = self._format_header(infNFe)
+        parts.append("--- PRODUTOS/SERVIÇOS ---\n")
+        parts.extend(det_parts)
+        parts.extend(self._format_footer(infNFe))
+
+        record = NFeService.build_record(infNFe)
+        record["items"] = items
+
+        return "".join(parts).strip(), record
+
+    def _parse(self, file_path: str, fallback_encoding: Optional[str]):
+        """Percorre o XML em streaming, acumulando as seções de infNFe e os itens já formatados"""
+        target = _NFeTarget(self.INFNFE_PARENTS)
+        parser = ET.XMLParser(target=target, encoding=fallback_encoding)
+
+        with open(file_path, "rb") as file:
+            first = True
+            while True:
+                chunk = file.read(self.chunk_size)
+                if first:
+                    # Remove BOM e espaços antes do prólogo
+                    chunk = chunk.lstrip()
+                    if chunk.startswith(codecs.BOM_UTF8):
+                        chunk = chunk[len(codecs.BOM_UTF8):].lstrip()
+                    first = False
+                if not chunk:
+                    break
+                parser.feed(chunk)
+        parser.close()
+
+        return target.root_tag, target.infNFe, target.has_det, target.det_parts, target.items
+
+    def _read_preview(self, file_path: str) -> str:
+        """Primeiros 1000 caracteres do arquivo, para mensagens de erro"""
+        with open(file_path, "rb") as file:
+            data = file.read(4000)
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            text = data.decode("iso-8859-1")
+        text = text.strip()
+        if text.startswith('\ufeff'):
+            text = text[1:]
+        return text[:1000]
+
+    @staticmethod
+    def _format_header(infNFe: Dict) -> List[str]:
+        """Cabeçalho, emitente e destinatário"""
+        parts = []
+
+        # 2. CABEÇALHO DA NOTA
+        ide = infNFe.get('ide', {})
+        parts.append("=== NOTA FISCAL ELETRÔNICA ===\n\n")
+        parts.append(f"Chave de Acesso: {infNFe.get('@Id', 'N/A').replace('NFe', '')}\n")
+        parts.append(f"Número: {ide.get('nNF', 'N/A')}\n")
+        parts.append(f"Série: {ide.get('serie', 'N/A')}\n")
+        parts.append(f"Modelo: {ide.get('mod', 'N/A')}\n")
+        parts.append(f"Data de Emissão: {ide.get('dhEmi', 'N/A')}\n")
+        parts.append(f"Data de Saída/Entrada: {ide.get('dhSaiEnt', ide.get('dhEmi', 'N/A'))}\n")
+        parts.append(f"Natureza da Operação: {ide.get('natOp', 'N/A')}\n")
+        parts.append(f"Tipo de Operação: {'Saída' if ide.get('tpNF') == '1' else 'Entrada' if ide.get('tpNF') == '0' else 'N/A'}\n")
+        parts.append(f"Finalidade: {ide.get('finNFe', 'N/A')}\n")
+        parts.append(f"CFOP Principal: {ide.get('CFOP', 'N/A')}\n\n")
+
+        # 3. EMITENTE
+        emit = infNFe.get('emit', {})
+        enderEmit = emit.get('enderEmit', {})
+        parts.append("--- EMITENTE ---\n")
+        parts.append(f"CNPJ: {emit.get('CNPJ', 'N/A')}\n")
+        parts.append(f"Razão Social: {emit.get('xNome', 'N/A')}\n")
+        parts.append(f"Nome Fantasia: {emit.get('xFant', 'N/A')}\n")
+        parts.append(f"IE: {emit.get('IE', 'N/A')}\n")
+        parts.append(f"Endereço: {enderEmit.get('xLgr', 'N/A')}, {enderEmit.get('nro', 'N/A')}\n")
+        parts.append(f"Bairro: {enderEmit.get('xBairro', 'N/A')}\n")
+        parts.append(f"Município: {enderEmit.get('xMun', 'N/A')} - {enderEmit.get('UF', 'N/A')}\n")
+        parts.append(f"CEP: {enderEmit.get('CEP', 'N/A')}\n\n")
+
+        # 4. DESTINATÁRIO
+        dest = infNFe.get('dest', {})
+        enderDest = dest.get('enderDest', {})
+        parts.append("--- DESTINATÁRIO ---\n")
+        parts.append(f"CNPJ/CPF: {dest.get('CNPJ', dest.get('CPF', 'N/A'))}\n")
+        parts.append(f"Nome/Razão Social: {dest.get('xNome', 'N/A')}\n")
+        parts.append(f"IE: {dest.get('IE', dest.get('indIEDest', 'N/A'))}\n")
+        parts.append(f"Endereço: {enderDest.get('xLgr', 'N/A')}, {enderDest.get('nro', 'N/A')}\n")
+        parts.append(f"Bairro: {enderDest.get('xBairro', 'N/A')}\n")
+        parts.append(f"Município: {enderDest.get('xMun', 'N/A')} - {enderDest.get('UF', 'N/A')}\n")
+        parts.append(f"CEP: {enderDest.get('CEP', 'N/A')}\n\n")
+
+        return parts
+
+    @staticmethod
+    def _format_item(item: Dict, idx: int) -> List[str]:
+        """Produto/serviço (det) com impostos detalhados"""
+        parts = []
+        prod = item.get('prod', {})
+        imposto = item.get('imposto', {})
+
+        parts.append(f"\nItem {idx}:\n")
+        parts.append(f"  Código: {prod.get('cProd', 'N/A')}\n")
+        parts.append(f"  Descrição: {prod.get('xProd', 'N/A')}\n")
+        parts.append(f"  NCM: {prod.get('NCM', 'N/A')}\n")
+        parts.append(f"  CFOP: {prod.get('CFOP', 'N/A')}\n")
+        parts.append(f"  Unidade Comercial: {prod.get('uCom', 'N/A')}\n")
+        parts.append(f"  Quantidade: {prod.get('qCom', 'N/A')}\n")
+        parts.append(f"  Valor Unitário: R$ {prod.get('vUnCom', 'N/A')}\n")
+        parts.append(f"  Valor Total: R$ {prod.get('vProd', 'N/A')}\n")
+
+        # IMPOSTOS DETALHADOS
+        parts.append("  IMPOSTOS:\n")
+
+        # ICMS
+        icms = imposto.get('ICMS', {})
+        icms_detail = None
+        for key in icms.keys():
+            if key.startswith('ICMS'):
+                icms_detail = icms[key]
+                break
+
+        if icms_detail:
+            parts.append("    ICMS:\n")
+            parts.append(f"      Origem: {icms_detail.get('orig', 'N/A')}\n")
+            parts.append(f"      CST/CSOSN: {icms_detail.get('CST', icms_detail.get('CSOSN', 'N/A'))}\n")
+            parts.append(f"      Modalidade BC: {icms_detail.get('modBC', 'N/A')}\n")
+            parts.append(f"      Base de Cálculo: R$ {icms_detail.get('vBC', '0.00')}\n")
+            parts.append(f"      Alíquota: {icms_detail.get('pICMS', '0.00')}%\n")
+            parts.append(f"      Valor ICMS: R$ {icms_detail.get('vICMS', '0.00')}\n")
+
+        # IPI
+        ipi = imposto.get('IPI', {})
+        if ipi:
+            ipi_trib = ipi.get('IPITrib', {})
+            if ipi_trib:
+                parts.append("    IPI:\n")
+                parts.append(f"      CST: {ipi_trib.get('CST', 'N/A')}\n")
+                parts.append(f"      Base de Cálculo: R$ {ipi_trib.get('vBC', '0.00')}\n")
+                parts.append(f"      Alíquota: {ipi_trib.get('pIPI', '0.00')}%\n")
+                parts.append(f"      Valor IPI: R$ {ipi_trib.get('vIPI', '0.00')}\n")
+
+        # PIS
+        pis = imposto.get('PIS', {})
+        pis_detail = None
+        for key in pis.keys():
+            if key.startswith('PIS'):
+                pis_detail = pis[key]
+                break
+
+        if pis_detail:
+            parts.append("    PIS:\n")
+            parts.append(f"      CST: {pis_detail.get('CST', 'N/A')}\n")
+            parts.append(f"      Base de Cálculo: R$ {pis_detail.get('vBC', '0.00')}\n")
+            parts.append(f"      Alíquota: {pis_detail.get('pPIS', '0.00')}%\n")
+            parts.append(f"      Valor PIS: R$ {pis_detail.get('vPIS', '0.00')}\n")
+
+        # COFINS
+        cofins = imposto.get('COFINS', {})
+        cofins_detail = None
+        for key in cofins.keys():
+            if key.startswith('COFINS'):
+                cofins_detail = cofins[key]
+                break
+
+        if cofins_detail:
+            parts.append("    COFINS:\n")
+            parts.append(f"      CST: {cofins_detail.get('CST', 'N/A')}\n")
+            parts.append(f"      Base de Cálculo: R$ {cofins_detail.get('vBC', '0.00')}\n")
+            parts.append(f"      Alíquota: {cofins_detail.get('pCOFINS', '0.00')}%\n")
+            parts.append(f"      Valor COFINS: R$ {cofins_detail.get('vCOFINS', '0.00')}\n")
+
+        return parts
+
+    @staticmethod
+    def _format_footer(infNFe: Dict) -> List[str]:
+        """Totais e informações adicionais"""
+        parts = []
+
+        # 6. TOTAIS
+        total = infNFe.get('total', {}).get('ICMSTot', {})
+        parts.append("\n--- TOTAIS DA NOTA ---\n")
+        parts.append(f"Base de Cálculo ICMS: R$ {total.get('vBC', '0.00')}\n")
+        parts.append(f"Valor ICMS: R$ {total.get('vICMS', '0.00')}\n")
+        parts.append(f"Valor ICMS Desonerado: R$ {total.get('vICMSDeson', '0.00')}\n")
+        parts.append(f"Base de Cálculo ICMS ST: R$ {total.get('vBCST', '0.00')}\n")
+        parts.append(f"Valor ICMS ST: R$ {total.get('vST', '0.00')}\n")
+        parts.append(f"Valor Total dos Produtos: R$ {total.get('vProd', '0.00')}\n")
+        parts.append(f"Valor do Frete: R$ {total.get('vFrete', '0.00')}\n")
+        parts.append(f"Valor do Seguro: R$ {total.get('vSeg', '0.00')}\n")
+        parts.append(f"Valor do Desconto: R$ {total.get('vDesc', '0.00')}\n")
+        parts.append(f"Valor do IPI: R$ {total.get('vIPI', '0.00')}\n")
+        parts.append(f"Valor do PIS: R$ {total.get('vPIS', '0.00')}\n")
+        parts.append(f"Valor do COFINS: R$ {total.get('vCOFINS', '0.00')}\n")
+        parts.append(f"Outras Despesas: R$ {total.get('vOutro', '0.00')}\n")
+        parts.append(f"VALOR TOTAL DA NOTA: R$ {total.get('vNF', '0.00')}\n")
+
+        # 7. INFORMAÇÕES ADICIONAIS
+        infAdic = infNFe.get('infAdic', {})
+        if infAdic:
+            parts.append("\n--- INFORMAÇÕES ADICIONAIS ---\n")
+            if infAdic.get('infCpl'):
+                parts.append(f"{infAdic.get('infCpl')}\n")
+            if infAdic.get('infAdFisco'):
+                parts.append(f"Informações Fiscais: {infAdic.get('infAdFisco')}\n")
+
+        return parts
+
+
+class _NFeTarget:
+    """Target do XMLParser: monta os filhos de infNFe direto dos callbacks do expat
+
+    Cada elemento aberto vira um frame [nome, dicionário, textos, manter]. Só os
+    elementos dentro de infNFe são mantidos; ao fechar, o frame é convertido no
+    formato do xmltodict e anexado ao pai. Os itens (det) são formatados assim
+    que fecham e não ficam guardados como dicionário.
+    """
+
+    def __init__(self, infNFe_parents):
+        self.infNFe_parents = infNFe_parents
+        self.stack: List[list] = []
+        self.names: Dict[str, str] = {}
+        self.root_tag = None
+        self.infNFe: Dict = {}
+        self.infNFe_depth = None
+        self.infNFe_done = False
+        self.has_det = False
+        self.det_parts: List[str] = []
+        self.items: List[Dict] = []
+
+    def _name(self, tag: str) -> str:
+        """Nome sem namespace (com cache, já que as tags se repetem muito)"""
+        name = self.names.get(tag)
+        if name is None:
+            name = self.names[tag] = tag.rsplit("}", 1)[-1]
+        return name
+
+    def start(self, tag: str, attrib: Dict):
+        name = self._name(tag)
+        depth = len(self.stack)
+
+        if self.root_tag is None:
+            self.root_tag = name
+
+        inside = self.infNFe_depth is not None and not self.infNFe_done and depth > self.infNFe_depth
+        if inside:
+            attrs = {f"@{self._name(key)}": value for key, value in attrib.items()} if attrib else None
+            self.stack.append([name, attrs, [], True])
+            return
+
+        if self.infNFe_depth is None and name == "infNFe" and [frame[0] for frame in self.stack] in self.infNFe_parents:
+            self.infNFe_depth = depth
+            self.infNFe.update({f"@{self._name(key)}": value for key, value in attrib.items()})
+
+        self.stack.append([name, None, None, False])
+
+    def data(self, text: str):
+        frame = self.stack[-1] if self.stack else None
+        if frame is not None and frame[3]:
+            frame[2].append(text)
+
+    def end(self, tag: str):
+        name, result, texts, keep = self.stack.pop()
+        depth = len(self.stack)
+
+        if not keep:
+            if depth == self.infNFe_depth and not self.infNFe_done:
+                self.infNFe_done = True
+            return
+
+        # Mesmo formato do xmltodict: texto puro, None ou dicionário com @atributos/#text
+        text = "".join(texts).strip()
+        if result is None:
+            value = text or None
+        else:
+            if text:
+                result["#text"] = text
+            value = result
+
+        if depth == self.infNFe_depth + 1:
+            if name == "det":
+                idx = len(self.items) + 1
+                self.det_parts.extend(NFeParser._format_item(value, idx))
+                self.items.append(NFeService.build_item(value, idx))
+                self.has_det = True
+            else:
+                self._add_child(self.infNFe, name, value)
+            return
+
+        parent = self.stack[-1]
+        if parent[1] is None:
+            parent[1] = {}
+        self._add_child(parent[1], name, value)
+
+    def close(self):
+        return None
+
+    @staticmethod
+    def _add_child(target: Dict, name: str, value):
+        """Agrupa filhos repetidos em lista, como o xmltodict"""
+        if name in target:
+            if not isinstance(target[name], list):
+                target[name] = [target[name]]
+            target[name].append(value)
+        else:
+            target[name] = value
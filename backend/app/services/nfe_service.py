@@ -0,0 +1,143 @@
+from sqlalchemy.orm import Session as DBSession
+from typing import Dict, Optional
+from decimal import Decimal, InvalidOperation
+from datetime import datetime
+
+from ..models.nfe_model import NFe, NFeItem
+
+class NFeService:
+    """Dados estruturados de NF-e (cabeçalho + itens) gravados na ingestão"""
+
+    @staticmethod
+    def build_record(infNFe: Dict) -> Dict:
+        """Monta o registro tipado de uma NF-e a partir do dicionário de infNFe"""
+        ide = infNFe.get('ide') or {}
+        emit = infNFe.get('emit') or {}
+        dest = infNFe.get('dest') or {}
+        total = (infNFe.get('total') or {}).get('ICMSTot') or {}
+
+        det = infNFe.get('det') or []
+        if not isinstance(det, list):
+            det = [det]
+
+        chave = (infNFe.get('@Id') or '').replace('NFe', '') or None
+
+        return {
+            "chave": chave,
+            "numero": NFeService._to_int(ide.get('nNF')),
+            "serie": ide.get('serie'),
+            "modelo": ide.get('mod'),
+            "data_emissao": NFeService._to_datetime(ide.get('dhEmi') or ide.get('dEmi')),
+            "natureza_operacao": ide.get('natOp'),
+            "tipo_operacao": ide.get('tpNF'),
+            "emitente_cnpj": emit.get('CNPJ') or emit.get('CPF'),
+            "emitente_nome": emit.get('xNome'),
+            "emitente_uf": (emit.get('enderEmit') or {}).get('UF'),
+            "destinatario_cnpj": dest.get('CNPJ') or dest.get('CPF'),
+            "destinatario_nome": dest.get('xNome'),
+            "destinatario_uf": (dest.get('enderDest') or {}).get('UF'),
+            "valor_bc_icms": NFeService._to_decimal(total.get('vBC')),
+            "valor_icms": NFeService._to_decimal(total.get('vICMS')),
+            "valor_icms_desonerado": NFeService._to_decimal(total.get('vICMSDeson')),
+            "valor_bc_icms_st": NFeService._to_decimal(total.get('vBCST')),
+            "valor_icms_st": NFeService._to_decimal(total.get('vST')),
+            "valor_produtos": NFeService._to_decimal(total.get('vProd')),
+            "valor_frete": NFeService._to_decimal(total.get('vFrete')),
+            "valor_seguro": NFeService._to_decimal(total.get('vSeg')),
+            "valor_desconto": NFeService._to_decimal(total.get('vDesc')),
+            "valor_ipi": NFeService._to_decimal(total.get('vIPI')),
+            "valor_pis": NFeService._to_decimal(total.get('vPIS')),
+            "valor_cofins": NFeService._to_decimal(total.get('vCOFINS')),
+            "valor_outros": NFeService._to_decimal(total.get('vOutro')),
+            "valor_total": NFeService._to_decimal(total.get('vNF')),
+            "items": [NFeService.build_item(item, idx) for idx, item in enumerate(det, 1)]
+        }
+
+    @staticmethod
+    def build_item(item: Dict, idx: int) -> Dict:
+        """Monta o registro tipado de um item (det) da NF-e"""
+        prod = item.get('prod') or {}
+        imposto = item.get('imposto') or {}
+
+        icms = NFeService._tax_group(imposto.get('ICMS'), 'ICMS')
+        ipi = (imposto.get('IPI') or {}).get('IPITrib') or {}
+        pis = NFeService._tax_group(imposto.get('PIS'), 'PIS')
+        cofins = NFeService._tax_group(imposto.get('COFINS'), 'COFINS')
+
+        return {
+            "numero_item": NFeService._to_int(item.get('@nItem')) or idx,
+            "codigo": prod.get('cProd'),
+            "descricao": prod.get('xProd'),
+            "ncm": prod.get('NCM'),
+            "cfop": prod.get('CFOP'),
+            "unidade": prod.get('uCom'),
+            "quantidade": NFeService._to_decimal(prod.get('qCom')),
+            "valor_unitario": NFeService._to_decimal(prod.get('vUnCom')),
+            "valor_total": NFeService._to_decimal(prod.get('vProd')),
+            "icms_origem": icms.get('orig'),
+            "icms_cst": icms.get('CST') or icms.get('CSOSN'),
+            "icms_base": NFeService._to_decimal(icms.get('vBC')),
+            "icms_aliquota": NFeService._to_decimal(icms.get('pICMS')),
+            "icms_valor": NFeService._to_decimal(icms.get('vICMS')),
+            "ipi_cst": ipi.get('CST'),
+            "ipi_base": NFeService._to_decimal(ipi.get('vBC')),
+            "ipi_aliquota": NFeService._to_decimal(ipi.get('pIPI')),
+            "ipi_valor": NFeService._to_decimal(ipi.get('vIPI')),
+            "pis_cst": pis.get('CST'),
+            "pis_base": NFeService._to_decimal(pis.get('vBC')),
+            "pis_aliquota": NFeService._to_decimal(pis.get('pPIS')),
+            "pis_valor": NFeService._to_decimal(pis.get('vPIS')),
+            "cofins_cst": cofins.get('CST'),
+            "cofins_base": NFeService._to_decimal(cofins.get('vBC')),
+            "cofins_aliquota": NFeService._to_decimal(cofins.get('pCOFINS')),
+            "cofins_valor": NFeService._to_decimal(cofins.get('vCOFINS'))
+        }
+
+    @staticmethod
+    def save_record(db: DBSession, document_id: str, record: Dict) -> NFe:
+        """Adiciona cabeçalho e itens da NF-e na sessão (o commit fica com quem chama)"""
+        header = {key: value for key, value in record.items() if key != "items"}
+        nfe = NFe(document_id=document_id, **header)
+        nfe.items = [NFeItem(**item) for item in record.get("items", [])]
+        db.add(nfe)
+        return nfe
+
+    @staticmethod
+    def get_by_document(db: DBSession, document_id: str) -> Optional[NFe]:
+        """Busca a NF-e estruturada de um documento"""
+        return db.query(NFe).filter(NFe.document_id == document_id).first()
+
+    @staticmethod
+    def _tax_group(group: Optional[Dict], prefix: str) -> Dict:
+        """Retorna o primeiro subgrupo de imposto (ex.: ICMS00, PISAliq) ou vazio"""
+        for key, value in (group or {}).items():
+            if key.startswith(prefix) and isinstance(value, dict):
+                return value
+        return {}
+
+    @staticmethod
+    def _to_decimal(value) -> Optional[Decimal]:
+        if value in (None, ''):
+            return None
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            return None
+
+    @staticmethod
+    def _to_int(value) -> Optional[int]:
+        if value in (None, ''):
+            return None
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _to_datetime(value) -> Optional[datetime]:
+        if not value:
+            return None
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
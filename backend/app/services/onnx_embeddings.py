@@ -0,0 +1,153 @@
+from langchain_core.embeddings import Embeddings
+from typing import List, Optional
+import tempfile
+import os
+import numpy as np
+
+
+class OnnxEmbeddings(Embeddings):
+    """Embeddings de sentence-transformers executados com ONNX Runtime na CPU
+
+    Mesma API do HuggingFaceEmbeddings (embed_documents / embed_query) e os mesmos
+    vetores: mean pooling sobre a atenção + normalização L2, como o pipeline do
+    all-MiniLM-L6-v2. O modelo é exportado do PyTorch na primeira execução e, com
+    quantize=True, quantizado dinamicamente para int8; os arquivos ficam em
+    cache_dir e são reaproveitados nas próximas inicializações.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str = "./data/onnx_models",
+        quantize: bool = True,
+        batch_size: int = 32,
+        intra_op_threads: Optional[int] = None,
+        max_length: int = 256
+    ):
+        self.model_name = model_name
+        self.quantize = quantize
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.model_dir = os.path.join(cache_dir, model_name.replace("/", "__"))
+
+        model_path = self._ensure_model()
+
+        from transformers import AutoTokenizer
+        import onnxruntime as ort
+
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.inter_op_num_threads = 1
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {model_input.name for model_input in self.session.get_inputs()}
+
+    @property
+    def model_path(self) -> str:
+        return os.path.join(self.model_dir, "model.int8.onnx" if self.quantize else "model.onnx")
+
+    def _ensure_model(self) -> str:
+        """Exporta (e quantiza) o modelo se ainda não existir em cache_dir"""
+        fp32_path = os.path.join(self.model_dir, "model.onnx")
+
+        if not os.path.exists(fp32_path):
+            self._export(fp32_path)
+
+        if self.quantize and not os.path.exists(self.model_path):
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+
+            # Quantização dinâmica: pesos em int8, ativações quantizadas em tempo de execução
+            tmp_path = self._temp_path()
+            try:
+                quantize_dynamic(fp32_path, tmp_path, weight_type=QuantType.QInt8)
+                os.replace(tmp_path, self.model_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        return self.model_path
+
+    def _export(self, fp32_path: str):
+        """Exporta o transformer do PyTorch para ONNX com eixos dinâmicos de lote e sequência"""
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+
+        os.makedirs(self.model_dir, exist_ok=True)
+
+        tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+        model = AutoModel.from_pretrained(self.model_name)
+        model.eval()
+
+        sample = tokenizer(["exportação"], return_tensors="pt")
+        input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+        dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+        dynamic_axes["last_hidden_state"] = {0: "batch", 1: "sequence"}
+
+        # Grava em arquivo temporário para não deixar um modelo incompleto em cache
+        tmp_path = self._temp_path()
+        try:
+            with torch.no_grad():
+                torch.onnx.export(
+                    model,
+                    tuple(sample[name] for name in input_names),
+                    tmp_path,
+                    input_names=input_names,
+                    output_names=["last_hidden_state"],
+                    dynamic_axes=dynamic_axes,
+                    opset_version=17,
+                )
+            os.replace(tmp_path, fp32_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        tokenizer.save_pretrained(self.model_dir)
+
+    def _temp_path(self) -> str:
+        """Arquivo temporário único em model_dir: execuções simultâneas não gravam no mesmo arquivo"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.model_dir, suffix=".onnx.tmp")
+        os.close(fd)
+        return tmp_path
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Gera embeddings em lotes de batch_size"""
+        if not texts:
+            return []
+
+        # Ordena por tamanho para que cada lote tenha pouco padding
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        embeddings = np.empty((len(texts), 0), dtype=np.float32)
+
+        for start in range(0, len(order), self.batch_size):
+            batch_indices = order[start:start + self.batch_size]
+            batch = self._embed_batch([texts[i] for i in batch_indices])
+            if embeddings.shape[1] == 0:
+                embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            embeddings[batch_indices] = batch
+
+        return embeddings.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer(
+            texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np"
+        )
+        inputs = {name: encoded[name].astype(np.int64) for name in self.input_names if name in encoded}
+
+        hidden_state = self.session.run(None, inputs)[0]
+
+        # Mean pooling considerando apenas os tokens reais
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden_state * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
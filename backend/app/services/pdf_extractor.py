@@ -0,0 +1,82 @@
+from concurrent.futures import Executor
+from collections import deque
+from typing import Callable, Iterator, List, Optional, Tuple
+import os
+import PyPDF2
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+# (número da página, texto, erro)
+PageResult = Tuple[int, str, Optional[str]]
+
+class PDFExtractor:
+    """Extração de texto de PDF por faixas de páginas em paralelo, entregue em ordem como gerador"""
+
+    def __init__(self, pool_getter: Callable[[], Executor]):
+        # O pool de processos é do DocumentService e só é criado se for necessário
+        self.pool_getter = pool_getter
+        self.pages_per_task = int(os.getenv("PDF_PAGES_PER_TASK", "16"))
+        # Limita as faixas em andamento para manter a memória constante
+        self.max_in_flight = int(os.getenv("PDF_MAX_IN_FLIGHT", str((os.cpu_count() or 2) * 2)))
+
+    @staticmethod
+    def count_pages(file_path: str) -> int:
+        """Número de páginas do PDF"""
+        with open(file_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+
+    def iter_pages(self, file_path: str, total_pages: int = None) -> Iterator[PageResult]:
+        """Gera (página, texto, erro) na ordem do documento; falhas de uma página não interrompem as demais"""
+        if total_pages is None:
+            total_pages = self.count_pages(file_path)
+
+        ranges = [
+            (start, min(start + self.pages_per_task, total_pages))
+            for start in range(0, total_pages, self.pages_per_task)
+        ]
+
+        # PDFs pequenos não compensam o custo do pool
+        if len(ranges) <= 1:
+            yield from _extract_page_range(file_path, 0, total_pages)
+            return
+
+        pool = self.pool_getter()
+        remaining = iter(ranges)
+        pending = deque()
+
+        try:
+            for start, end in remaining:
+                pending.append(pool.submit(_extract_page_range, file_path, start, end))
+                if len(pending) >= self.max_in_flight:
+                    break
+
+            while pending:
+                results = pending.popleft().result()
+
+                next_range = next(remaining, None)
+                if next_range is not None:
+                    pending.append(pool.submit(_extract_page_range, file_path, *next_range))
+
+                yield from results
+        finally:
+            # Consumidor interrompido: descarta as faixas ainda não iniciadas
+            for future in pending:
+                future.cancel()
+
+
+def _extract_page_range(file_path: str, start: int, end: int) -> List[PageResult]:
+    """Executado no pool de processos: extrai o texto das páginas [start, end)"""
+    try:
+        with open(file_path, 'rb') as file:
+            reader = PyPDF2.PdfReader(file)
+            results = []
+            for page_number in range(start, end):
+                try:
+                    results.append((page_number + 1, reader.pages[page_number].extract_text() or "", None))
+                except Exception as e:
+                    results.append((page_number + 1, "", str(e)))
+            return results
+    except Exception as e:
+        return [(page_number + 1, "", str(e)) for page_number in range(start, end)]
@@ -0,0 +1,174 @@
+from typing import Dict, List, Tuple
+import hashlib
+
+from .context_compressor import estimate_tokens
+
+# Instruções fixas do assistente: enviadas como system_instruction do modelo
+# (prefixo reaproveitado entre requisições), fora do texto montado por pergunta
+SYSTEM_INSTRUCTION = """Você é um assistente especializado em legislação tributária brasileira e análise de documentos fiscais eletrônicos (NF-e, CT-e, NFS-e).
+
+# SEU PAPEL
+Você auxilia profissionais contábeis, fiscais e empresariais na interpretação de legislação tributária e análise de documentos fiscais, fornecendo respostas precisas, fundamentadas e com citações claras.
+
+# INSTRUÇÕES OBRIGATÓRIAS
+
+## Uso de Fontes
+1. Use EXCLUSIVAMENTE as informações dos documentos fornecidos no "CONTEXTO DOS DOCUMENTOS"
+2. SEMPRE cite as fontes usando números entre colchetes [1], [2], etc. ao mencionar informações específicas
+3. Se a informação solicitada NÃO estiver nos documentos, responda: "Esta informação não está disponível nos documentos fornecidos"
+4. Não invente, deduza ou extrapole informações que não estejam explícitas nos documentos
+
+## Continuidade da Conversa
+5. Se houver "HISTÓRICO DA CONVERSA", use-o para:
+   - Entender referências indiretas ("essa nota", "dele", "o fornecedor anterior", etc.)
+   - Manter coerência entre perguntas relacionadas
+   - Conectar informações de perguntas anteriores com a atual
+6. Quando o usuário fizer perguntas de acompanhamento, identifique a que documento ou informação ele se refere
+
+## Estilo e Formato
+7. Seja preciso, objetivo e profissional
+8. Use linguagem técnica apropriada para a área contábil/fiscal brasileira
+9. Organize respostas complexas em tópicos ou tabelas quando apropriado
+10. Para valores monetários, use sempre formato brasileiro: R$ 1.234,56
+
+## Domínio Específico
+11. Ao analisar Notas Fiscais, priorize: impostos (ICMS, IPI, PIS, COFINS), NCM, CFOP, valores, datas
+12. Ao analisar legislação, identifique: artigos, parágrafos, incisos, vigência, aplicabilidade
+13. Conecte NFe com legislação quando relevante (ex: CFOP 5102 → operação interna com mercadoria)
+
+# EXEMPLOS DE RESPOSTAS
+
+## Exemplo 1: Análise de NF-e
+Usuário: "Qual o valor total de ICMS da nota 35240?"
+Resposta: "De acordo com a Nota Fiscal 35240 [1], o valor total de ICMS é R$ 1.234,56. A base de cálculo foi de R$ 6.858,67 com alíquota de 18% [1]."
+
+## Exemplo 2: Com histórico
+Histórico: Usuário perguntou sobre NF-e do fornecedor ABC
+Usuário: "Qual o NCM do primeiro item?"
+Resposta: "O primeiro item da Nota Fiscal do fornecedor ABC possui NCM 84159000 [2], classificado como 'Máquinas para fabricação' [2]."
+
+## Exemplo 3: Sem informação
+Usuário: "Esta operação está isenta de IPI?"
+Resposta: "Esta informação não está disponível nos documentos fornecidos. Para determinar a isenção de IPI, seria necessário consultar a legislação específica ou o detalhamento do imposto na nota fiscal."
+
+## Exemplo 4: Cruzamento NF-e + Legislação
+Usuário: "O CFOP 6102 está correto para esta venda?"
+Resposta: "Segundo a nota fiscal [1], foi utilizado CFOP 6102 (Venda de mercadoria adquirida de terceiros). De acordo com o Anexo do RICMS [3], o CFOP 6102 é aplicável para operações interestaduais de venda de mercadoria. Como a operação tem origem em SP e destino em MG [1], o CFOP está correto."
+"""
+
+HISTORY_HEADER = "=== HISTÓRICO DA CONVERSA ===\n"
+HISTORY_FOOTER = "=== FIM DO HISTÓRICO ===\n\n"
+CONTEXT_HEADER = "# CONTEXTO DOS DOCUMENTOS\n"
+QUESTION_TEMPLATE = "\n# PERGUNTA ATUAL DO USUÁRIO\n{question}\n\n# SUA RESPOSTA (com citações):"
+TRUNCATION_MARK = " [...]"
+
+
+class PromptBuilder:
+    """Monta a parte variável do prompt dentro de um orçamento de tokens
+
+    O orçamento (max_tokens) cobre as instruções fixas + pergunta + contexto +
+    histórico e é preenchido por prioridade: a pergunta sempre entra; depois os
+    chunks na ordem de relevância (o primeiro que não couber é truncado, se
+    sobrar ao menos min_chunk_tokens, e os seguintes são descartados); por
+    último as mensagens mais recentes do histórico que ainda couberem.
+    Tokens estimados com estimate_tokens (~4 caracteres por token).
+    """
+
+    def __init__(
+        self,
+        max_tokens: int = 8000,
+        history_messages: int = 6,
+        min_chunk_tokens: int = 100,
+        system_instruction: str = SYSTEM_INSTRUCTION
+    ):
+        self.max_tokens = max_tokens
+        self.history_messages = history_messages
+        self.min_chunk_tokens = min_chunk_tokens
+        self.system_instruction = system_instruction
+        self.system_tokens = estimate_tokens(system_instruction)
+
+    def build(
+        self,
+        question: str,
+        context_chunks: List[Dict],
+        chat_history: List[Dict] = None
+    ) -> Tuple[str, List[Dict], Dict]:
+        """Texto da requisição (histórico, contexto numerado, pergunta), fontes citáveis e contagem de tokens"""
+        question_part = QUESTION_TEMPLATE.format(question=question)
+        question_tokens = estimate_tokens(question_part)
+        remaining = self.max_tokens - self.system_tokens - question_tokens - estimate_tokens(CONTEXT_HEADER)
+
+        # 1. Contexto numerado, por ordem de relevância
+        context_parts, sources = [], []
+        truncated = False
+        for chunk in context_chunks:
+            metadata = chunk.get("metadata", {})
+            filename = metadata.get("filename", "Documento desconhecido")
+            chunk_index = metadata.get("chunk_index", 0)
+            header = f"\n[{len(sources) + 1}] Fonte: {filename} (Seção {chunk_index + 1})\nConteúdo: "
+            content = chunk["content"]
+
+            if estimate_tokens(header + content + "\n") > remaining:
+                room = remaining - estimate_tokens(header + TRUNCATION_MARK + "\n")
+                if room < self.min_chunk_tokens:
+                    break
+                content = content[:room * 4].rsplit(" ", 1)[0] + TRUNCATION_MARK
+                truncated = True
+
+            part = f"{header}{content}\n"
+            context_parts.append(part)
+            remaining -= estimate_tokens(part)
+            sources.append({
+                "number": len(sources) + 1,
+                "filename": filename,
+                "chunk_index": chunk_index,
+                "content_preview": chunk["content"][:200] + "..." if len(chunk["content"]) > 200 else chunk["content"],
+                "relevance_score": chunk.get("score", 0)
+            })
+            if truncated:
+                break
+
+        # 2. Histórico: das mensagens mais recentes para as mais antigas, enquanto couber
+        history_lines = []
+        remaining -= estimate_tokens(HISTORY_HEADER + HISTORY_FOOTER)
+        for message in reversed(self.history_window(chat_history)):
+            role = "USUÁRIO" if message["role"] == "user" else "ASSISTENTE"
+            line = f"{role}: {message['content']}\n\n"
+            if estimate_tokens(line) > remaining:
+                break
+            history_lines.insert(0, line)
+            remaining -= estimate_tokens(line)
+        history = HISTORY_HEADER + "".join(history_lines) + HISTORY_FOOTER if history_lines else ""
+
+        context = "".join(context_parts)
+        text = f"{history}{CONTEXT_HEADER}{context}{question_part}"
+        stats = {
+            "prompt_tokens": self.system_tokens + estimate_tokens(text),
+            "system_tokens": self.system_tokens,
+            "question_tokens": question_tokens,
+            "context_tokens": estimate_tokens(context),
+            "history_tokens": estimate_tokens(history),
+            "budget": self.max_tokens,
+            "chunks_used": len(sources),
+            "chunks_truncated": int(truncated),
+            "chunks_dropped": len(context_chunks) - len(sources),
+            "history_messages": len(history_lines)
+        }
+        return text, sources, stats
+
+    def history_window(self, chat_history: List[Dict] = None) -> List[Dict]:
+        """Mensagens do histórico que podem entrar no prompt (as history_messages mais recentes)"""
+        return (chat_history or [])[-self.history_messages:] if self.history_messages else []
+
+    def history_key(self, chat_history: List[Dict] = None) -> str:
+        """Hash da janela de histórico usada no prompt ("" sem histórico), para chaves de cache
+
+        Com a mesma pergunta e o mesmo contexto, essa janela determina o prompt inteiro.
+        """
+        window = self.history_window(chat_history)
+        if not window:
+            return ""
+        digest = hashlib.sha256()
+        for message in window:
+            digest.update(f"{message['role']}\x00{message['content']}\x00".encode("utf-8"))
+        return digest.hexdigest()[:16]
@@ -0,0 +1,88 @@
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+import json
+import threading
+import time
+
+
+class QueryCache:
+    """Cache LRU com TTL dos resultados de busca, em memória no processo
+
+    Cada collection tem um contador de geração que entra na chave; ingestões e
+    remoções incrementam o contador, então resultados anteriores a elas nunca são
+    servidos (as entradas antigas saem pelo LRU/TTL).
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 300):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def make_key(self, collection: str, query: str, k: int, filter_metadata: Optional[Dict], mode: str) -> Hashable:
+        """Chave de (collection, geração, consulta normalizada, k, filtro, modo)"""
+        normalized = " ".join(query.lower().split())
+        filter_key = json.dumps(filter_metadata, sort_keys=True, default=str) if filter_metadata else ""
+        with self._lock:
+            generation = self._generations.get(collection, 0)
+        return (collection, generation, normalized, k, filter_key, mode)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        if not self.enabled:
+            return
+
+        with self._lock:
+            # Uma ingestão/remoção concluída durante a busca torna o resultado obsoleto
+            if key[1] != self._generations.get(key[0], 0):
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def bump_generation(self, collection: str):
+        """Invalida os resultados em cache da collection (chamado em ingestões e remoções)"""
+        with self._lock:
+            self._generations[collection] = self._generations.get(collection, 0) + 1
+
+    def stats(self) -> Dict:
+        """Acertos/faltas e ocupação do cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "generations": dict(self._generations)
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
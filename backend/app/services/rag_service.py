@@ -1,45 +1,169 @@
-from typing import Dict, Any, List, Tuple, Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session as DBSession
+from typing import Dict, Any, AsyncIterator, List, Tuple, Optional
+import os
 
 from ..schemas.vector_metadata_schema import VectorMetadata
+from ..enums.retrieval_mode_enum import RetrievalMode
+from ..enums.document_category_enum import DocumentCategory
 from .vector_service import VectorService
 from .llm_service import LLMService
+from .vector_registry import VectorRegistry
+from .identifier_service import IdentifierService
+from .lexical_index import matches_filter
+from .context_compressor import ContextCompressor
+
+NO_CONTEXT_ANSWER = "Não encontrei informações relevantes nos documentos disponíveis para responder sua pergunta."
+
 
 class RAGService:
     def __init__(self):
         self.vector_service = VectorService()
         self.llm_service = LLMService()
+        
+        # Compactação do contexto: junta chunks adjacentes, remove quase-duplicatas e (opcional) MMR
+        self.compress_context = os.getenv("CONTEXT_COMPRESSION", "true").lower() == "true"
+        mmr_lambda = os.getenv("CONTEXT_MMR_LAMBDA")
+        self.context_compressor = ContextCompressor(
+            duplicate_threshold=float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.9")),
+            mmr_lambda=float(mmr_lambda) if mmr_lambda else None
+        )
+    
+    @property
+    def answer_cache(self):
+        return VectorRegistry.get_answer_cache()
 
-    def ask_question_with_citations(
-        self, 
-        question: str, 
-        k: int = 5, 
+    async def aask_question_with_citations(
+        self,
+        question: str,
+        k: int = 5,
         metadata: VectorMetadata = None,
-        chat_history: List[Dict] = None
+        chat_history: List[Dict] = None,
+        mode: RetrievalMode = None,
+        db: DBSession = None,
+        rerank: bool = None
     ) -> Dict[str, Any]:
-        """Processa uma pergunta usando RAG completo com citações e histórico de conversa"""
+        """Processa uma pergunta usando RAG completo com citações e histórico de conversa
         
-        # 1. Busca documentos relevantes
-        rag_result = self.vector_service.rag_query(question, k, metadata)
-        context_chunks = rag_result["context_chunks"]
+        A busca (CPU e banco) roda no threadpool; a espera pelo LLM não ocupa thread.
+        Falhas do provedor levantam HTTPException 503.
+        """
+        context_chunks, compression = await run_in_threadpool(
+            self.retrieve_context, question, k, metadata, mode, db, rerank
+        )
         
         if not context_chunks:
-            return {
-                "question": question,
-                "answer": "Não encontrei informações relevantes nos documentos disponíveis para responder sua pergunta.",
-                "sources": [],
-                "chunks_used": 0,
-                "cited_excerpts": [],
-                "context_summary": "Nenhum documento relevante encontrado"
-            }
+            return self._build_result(question, NO_CONTEXT_ANSWER, [], context_chunks, compression)
+        
+        history_key = self.llm_service.prompt_builder.history_key(chat_history)
+        cached = await run_in_threadpool(self.answer_cache.get, question, context_chunks, history_key)
+        if cached is not None:
+            answer, sources, match = cached
+            return self._build_result(question, answer, sources, context_chunks, compression, match)
         
-        # 2. Gera resposta com citações usando o contexto E o histórico da conversa
-        answer, sources = self.llm_service.generate_response_with_citations(
-            question, 
+        answer, sources = await self.llm_service.agenerate_response_with_citations(
+            question,
             context_chunks,
             chat_history=chat_history
         )
+        await run_in_threadpool(self.answer_cache.set, question, context_chunks, answer, sources, history_key)
+        
+        return self._build_result(question, answer, sources, context_chunks, compression)
+    
+    def stream_question_with_citations(
+        self,
+        question: str,
+        k: int = 5,
+        metadata: VectorMetadata = None,
+        chat_history: List[Dict] = None,
+        mode: RetrievalMode = None,
+        db: DBSession = None,
+        rerank: bool = None
+    ) -> Dict[str, Any]:
+        """Como aask_question_with_citations, mas a resposta vem em answer_stream (iterador assíncrono de partes)
+
+        A busca é feita antes de retornar, então fontes e trechos já estão disponíveis.
+        Falhas do provedor levantam HTTPException 503 durante a iteração de answer_stream.
+        """
+        context_chunks, compression = self.retrieve_context(question, k, metadata, mode, db, rerank)
+        
+        history_key = self.llm_service.prompt_builder.history_key(chat_history)
+        cached = self.answer_cache.get(question, context_chunks, history_key) if context_chunks else None
+        if not context_chunks:
+            answer_stream, sources = self._single_part(NO_CONTEXT_ANSWER), []
+        elif cached is not None:
+            answer_stream, sources = self._single_part(cached[0]), cached[1]
+        else:
+            answer_stream, sources = self.llm_service.stream_response_with_citations(
+                question,
+                context_chunks,
+                chat_history=chat_history
+            )
+            answer_stream = self._cache_stream(answer_stream, question, context_chunks, sources, history_key)
+        
+        result = self._build_result(
+            question, None, sources, context_chunks, compression, cached[2] if cached is not None else None
+        )
+        del result["answer"]
+        result["answer_stream"] = answer_stream
+        return result
+    
+    @staticmethod
+    async def _single_part(text: str) -> AsyncIterator[str]:
+        yield text
+    
+    async def _cache_stream(
+        self,
+        answer_stream: AsyncIterator[str],
+        question: str,
+        context_chunks: List[Dict],
+        sources: List[Dict],
+        history_key: str
+    ) -> AsyncIterator[str]:
+        """Repassa as partes e guarda a resposta no cache só se o stream chegar ao fim sem erro"""
+        parts = []
+        try:
+            async for part in answer_stream:
+                parts.append(part)
+                yield part
+        finally:
+            # Stream abandonado: fecha já o do cliente LLM, liberando a vaga de concorrência
+            await answer_stream.aclose()
+        await run_in_threadpool(self.answer_cache.set, question, context_chunks, "".join(parts), sources, history_key)
+    
+    def retrieve_context(
+        self,
+        question: str,
+        k: int = 5,
+        metadata: VectorMetadata = None,
+        mode: RetrievalMode = None,
+        db: DBSession = None,
+        rerank: bool = None
+    ) -> Tuple[List[Dict], Optional[Dict]]:
+        """Chunks de contexto da pergunta (já compactados) e as estatísticas da compactação"""
+        # Perguntas com chave, número/série ou CNPJ vão direto ao índice
+        rag_result = self.identifier_query(db, question, k, metadata) if db is not None else None
+        if rag_result is None:
+            # Com MMR, busca o dobro de candidatos para ter o que diversificar
+            fetch_k = k * 2 if self.compress_context and self.context_compressor.mmr_lambda is not None else k
+            rag_result = self.vector_service.rag_query(question, fetch_k, metadata, mode, rerank)
+        context_chunks = rag_result["context_chunks"]
         
-        # 3. Prepara trechos citados para exibição
+        compression = None
+        if self.compress_context and context_chunks:
+            context_chunks, compression = self.context_compressor.compress(context_chunks, k)
+        return context_chunks, compression
+    
+    @staticmethod
+    def _build_result(
+        question: str,
+        answer: Optional[str],
+        sources: List[Dict],
+        context_chunks: List[Dict],
+        compression: Optional[Dict],
+        answer_cache: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # Trechos citados para exibição
         cited_excerpts = [
             {
                 "citation_number": source["number"],
@@ -50,16 +174,65 @@ class RAGService:
             for source in sources
         ]
         
-        # 4. Retorna resultado completo
+        if context_chunks:
+            context_summary = f"Consultados {len(context_chunks)} trechos de {len(set(chunk['metadata'].get('filename', 'Unknown') for chunk in context_chunks))} documentos"
+        else:
+            context_summary = "Nenhum documento relevante encontrado"
+        
         return {
             "question": question,
             "answer": answer,
             "sources": sources,
             "chunks_used": len(context_chunks),
             "cited_excerpts": cited_excerpts,
-            "context_summary": f"Consultados {len(context_chunks)} trechos de {len(set(chunk['metadata'].get('filename', 'Unknown') for chunk in context_chunks))} documentos"
+            "compression": compression,
+            "answer_cache": answer_cache,
+            "context_summary": context_summary
+        }
+    
+    def identifier_query(
+        self,
+        db: DBSession,
+        question: str,
+        k: int = 5,
+        metadata: VectorMetadata = None
+    ) -> Optional[Dict[str, Any]]:
+        """Busca exata pelos identificadores de NF-e citados na pergunta; None se não houver correspondência"""
+        identifiers = IdentifierService.detect(question)
+        if not identifiers:
+            return None
+        
+        matches = IdentifierService.lookup(db, identifiers, limit=k)
+        if not matches:
+            return None
+        
+        # O índice só contém NF-e: limita a busca por id aos shards de notas fiscais
+        filter_dict = self.vector_service.build_filter(metadata)
+        shard_filter = filter_dict or {"category": {"$eq": DocumentCategory.NOTAS_FISCAIS.value}}
+        chunks = self.vector_service.get_chunks([chunk_id for _, chunk_id in matches], shard_filter)
+        
+        # Uma única nota: completa o contexto com os chunks seguintes dela (itens, totais)
+        document_ids = list(dict.fromkeys(document_id for document_id, _ in matches))
+        if len(document_ids) == 1 and len(chunks) < k:
+            seen = {chunk["metadata"].get("chunk_id") for chunk in chunks}
+            for chunk in self.vector_service.get_document_chunks(document_ids[0], k + len(chunks), shard_filter):
+                if len(chunks) >= k:
+                    break
+                if chunk["metadata"].get("chunk_id") not in seen:
+                    chunks.append(chunk)
+        
+        chunks = [chunk for chunk in chunks if matches_filter(chunk["metadata"], filter_dict)]
+        if not chunks:
+            return None
+        
+        return {
+            "query": question,
+            "mode": "identifier",
+            "chunks_found": len(chunks),
+            "context_chunks": chunks,
+            "context_summary": f"Encontrados {len(chunks)} trechos pelos identificadores {', '.join(value for _, value in identifiers)}"
         }
     
-    def simple_chat(self, message: str) -> str:
+    async def simple_chat(self, message: str) -> str:
         """Chat simples sem RAG"""
-        return self.llm_service.generate_simple_response(message)
\ No newline at end of file
+        return await self.llm_service.agenerate_simple_response(message)
\ No newline at end of file
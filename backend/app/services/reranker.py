@@ -0,0 +1,69 @@
+from typing import Dict, List
+import threading
+import time
+
+
+class CrossEncoderReranker:
+    """Reordena candidatos da busca com um cross-encoder local (pares pergunta/trecho)
+
+    Os candidatos são pontuados em lotes pequenos, na ordem da busca. Antes de
+    cada lote, se o tempo gasto mais o custo estimado do lote (média dos lotes
+    anteriores) passar do orçamento de latência, para: os restantes mantêm a
+    ordem original depois dos já pontuados. O primeiro lote sempre é pontuado.
+    """
+
+    def __init__(self, model_name: str, max_candidates: int = 30, batch_size: int = 16, budget_ms: float = 300):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.max_candidates = max_candidates
+        self.batch_size = batch_size
+        self.budget_ms = budget_ms
+        self.model = CrossEncoder(model_name)
+
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.budget_exceeded = 0
+        self.total_ms = 0.0
+
+    def rerank(self, query: str, candidates: List[Dict], k: int) -> List[Dict]:
+        """Retorna os k melhores candidatos, com rerank_score nos que foram pontuados"""
+        candidates = candidates[:self.max_candidates]
+        if len(candidates) <= 1:
+            return candidates[:k]
+
+        start = time.perf_counter()
+        scored = []
+        exceeded = False
+        batches = 0
+        for batch_start in range(0, len(candidates), self.batch_size):
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if batches and elapsed_ms + elapsed_ms / batches > self.budget_ms:
+                exceeded = True
+                break
+
+            batch = candidates[batch_start:batch_start + self.batch_size]
+            scores = self.model.predict([(query, candidate["content"]) for candidate in batch])
+            for candidate, score in zip(batch, scores):
+                scored.append({**candidate, "rerank_score": float(score)})
+            batches += 1
+
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.calls += 1
+            self.total_ms += elapsed_ms
+            self.budget_exceeded += int(exceeded)
+
+        scored.sort(key=lambda candidate: candidate["rerank_score"], reverse=True)
+        return (scored + candidates[len(scored):])[:k]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "max_candidates": self.max_candidates,
+                "budget_ms": self.budget_ms,
+                "calls": self.calls,
+                "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+                "budget_exceeded": self.budget_exceeded
+            }
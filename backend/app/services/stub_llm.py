@@ -0,0 +1,84 @@
+from typing import Iterator, List
+import asyncio
+import random
+import re
+import time
+
+from .llm_provider import LLMProvider, ProviderError, TextResponse
+
+SOURCE_PATTERN = re.compile(r"^\[(\d+)\] Fonte: (.+?) \(Seção", re.M)
+
+
+class StubGenerativeModel(LLMProvider):
+    """Modelo local no lugar do Gemini, sem rede nem chave (LLM_PROVIDER=fake)
+
+    Responde de forma determinística citando as fontes numeradas do prompt. A
+    latência é simulada: latency_ms até a primeira parte e depois
+    tokens_per_second (cada palavra conta como um token; 0 = sem espera); com
+    stream=True, a resposta é entregue palavra a palavra. Com error_rate, a
+    fração pedida das chamadas falha com ProviderError(error_code), sorteada
+    de forma reproduzível a partir de seed.
+    """
+
+    name = "fake"
+
+    def __init__(
+        self,
+        latency_ms: float = 0,
+        tokens_per_second: float = 50,
+        error_rate: float = 0,
+        error_code: int = 429,
+        seed: int = None,
+        system_instruction: str = None
+    ):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.system_instruction = system_instruction
+        self._random = random.Random(seed)
+
+    def generate_content(self, prompt: str, generation_config: dict = None, stream: bool = False):
+        self._maybe_fail()
+        tokens = self._tokens(self._answer(prompt))
+        if stream:
+            return self._stream(tokens)
+        time.sleep(self._duration(len(tokens)))
+        return TextResponse("".join(tokens))
+
+    async def generate_content_async(self, prompt: str, generation_config: dict = None):
+        self._maybe_fail()
+        tokens = self._tokens(self._answer(prompt))
+        await asyncio.sleep(self._duration(len(tokens)))
+        return TextResponse("".join(tokens))
+
+    def _stream(self, tokens: List[str]) -> Iterator[TextResponse]:
+        time.sleep(self.latency_ms / 1000)
+        for token in tokens:
+            if self.tokens_per_second > 0:
+                time.sleep(1 / self.tokens_per_second)
+            yield TextResponse(token)
+
+    def _maybe_fail(self):
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise ProviderError(f"Fake provider error (HTTP {self.error_code})", self.error_code)
+
+    def _duration(self, tokens: int) -> float:
+        """Segundos para gerar a quantidade de tokens, incluindo a latência inicial"""
+        seconds = self.latency_ms / 1000
+        if self.tokens_per_second > 0:
+            seconds += tokens / self.tokens_per_second
+        return seconds
+
+    @staticmethod
+    def _tokens(text: str) -> List[str]:
+        return re.findall(r"\S+\s*", text)
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        question = prompt.rsplit("# PERGUNTA ATUAL DO USUÁRIO", 1)[-1].split("# SUA RESPOSTA", 1)[0].strip()
+        sources = SOURCE_PATTERN.findall(prompt)
+        if not sources:
+            return f"Resposta de teste para: {question}"
+        cited = ", ".join(f"{filename} [{number}]" for number, filename in sources)
+        return f"Resposta de teste para \"{question}\", com base em {cited}."
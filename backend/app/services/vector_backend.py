@@ -0,0 +1,120 @@
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from .vector_registry import VectorRegistry
+
+# (chunk_id, conteúdo, metadados)
+StoredChunk = Tuple[str, str, Dict]
+
+
+class VectorBackend(ABC):
+    """Operações de armazenamento vetorial usadas pelo VectorService
+
+    Cada collection (shard) guarda chunks com id, texto, metadados e embedding.
+    search_by_vector retorna a distância L2² entre vetores normalizados
+    (menor = mais similar), a mesma escala do ChromaDB.
+    """
+
+    name = "base"
+
+    @abstractmethod
+    def list_collections(self) -> List[str]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def add_texts(self, collection: str, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def search_by_vector(self, collection: str, embedding: List[float], k: int, filter_metadata: Dict = None) -> List[Dict]:
+        raise NotImplementedError
+
+    def search_by_vectors(self, collection: str, embeddings: List[List[float]], k: int, filter_metadata: Dict = None) -> List[List[Dict]]:
+        """Várias consultas de uma vez; resultados na ordem dos embeddings"""
+        return [self.search_by_vector(collection, embedding, k, filter_metadata) for embedding in embeddings]
+
+    @abstractmethod
+    def get(self, collection: str, ids: List[str] = None, where: Dict = None) -> List[StoredChunk]:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, collection: str, ids: List[str]):
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, collection: str) -> int:
+        raise NotImplementedError
+
+    def describe(self, collection: str) -> Dict:
+        """Configuração/estado do índice da collection"""
+        return {}
+
+
+class ChromaBackend(VectorBackend):
+    """ChromaDB persistente (HNSW), via o cliente e os vector stores do VectorRegistry"""
+
+    name = "chroma"
+
+    def list_collections(self) -> List[str]:
+        return [collection.name for collection in VectorRegistry.get_client().list_collections()]
+
+    def add_texts(self, collection: str, ids: List[str], texts: List[str], metadatas: List[Dict]):
+        VectorRegistry.get_vectorstore(collection).add_texts(texts=texts, metadatas=metadatas, ids=ids)
+
+    def search_by_vector(self, collection: str, embedding: List[float], k: int, filter_metadata: Dict = None) -> List[Dict]:
+        results = VectorRegistry.get_vectorstore(collection).similarity_search_by_vector_with_relevance_scores(
+            embedding=embedding,
+            k=k,
+            filter=filter_metadata
+        )
+        return [
+            {
+                "content": doc.page_content,
+                "metadata": doc.metadata,
+                "score": score
+            }
+            for doc, score in results
+        ]
+
+    def search_by_vectors(self, collection: str, embeddings: List[List[float]], k: int, filter_metadata: Dict = None) -> List[List[Dict]]:
+        # Uma única consulta ao ChromaDB para todos os embeddings
+        results = VectorRegistry.get_client().get_collection(collection).query(
+            query_embeddings=embeddings,
+            n_results=k,
+            where=filter_metadata,
+            include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                {"content": content, "metadata": metadata, "score": distance}
+                for content, metadata, distance in zip(documents, metadatas, distances)
+            ]
+            for documents, metadatas, distances in zip(results["documents"], results["metadatas"], results["distances"])
+        ]
+
+    def get(self, collection: str, ids: List[str] = None, where: Dict = None) -> List[StoredChunk]:
+        results = VectorRegistry.get_client().get_collection(collection).get(
+            ids=ids,
+            where=where,
+            include=["documents", "metadatas"]
+        )
+        return list(zip(results["ids"], results["documents"], results["metadatas"]))
+
+    def delete(self, collection: str, ids: List[str]):
+        if ids:
+            VectorRegistry.get_client().get_collection(collection).delete(ids=ids)
+
+    def count(self, collection: str) -> int:
+        return VectorRegistry.get_client().get_collection(collection).count()
+
+    def describe(self, collection: str) -> Dict:
+        configuration = VectorRegistry.get_client().get_collection(collection).configuration or {}
+        return {"hnsw": dict(configuration.get("hnsw") or {})}
+
+
+def create_backend(name: Optional[str]) -> VectorBackend:
+    """Backend configurado em VECTOR_BACKEND: chroma (padrão) ou memmap"""
+    if name == "memmap":
+        from .memmap_backend import MemmapBackend
+        return MemmapBackend(VectorRegistry.memmap_directory, VectorRegistry.get_embeddings)
+    return ChromaBackend()
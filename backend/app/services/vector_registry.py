@@ -0,0 +1,287 @@
+import chromadb
+from langchain_chroma import Chroma
+from langchain_huggingface import HuggingFaceEmbeddings
+from typing import Dict, Optional
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import os
+from dotenv import load_dotenv
+
+# Carrega variáveis de ambiente
+load_dotenv()
+
+class VectorRegistry:
+    """Modelo de embeddings, cliente ChromaDB e vector stores compartilhados por todo o processo
+
+    Tudo é carregado sob demanda (ou no warm-up do lifespan) uma única vez,
+    independente de quantos VectorService existirem.
+    """
+
+    persist_directory = "./data/chroma_db"
+    model_name = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+    # huggingface (PyTorch) ou onnx (ONNX Runtime, opcionalmente int8)
+    backend = os.getenv("EMBEDDING_BACKEND", "huggingface").lower()
+    # chroma (HNSW) ou memmap (busca exata em matriz float16 memory-mapped)
+    vector_backend = os.getenv("VECTOR_BACKEND", "chroma").lower()
+    memmap_directory = os.getenv("VECTOR_MEMMAP_PATH", "./data/vector_memmap")
+
+    _lock = threading.RLock()
+    _embeddings = None
+    _client = None
+    _vectorstores: Dict[str, Chroma] = {}
+    _backend = None
+    _lexical_index = None
+    _query_cache = None
+    _answer_cache = None
+    _reranker = None
+    _search_pool = None
+
+    @classmethod
+    def get_embeddings(cls):
+        """Modelo de embeddings do processo"""
+        if cls._embeddings is None:
+            with cls._lock:
+                if cls._embeddings is None:
+                    embeddings = cls._create_embeddings()
+
+                    # Cache em disco na frente do modelo (ingestão e consultas)
+                    if os.getenv("EMBEDDING_CACHE", "true").lower() == "true":
+                        from .embedding_cache import CachedEmbeddings
+
+                        embeddings = CachedEmbeddings(
+                            embeddings,
+                            model_key=cls._model_key(),
+                            path=os.getenv("EMBEDDING_CACHE_PATH", "./data/embedding_cache.sqlite"),
+                            max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+                        )
+                    cls._embeddings = embeddings
+        return cls._embeddings
+
+    @classmethod
+    def _model_key(cls) -> str:
+        """Identifica os vetores gerados: modelos ou quantizações diferentes não compartilham cache"""
+        key = f"{cls.backend}:{cls.model_name}"
+        if cls.backend == "onnx" and os.getenv("ONNX_QUANTIZE", "true").lower() == "true":
+            key += ":int8"
+        return key
+
+    @classmethod
+    def _create_embeddings(cls):
+        batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+
+        if cls.backend == "onnx":
+            from .onnx_embeddings import OnnxEmbeddings
+
+            threads = os.getenv("EMBEDDING_THREADS")
+            return OnnxEmbeddings(
+                model_name=cls.model_name,
+                quantize=os.getenv("ONNX_QUANTIZE", "true").lower() == "true",
+                batch_size=batch_size,
+                intra_op_threads=int(threads) if threads else None
+            )
+
+        # Embeddings usando HuggingFace (gratuito e local)
+        return HuggingFaceEmbeddings(
+            model_name=cls.model_name,
+            encode_kwargs={"batch_size": batch_size}
+        )
+
+    @classmethod
+    def get_client(cls) -> chromadb.ClientAPI:
+        """Cliente ChromaDB persistente do processo"""
+        if cls._client is None:
+            with cls._lock:
+                if cls._client is None:
+                    os.makedirs(cls.persist_directory, exist_ok=True)
+                    cls._client = chromadb.PersistentClient(path=cls.persist_directory)
+        return cls._client
+
+    @staticmethod
+    def hnsw_configuration() -> Dict:
+        """Parâmetros HNSW das collections do ChromaDB (só os definidos no ambiente; o resto fica no padrão)
+
+        HNSW_SPACE (l2, cosine ou ip), HNSW_M (vizinhos por nó), HNSW_CONSTRUCTION_EF
+        e HNSW_SEARCH_EF. Os três primeiros só valem na criação da collection
+        (para mudar uma existente: scripts.rebuild_hnsw); HNSW_SEARCH_EF é aplicado na hora.
+        """
+        settings = {
+            "space": os.getenv("HNSW_SPACE"),
+            "max_neighbors": os.getenv("HNSW_M"),
+            "ef_construction": os.getenv("HNSW_CONSTRUCTION_EF"),
+            "ef_search": os.getenv("HNSW_SEARCH_EF"),
+        }
+        return {
+            key: value if key == "space" else int(value)
+            for key, value in settings.items() if value
+        }
+
+    @classmethod
+    def get_collection(cls, collection_name: str, hnsw: Dict = None):
+        """Collection do ChromaDB, criada com a configuração HNSW (ef_search ajustado se mudou)"""
+        hnsw = cls.hnsw_configuration() if hnsw is None else hnsw
+        collection = cls.get_client().get_or_create_collection(
+            collection_name,
+            configuration={"hnsw": hnsw} if hnsw else None
+        )
+        current = (collection.configuration or {}).get("hnsw") or {}
+        if "ef_search" in hnsw and current.get("ef_search") != hnsw["ef_search"]:
+            collection.modify(configuration={"hnsw": {"ef_search": hnsw["ef_search"]}})
+        return collection
+
+    @classmethod
+    def get_vectorstore(cls, collection_name: str) -> Chroma:
+        """Vector store LangChain de uma collection"""
+        vectorstore = cls._vectorstores.get(collection_name)
+        if vectorstore is None:
+            with cls._lock:
+                vectorstore = cls._vectorstores.get(collection_name)
+                if vectorstore is None:
+                    cls.get_collection(collection_name)
+                    vectorstore = Chroma(
+                        client=cls.get_client(),
+                        collection_name=collection_name,
+                        embedding_function=cls.get_embeddings(),
+                    )
+                    cls._vectorstores[collection_name] = vectorstore
+        return vectorstore
+
+    @classmethod
+    def get_backend(cls):
+        """Backend de armazenamento vetorial configurado em VECTOR_BACKEND"""
+        if cls._backend is None:
+            with cls._lock:
+                if cls._backend is None:
+                    from .vector_backend import create_backend
+
+                    cls._backend = create_backend(cls.vector_backend)
+        return cls._backend
+
+    @classmethod
+    def get_lexical_index(cls):
+        """Índice BM25 do processo, sincronizado com as collections do ChromaDB"""
+        if cls._lexical_index is None:
+            with cls._lock:
+                if cls._lexical_index is None:
+                    from .lexical_index import LexicalIndex
+
+                    cls._lexical_index = LexicalIndex(
+                        os.getenv("LEXICAL_INDEX_PATH", "./data/lexical_index.sqlite")
+                    )
+        return cls._lexical_index
+
+    @classmethod
+    def get_query_cache(cls):
+        """Cache de resultados de busca do processo"""
+        if cls._query_cache is None:
+            with cls._lock:
+                if cls._query_cache is None:
+                    from .query_cache import QueryCache
+
+                    cls._query_cache = QueryCache(
+                        max_entries=int(os.getenv("QUERY_CACHE_SIZE", "1000")),
+                        ttl_seconds=float(os.getenv("QUERY_CACHE_TTL", "300"))
+                    )
+        return cls._query_cache
+
+    @classmethod
+    def get_answer_cache(cls):
+        """Cache de respostas do LLM do processo (ANSWER_CACHE_SIZE=0 desativa)"""
+        if cls._answer_cache is None:
+            with cls._lock:
+                if cls._answer_cache is None:
+                    from .answer_cache import AnswerCache
+
+                    similarity = os.getenv("ANSWER_CACHE_SIMILARITY")
+                    cls._answer_cache = AnswerCache(
+                        max_entries=int(os.getenv("ANSWER_CACHE_SIZE", "500")),
+                        ttl_seconds=float(os.getenv("ANSWER_CACHE_TTL", "3600")),
+                        similarity_threshold=float(similarity) if similarity else None,
+                        embed=lambda text: cls.get_embeddings().embed_query(text)
+                    )
+        return cls._answer_cache
+
+    @classmethod
+    def get_reranker(cls):
+        """Cross-encoder de reranking do processo (carregado só quando usado)"""
+        if cls._reranker is None:
+            with cls._lock:
+                if cls._reranker is None:
+                    from .reranker import CrossEncoderReranker
+
+                    cls._reranker = CrossEncoderReranker(
+                        model_name=os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"),
+                        max_candidates=int(os.getenv("RERANK_MAX_CANDIDATES", "30")),
+                        batch_size=int(os.getenv("RERANK_BATCH_SIZE", "16")),
+                        budget_ms=float(os.getenv("RERANK_BUDGET_MS", "300"))
+                    )
+        return cls._reranker
+
+    @classmethod
+    def get_search_pool(cls) -> ThreadPoolExecutor:
+        """Threads para consultar os shards em paralelo"""
+        if cls._search_pool is None:
+            with cls._lock:
+                if cls._search_pool is None:
+                    cls._search_pool = ThreadPoolExecutor(
+                        max_workers=int(os.getenv("SHARD_SEARCH_WORKERS", "4")),
+                        thread_name_prefix="shard-search"
+                    )
+        return cls._search_pool
+
+    @classmethod
+    def warm_up(cls) -> Dict:
+        """Carrega modelo e backend vetorial antecipadamente, retornando tempo e memória residente"""
+        rss_before = cls.rss_mb()
+        start = time.perf_counter()
+
+        cls.get_embeddings().embed_query("warm-up")
+        if cls.vector_backend == "chroma":
+            cls.get_client()
+        else:
+            cls.get_backend().list_collections()
+
+        return {
+            "seconds": round(time.perf_counter() - start, 2),
+            "rss_before_mb": rss_before,
+            "rss_after_mb": cls.rss_mb()
+        }
+
+    @classmethod
+    def info(cls) -> Dict:
+        """Estado atual do registro"""
+        return {
+            "embedding_model": cls.model_name,
+            "embedding_backend": cls.backend,
+            "embeddings_loaded": cls._embeddings is not None,
+            "vector_backend": cls.vector_backend,
+            "client_loaded": cls._client is not None,
+            "embedding_cache": cls.cache_stats(),
+            "query_cache": cls.get_query_cache().stats(),
+            "answer_cache": cls.get_answer_cache().stats(),
+            "reranker": cls._reranker.stats() if cls._reranker else None,
+            "collections": sorted(cls._vectorstores.keys()),
+            "rss_mb": cls.rss_mb()
+        }
+
+    @classmethod
+    def cache_stats(cls) -> Optional[Dict]:
+        """Acertos/faltas do cache de embeddings (None se desativado ou ainda não carregado)"""
+        stats = getattr(cls._embeddings, "stats", None)
+        return stats() if stats else None
+
+    @staticmethod
+    def rss_mb() -> float:
+        """Memória residente atual do processo em MB"""
+        try:
+            with open("/proc/self/statm") as statm:
+                pages = int(statm.read().split()[1])
+            return round(pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024), 1)
+        except (OSError, ValueError, IndexError):
+            # Fora do Linux: pico de memória (ru_maxrss em KB no Linux, bytes no macOS);
+            # o módulo resource não existe no Windows, por isso só é importado aqui
+            try:
+                import resource
+            except ImportError:
+                return 0.0
+            return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
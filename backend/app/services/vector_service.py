@@ -1,114 +1,568 @@
-import chromadb
-from chromadb.config import Settings
-from langchain_chroma import Chroma
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional, Tuple, Iterable
+import hashlib
+import re
 import os
 from dotenv import load_dotenv
 
 from ..schemas.vector_metadata_schema import VectorMetadata
+from ..enums.retrieval_mode_enum import RetrievalMode
+from ..enums.document_category_enum import DocumentCategory
+from .vector_registry import VectorRegistry
+from .chunkers import Chunk, TextChunker, chunker_for
 
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
+# Separa categoria e tenant no nome do shard (não aparece em nenhum dos dois)
+SHARD_TENANT_SEPARATOR = "--"
+# Tamanho máximo do nome de uma collection no ChromaDB
+MAX_COLLECTION_NAME = 63
+
 class VectorService:
     def __init__(self):
-        # Diretório para persistir o ChromaDB
-        self.persist_directory = "./data/chroma_db"
-        os.makedirs(self.persist_directory, exist_ok=True)
+        # Modelo de embeddings e backend vetorial são compartilhados pelo processo
+        # e carregados sob demanda (ou no warm-up do lifespan) pelo VectorRegistry
+        self.persist_directory = VectorRegistry.persist_directory
+        # Collection original (única antes do sharding) e prefixo dos shards
+        self.collection_name = "documents"
         
-        # Embeddings usando HuggingFace (gratuito e local)
-        self.embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2"
-        )
+        # Um shard por categoria (e por tenant, quando informado): documents_<categoria>[--<tenant>]
+        self.sharding_enabled = os.getenv("VECTOR_SHARDING", "true").lower() == "true"
         
-        # ChromaDB client
-        self.client = chromadb.PersistentClient(path=self.persist_directory)
+        # Divisão em chunks: genérica (1000 caracteres, overlap 200) ou, com STRUCTURED_CHUNKING,
+        # pela estrutura do documento (itens da NF-e, artigos da legislação)
+        self.chunk_size = 1000
+        self.chunk_overlap = 200
+        self.structured_chunking = os.getenv("STRUCTURED_CHUNKING", "true").lower() == "true"
+        self.default_chunker = TextChunker(self.chunk_size, self.chunk_overlap)
         
-        # Vector store
-        self.vectorstore = Chroma(
-            client=self.client,
-            collection_name="documents",
-            embedding_function=self.embeddings,
-        )
+        # Tamanho dos lotes de embeddings na ingestão
+        self.ingest_batch_size = int(os.getenv("INGEST_BATCH_SIZE", "64"))
+        self.bulk_batch_size = int(os.getenv("BULK_EMBED_BATCH_SIZE", "512"))
         
-        # Text splitter
-        self.text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000,
-            chunk_overlap=200,
-            length_function=len,
-        )
+        # Quantidade de texto acumulada antes de dividir em chunks na ingestão em streaming
+        self.stream_buffer_size = int(os.getenv("INGEST_STREAM_BUFFER", "8000"))
+        
+        # Busca híbrida: modo padrão, candidatos por lista e constante do Reciprocal Rank Fusion
+        self.retrieval_mode = RetrievalMode(os.getenv("RETRIEVAL_MODE", "vector"))
+        self.hybrid_candidates = int(os.getenv("HYBRID_CANDIDATES", "20"))
+        self.rrf_k = int(os.getenv("RRF_K", "60"))
+        
+        # Reranking com cross-encoder: busca k * RERANK_OVERFETCH candidatos e mantém os k melhores
+        self.rerank_enabled = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+        self.rerank_overfetch = int(os.getenv("RERANK_OVERFETCH", "4"))
+    
+    @property
+    def embeddings(self):
+        return VectorRegistry.get_embeddings()
+    
+    @property
+    def client(self):
+        return VectorRegistry.get_client()
+    
+    @property
+    def vectorstore(self):
+        return VectorRegistry.get_vectorstore(self.collection_name)
+    
+    @property
+    def backend(self):
+        return VectorRegistry.get_backend()
+    
+    @property
+    def search_pool(self):
+        return VectorRegistry.get_search_pool()
+    
+    @property
+    def lexical_index(self):
+        return VectorRegistry.get_lexical_index()
+    
+    @property
+    def query_cache(self):
+        return VectorRegistry.get_query_cache()
+    
+    @property
+    def answer_cache(self):
+        return VectorRegistry.get_answer_cache()
 
-    def ingest_document(self, document_id: str, content: str, metadata: VectorMetadata) -> List[str]:
+    def ingest_document(
+        self,
+        document_id: str,
+        content: str,
+        metadata: VectorMetadata,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[str]:
         """Ingere um documento no vector store"""
-        # Converte o metadata para dict
-        base_metadata = {
+        ids, chunks, metadatas = self._build_chunks(document_id, content, metadata)
+        
+        # Adiciona os chunks ao vector store em lotes, reportando o progresso
+        self._add_in_batches(ids, chunks, metadatas, self.ingest_batch_size, progress_callback)
+        
+        return ids
+    
+    def ingest_document_stream(
+        self,
+        document_id: str,
+        texts: Iterable[str],
+        metadata: VectorMetadata,
+        progress_callback: Optional[Callable[[], None]] = None
+    ) -> List[str]:
+        """Ingere um documento recebido em partes (ex.: páginas), sem montar o texto completo em memória"""
+        base_metadata = self._base_metadata(document_id, metadata)
+        chunker = self.chunker_for(metadata.category, metadata.file_type)
+        ids, pending_chunks = [], []
+        buffer = ""
+        
+        def flush(chunks: List[Chunk]):
+            start = len(ids)
+            batch_ids = [f"{document_id}_chunk_{i}" for i in range(start, start + len(chunks))]
+            metadatas = []
+            for i, (chunk_id, (_, chunk_metadata)) in enumerate(zip(batch_ids, chunks), start):
+                metadatas.append(self._chunk_metadata(base_metadata, chunk_metadata, i, chunk_id))
+            self._add_in_batches(batch_ids, [text for text, _ in chunks], metadatas, self.ingest_batch_size)
+            ids.extend(batch_ids)
+        
+        for text in texts:
+            buffer += text + "\n"
+            if progress_callback:
+                progress_callback()
+            if len(buffer) < self.stream_buffer_size:
+                continue
+            
+            # O último chunk volta para o buffer para continuar na próxima parte
+            # (chunks de continuação de artigo começam com "Art. N", então a divisão se mantém)
+            chunks = chunker.split(buffer)
+            buffer = chunks.pop()[0] + "\n" if chunks else ""
+            pending_chunks.extend(chunks)
+            if len(pending_chunks) >= self.ingest_batch_size:
+                flush(pending_chunks)
+                pending_chunks = []
+        
+        pending_chunks.extend(chunker.split(buffer.strip()))
+        if pending_chunks:
+            flush(pending_chunks)
+        
+        return ids
+    
+    def ingest_documents(self, documents: List[Tuple[str, str, VectorMetadata]], batch_size: int = None) -> Dict[str, List[str]]:
+        """Ingere vários documentos de uma vez, agrupando os chunks em lotes grandes de embeddings"""
+        all_ids, all_chunks, all_metadatas = [], [], []
+        ids_by_document = {}
+        
+        for document_id, content, metadata in documents:
+            ids, chunks, metadatas = self._build_chunks(document_id, content, metadata)
+            ids_by_document[document_id] = ids
+            all_ids.extend(ids)
+            all_chunks.extend(chunks)
+            all_metadatas.extend(metadatas)
+        
+        self._add_in_batches(all_ids, all_chunks, all_metadatas, batch_size or self.bulk_batch_size)
+        
+        return ids_by_document
+    
+    def _build_chunks(self, document_id: str, content: str, metadata: VectorMetadata) -> Tuple[List[str], List[str], List[Dict]]:
+        """Divide o conteúdo em chunks e monta ids e metadados de cada um"""
+        base_metadata = self._base_metadata(document_id, metadata)
+        
+        # Divide o texto em chunks (estratégia da categoria/tipo de arquivo)
+        split = self.chunker_for(metadata.category, metadata.file_type).split(content)
+        ids = [f"{document_id}_chunk_{i}" for i in range(len(split))]
+        chunks = [chunk for chunk, _ in split]
+        
+        # Adiciona metadados específicos para cada chunk
+        metadatas = [
+            self._chunk_metadata(base_metadata, chunk_metadata, i, chunk_id)
+            for i, (chunk_id, (_, chunk_metadata)) in enumerate(zip(ids, split))
+        ]
+        
+        return ids, chunks, metadatas
+    
+    @staticmethod
+    def _chunk_metadata(base_metadata: Dict, chunk_metadata: Dict, index: int, chunk_id: str) -> Dict:
+        """Metadados do documento + os do chunker (seção, itens, artigo) + posição"""
+        return {**base_metadata, **chunk_metadata, "chunk_index": index, "chunk_id": chunk_id}
+    
+    def chunker_for(self, category: Optional[DocumentCategory], file_type: Optional[str]) -> TextChunker:
+        """Chunker da categoria/tipo de arquivo (o genérico se STRUCTURED_CHUNKING estiver desativado)"""
+        if not self.structured_chunking:
+            return self.default_chunker
+        return chunker_for(category, file_type, self.chunk_size, self.chunk_overlap)
+    
+    def split_chunks(
+        self,
+        document_id: str,
+        content: str,
+        category: Optional[DocumentCategory] = None,
+        file_type: Optional[str] = None
+    ) -> List[Tuple[str, str]]:
+        """(chunk_id, texto) na mesma divisão usada na ingestão"""
+        return [
+            (f"{document_id}_chunk_{i}", chunk)
+            for i, (chunk, _) in enumerate(self.chunker_for(category, file_type).split(content))
+        ]
+    
+    def get_chunks(self, chunk_ids: List[str], filter_metadata: Dict = None) -> List[Dict]:
+        """Busca chunks diretamente pelo id (sem embeddings), na ordem pedida"""
+        if not chunk_ids:
+            return []
+        
+        found = {}
+        for shard in self.shards_for(filter_metadata):
+            for chunk_id, content, metadata in self.backend.get(shard, ids=chunk_ids):
+                found[chunk_id] = {"content": content, "metadata": metadata, "score": 1.0}
+        return [found[chunk_id] for chunk_id in chunk_ids if chunk_id in found]
+    
+    def shard_name(self, category: Optional[str], tenant: Optional[str] = None) -> str:
+        """Collection de destino de um chunk: documents_<categoria>[--<tenant>]
+
+        "--" separa o tenant: não aparece nas categorias nem nos slugs de tenant,
+        então o nome é convertido de volta sem ambiguidade (parse_shard_name).
+        """
+        if not self.sharding_enabled or not category:
+            return self.collection_name
+        name = f"{self.collection_name}_{category}"
+        if tenant:
+            name += SHARD_TENANT_SEPARATOR + self._tenant_slug(tenant, MAX_COLLECTION_NAME - len(name) - len(SHARD_TENANT_SEPARATOR))
+        return name
+    
+    def parse_shard_name(self, name: str) -> Optional[Tuple[str, Optional[str]]]:
+        """(categoria, slug do tenant ou None) de um shard; None se o nome não for de um shard"""
+        prefix = f"{self.collection_name}_"
+        if not name.startswith(prefix) or "__" in name:
+            # "__": collections temporárias de manutenção (ex.: scripts.rebuild_hnsw)
+            return None
+        category, _, slug = name[len(prefix):].partition(SHARD_TENANT_SEPARATOR)
+        return category, slug or None
+    
+    @staticmethod
+    def _tenant_slug(tenant: str, max_length: int = MAX_COLLECTION_NAME) -> str:
+        """Tenant em formato aceito em nomes de collection, com no máximo max_length caracteres
+
+        Slugs longos (ou vazios, para tenants só com símbolos) são cortados e recebem
+        um hash do tenant, para continuarem únicos dentro do limite de tamanho do nome.
+        """
+        slug = re.sub(r"[^a-z0-9]+", "-", tenant.lower()).strip("-")
+        if slug and len(slug) <= max_length:
+            return slug
+        digest = hashlib.sha1(tenant.encode("utf-8")).hexdigest()[:8]
+        return (slug[:max(max_length - len(digest) - 1, 0)].rstrip("-") + "-" + digest).lstrip("-")
+    
+    def shards_for(self, filter_metadata: Dict = None) -> List[str]:
+        """Collections existentes que podem conter resultados para o filtro (categoria/tenant)"""
+        existing = self.backend.list_collections()
+        if not self.sharding_enabled:
+            return [name for name in existing if name == self.collection_name]
+        
+        category = self._filter_value(filter_metadata, "category")
+        tenant = self._filter_value(filter_metadata, "tenant")
+        
+        shards = []
+        for name in existing:
+            if name == self.collection_name:
+                # Collection anterior ao sharding: consultada até a migração ser concluída
+                shards.append(name)
+                continue
+            parsed = self.parse_shard_name(name)
+            if parsed is None:
+                continue
+            if category and parsed[0] != category:
+                continue
+            if tenant and name != self.shard_name(parsed[0], tenant):
+                continue
+            shards.append(name)
+        return shards
+    
+    @staticmethod
+    def _filter_value(filter_metadata: Optional[Dict], field: str) -> Optional[str]:
+        """Valor de uma condição de igualdade no filtro do ChromaDB (no topo ou dentro de $and)"""
+        if not filter_metadata:
+            return None
+        for condition in filter_metadata.get("$and", [filter_metadata]):
+            value = condition.get(field)
+            if isinstance(value, dict):
+                value = value.get("$eq")
+            if isinstance(value, str):
+                return value
+        return None
+    
+    def _fan_out(self, shards: List[str], fn: Callable[[str], List[Dict]]) -> List[Dict]:
+        """Executa a busca em cada shard em paralelo e junta os resultados"""
+        results = []
+        for shard_results in self._map_shards(shards, fn):
+            results.extend(shard_results)
+        return results
+    
+    def _map_shards(self, shards: List[str], fn: Callable[[str], Any]) -> List[Any]:
+        """Resultado de fn para cada shard, em paralelo quando há mais de um"""
+        if len(shards) == 1:
+            return [fn(shards[0])]
+        return list(self.search_pool.map(fn, shards))
+    
+    def _base_metadata(self, document_id: str, metadata: VectorMetadata) -> Dict:
+        """Converte o metadata para dict"""
+        return {
             "document_id": document_id,
             "filename": metadata.filename,
             "file_type": metadata.file_type,
             "category": metadata.category.value,
             "tags": metadata.tags
-        }
+        } | ({"tenant": metadata.tenant} if metadata.tenant else {})
+    
+    def _add_in_batches(
+        self,
+        ids: List[str],
+        chunks: List[str],
+        metadatas: List[Dict],
+        batch_size: int,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ):
+        """Gera embeddings e grava os chunks no vector store (no shard de cada um) em lotes"""
+        for start in range(0, len(chunks), batch_size):
+            end = start + batch_size
+            
+            by_shard: Dict[str, List[int]] = {}
+            for i in range(start, min(end, len(chunks))):
+                shard = self.shard_name(metadatas[i].get("category"), metadatas[i].get("tenant"))
+                by_shard.setdefault(shard, []).append(i)
+            
+            for shard, indices in by_shard.items():
+                shard_ids = [ids[i] for i in indices]
+                shard_chunks = [chunks[i] for i in indices]
+                shard_metadatas = [metadatas[i] for i in indices]
+                self.backend.add_texts(shard, shard_ids, shard_chunks, shard_metadatas)
+                # Mantém o índice lexical em sincronia, de forma incremental
+                self.lexical_index.add_chunks(shard, shard_ids, shard_chunks, shard_metadatas)
+            
+            # Resultados de busca e respostas anteriores a esta ingestão deixam de valer
+            self.query_cache.bump_generation(self.collection_name)
+            self.answer_cache.invalidate_documents(
+                metadata.get("document_id") for metadata in metadatas[start:end]
+            )
+            if progress_callback:
+                progress_callback(min(end, len(chunks)), len(chunks))
+    
+    def similarity_search(self, query: str, k: int = 5, filter_metadata: Dict = None) -> List[Dict]:
+        """Busca por similaridade nos shards do filtro (em paralelo), juntando pela distância"""
+        shards = self.shards_for(filter_metadata)
+        if not shards:
+            return []
         
-        # Divide o texto em chunks
-        chunks = self.text_splitter.split_text(content)
+        # A consulta é convertida em embedding uma única vez para todos os shards
+        query_embedding = self.embeddings.embed_query(query)
         
-        # Adiciona metadados específicos para cada chunk
-        metadatas = []
-        for i, chunk in enumerate(chunks):
-            chunk_metadata = base_metadata.copy()
-            chunk_metadata["chunk_index"] = i
-            chunk_metadata["chunk_id"] = f"{document_id}_chunk_{i}"
-            metadatas.append(chunk_metadata)
-        
-        # Adiciona os chunks ao vector store
-        ids = [f"{document_id}_chunk_{i}" for i in range(len(chunks))]
-        self.vectorstore.add_texts(
-            texts=chunks,
-            metadatas=metadatas,
-            ids=ids
+        results = self._fan_out(
+            shards, lambda shard: self.backend.search_by_vector(shard, query_embedding, k, filter_metadata)
         )
+        return sorted(results, key=lambda result: result["score"])[:k]
+    
+    def similarity_search_batch(self, queries: List[str], k: int = 5, filter_metadata: Dict = None) -> List[List[Dict]]:
+        """Busca vetorial de várias consultas: uma chamada ao modelo e uma busca em lote por shard"""
+        shards = self.shards_for(filter_metadata)
+        if not shards or not queries:
+            return [[] for _ in queries]
         
-        return ids
+        query_embeddings = self.embeddings.embed_documents(queries)
+        
+        merged: List[List[Dict]] = [[] for _ in queries]
+        for shard_results in self._map_shards(
+            shards, lambda shard: self.backend.search_by_vectors(shard, query_embeddings, k, filter_metadata)
+        ):
+            for i, results in enumerate(shard_results):
+                merged[i].extend(results)
+        return [sorted(results, key=lambda result: result["score"])[:k] for results in merged]
     
-    def similarity_search(self, query: str, k: int = 5, filter_metadata: Dict = None) -> List[Dict]:
-        """Busca por similaridade no vector store"""
-        results = self.vectorstore.similarity_search_with_score(
-            query=query,
-            k=k,
-            filter=filter_metadata
+    def get_document_chunks(self, document_id: str, limit: int, filter_metadata: Dict = None) -> List[Dict]:
+        """Primeiros chunks de um documento, em ordem, buscados pelos metadados (sem embeddings)"""
+        chunks = []
+        for shard in self.shards_for(filter_metadata):
+            results = self.backend.get(
+                shard,
+                where={"$and": [{"document_id": {"$eq": document_id}}, {"chunk_index": {"$lt": limit}}]}
+            )
+            chunks.extend(
+                {"content": content, "metadata": metadata, "score": 1.0}
+                for _, content, metadata in results
+            )
+        return sorted(chunks, key=lambda chunk: chunk["metadata"].get("chunk_index", 0))
+    
+    def lexical_search(self, query: str, k: int = 5, filter_metadata: Dict = None) -> List[Dict]:
+        """Busca BM25 no índice lexical (códigos fiscais, CNPJ, chave de acesso), nos shards do filtro"""
+        shards = self.shards_for(filter_metadata)
+        if not shards:
+            return []
+        per_shard = self._map_shards(
+            shards, lambda shard: self.lexical_index.search(shard, query, k, filter_metadata)
+        )
+        # Cada shard tem o seu idf, então os scores BM25 não são comparáveis entre shards:
+        # os resultados são intercalados pela posição em cada shard (como no RRF)
+        ranked = sorted(
+            (rank, index, result)
+            for index, results in enumerate(per_shard)
+            for rank, result in enumerate(results)
         )
+        return [result for _, _, result in ranked[:k]]
+    
+    def hybrid_search(self, query: str, k: int = 5, filter_metadata: Dict = None) -> List[Dict]:
+        """Combina busca vetorial e lexical por Reciprocal Rank Fusion"""
+        candidates = max(k, self.hybrid_candidates)
+        return self._fuse({
+            "vector_score": self.similarity_search(query, candidates, filter_metadata),
+            "lexical_score": self.lexical_search(query, candidates, filter_metadata)
+        }, k)
+    
+    def _fuse(self, ranked_lists: Dict[str, List[Dict]], k: int) -> List[Dict]:
+        """Reciprocal Rank Fusion das listas, guardando o score original de cada uma"""
+        fused: Dict[str, Dict] = {}
+        for score_field, results in ranked_lists.items():
+            for rank, result in enumerate(results, 1):
+                chunk_id = result["metadata"].get("chunk_id") or result["content"]
+                entry = fused.setdefault(chunk_id, {
+                    "content": result["content"],
+                    "metadata": result["metadata"],
+                    "score": 0.0,
+                    "vector_score": None,
+                    "lexical_score": None
+                })
+                entry["score"] += 1.0 / (self.rrf_k + rank)
+                entry[score_field] = result["score"]
         
-        return [
-            {
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "score": score
-            }
-            for doc, score in results
+        return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[:k]
+    
+    def search(self, query: str, k: int = 5, filter_metadata: Dict = None, mode: RetrievalMode = None) -> List[Dict]:
+        """Busca no modo pedido (padrão: RETRIEVAL_MODE), com cache de resultados"""
+        mode = mode or self.retrieval_mode
+        cache_key = self.query_cache.make_key(self.collection_name, query, k, filter_metadata, mode.value)
+        cached = self.query_cache.get(cache_key)
+        if cached is not None:
+            return [dict(result) for result in cached]
+        
+        if mode == RetrievalMode.VECTOR:
+            results = self.similarity_search(query, k, filter_metadata)
+        elif mode == RetrievalMode.LEXICAL:
+            results = self.lexical_search(query, k, filter_metadata)
+        else:
+            results = self.hybrid_search(query, k, filter_metadata)
+        
+        self.query_cache.set(cache_key, [dict(result) for result in results])
+        return results
+    
+    def search_batch(
+        self,
+        queries: List[str],
+        k: int = 5,
+        filter_metadata: Dict = None,
+        mode: RetrievalMode = None
+    ) -> List[List[Dict]]:
+        """Várias consultas de uma vez, resultados na ordem das consultas
+
+        As consultas fora do cache têm a parte vetorial feita em lote
+        (similarity_search_batch); a lexical continua uma a uma.
+        """
+        mode = mode or self.retrieval_mode
+        keys = [
+            self.query_cache.make_key(self.collection_name, query, k, filter_metadata, mode.value)
+            for query in queries
         ]
+        results: List[Optional[List[Dict]]] = [self.query_cache.get(key) for key in keys]
+        pending = [i for i, cached in enumerate(results) if cached is None]
+        for i, cached in enumerate(results):
+            if cached is not None:
+                results[i] = [dict(result) for result in cached]
+        
+        if pending:
+            pending_queries = [queries[i] for i in pending]
+            if mode == RetrievalMode.LEXICAL:
+                found = [self.lexical_search(query, k, filter_metadata) for query in pending_queries]
+            elif mode == RetrievalMode.VECTOR:
+                found = self.similarity_search_batch(pending_queries, k, filter_metadata)
+            else:
+                candidates = max(k, self.hybrid_candidates)
+                vector_lists = self.similarity_search_batch(pending_queries, candidates, filter_metadata)
+                found = [
+                    self._fuse({
+                        "vector_score": vector_results,
+                        "lexical_score": self.lexical_search(query, candidates, filter_metadata)
+                    }, k)
+                    for query, vector_results in zip(pending_queries, vector_lists)
+                ]
+            
+            for i, query_results in zip(pending, found):
+                self.query_cache.set(keys[i], [dict(result) for result in query_results])
+                results[i] = query_results
+        
+        return results
     
-    def delete_document(self, document_id: str):
-        """Remove todos os chunks de um documento"""
-        # Busca todos os chunks do documento
-        collection = self.client.get_collection("documents")
-        results = collection.get(where={"document_id": document_id})
+    def delete_document(self, document_id: str, category: str = None, tenant: str = None):
+        """Remove todos os chunks de um documento (dos shards da categoria/tenant, se informados)"""
+        conditions = []
+        if category:
+            conditions.append({"category": {"$eq": category}})
+        if tenant:
+            conditions.append({"tenant": {"$eq": tenant}})
+        shard_filter = {"$and": conditions} if conditions else None
+        
+        for shard in self.shards_for(shard_filter):
+            # Busca todos os chunks do documento
+            results = self.backend.get(shard, where={"document_id": document_id})
+            self.backend.delete(shard, [chunk_id for chunk_id, _, _ in results])
+            
+            self.lexical_index.delete_document(shard, document_id)
         
-        if results["ids"]:
-            collection.delete(ids=results["ids"])
+        self.query_cache.bump_generation(self.collection_name)
+        self.answer_cache.invalidate_documents([document_id])
     
     def get_collection_info(self) -> Dict:
-        """Retorna informações sobre a collection"""
-        collection = self.client.get_collection("documents")
+        """Retorna informações sobre as collections (shards)"""
+        shards = {
+            shard: {
+                "count": self.backend.count(shard),
+                "lexical_count": self.lexical_index.count(shard),
+                "index": self.backend.describe(shard)
+            }
+            for shard in self.shards_for()
+        }
         return {
-            "count": collection.count(),
-            "name": collection.name
+            "count": sum(shard["count"] for shard in shards.values()),
+            "name": self.collection_name,
+            "backend": self.backend.name,
+            "sharding_enabled": self.sharding_enabled,
+            "shards": shards,
+            "embedding_cache": VectorRegistry.cache_stats(),
+            "query_cache": self.query_cache.stats(),
+            "answer_cache": self.answer_cache.stats()
         }
 
-    def rag_query(self, query: str, k: int = 5, metadata: VectorMetadata = None) -> Dict[str, Any]:
-        """Executa busca RAG completa: busca + contexto organizado"""
+    def rag_query(
+        self,
+        query: str,
+        k: int = 5,
+        metadata: VectorMetadata = None,
+        mode: RetrievalMode = None,
+        rerank: bool = None
+    ) -> Dict[str, Any]:
+        """Executa busca RAG completa: busca (+ reranking opcional) + contexto organizado"""
+        filter_dict = self.build_filter(metadata)
+        mode = mode or self.retrieval_mode
+        rerank = self.rerank_enabled if rerank is None else rerank
+        
+        if rerank:
+            reranker = VectorRegistry.get_reranker()
+            candidates = self.search(query, min(k * self.rerank_overfetch, reranker.max_candidates), filter_dict, mode)
+            chunks = reranker.rerank(query, candidates, k)
+        else:
+            chunks = self.search(query, k, filter_dict, mode)
+        
+        return {
+            "query": query,
+            "mode": mode.value,
+            "reranked": rerank,
+            "chunks_found": len(chunks),
+            "context_chunks": chunks,
+            "context_summary": f"Encontrados {len(chunks)} trechos relevantes de {len(set(chunk['metadata'].get('filename', 'Unknown') for chunk in chunks))} documentos"
+        }
+    
+    def build_filter(self, metadata: VectorMetadata = None) -> Optional[Dict]:
+        """Converte o VectorMetadata em filtro do ChromaDB"""
         filter_dict = None
         if metadata:
             conditions = []
@@ -120,18 +574,12 @@ class VectorService:
                 conditions.append({"category": {"$eq": metadata.category.value}})
             if metadata.tags:
                 conditions.append({"tags": {"$eq": metadata.tags}})
+            if metadata.tenant:
+                conditions.append({"tenant": {"$eq": metadata.tenant}})
             
             if conditions:
                 if len(conditions) == 1:
                     filter_dict = conditions[0]
                 else:
                     filter_dict = {"$and": conditions}
-        
-        chunks = self.similarity_search(query, k, filter_dict)
-        
-        return {
-            "query": query,
-            "chunks_found": len(chunks),
-            "context_chunks": chunks,
-            "context_summary": f"Encontrados {len(chunks)} trechos relevantes de {len(set(chunk['metadata'].get('filename', 'Unknown') for chunk in chunks))} documentos"
-        }
\ No newline at end of file
+        return filter_dict
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""Popula document_identifiers para NF-e ingeridas antes da migração a4f6c8e0b213.
+
+Usa o registro estruturado (tabela nfes) e o conteúdo salvo do documento para
+localizar os chunks; rode antes o backfill_nfe_tables se necessário.
+
+Uso (a partir de backend/):
+    python -m scripts.backfill_document_identifiers
+"""
+from app.database import SessionLocal
+from app.models.document_model import Document
+from app.models.nfe_model import NFe
+from app.models.document_identifier_model import DocumentIdentifier
+from app.services.identifier_service import IdentifierService
+from app.services.vector_service import VectorService
+
+
+def main():
+    db = SessionLocal()
+    vector_service = VectorService()
+    indexed = 0
+    skipped = 0
+    try:
+        rows = (
+            db.query(NFe, Document)
+            .join(Document, Document.id == NFe.document_id)
+            .outerjoin(DocumentIdentifier, DocumentIdentifier.document_id == Document.id)
+            .filter(DocumentIdentifier.id.is_(None))
+            .all()
+        )
+
+        for nfe, document in rows:
+            if not document.content:
+                skipped += 1
+                continue
+
+            record = {
+                "chave": nfe.chave,
+                "numero": nfe.numero,
+                "serie": nfe.serie,
+                "emitente_cnpj": nfe.emitente_cnpj,
+                "destinatario_cnpj": nfe.destinatario_cnpj
+            }
+            IdentifierService.index_document(
+                db, document.id, record, vector_service.split_chunks(
+                    document.id, document.content, document.category, document.file_type
+                )
+            )
+            indexed += 1
+
+            if indexed % 200 == 0:
+                db.commit()
+
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"NF-e indexadas por identificador: {indexed} | ignoradas: {skipped}")
+
+
+if __name__ == "__main__":
+    main()
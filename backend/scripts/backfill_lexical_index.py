@@ -0,0 +1,45 @@
+"""Popula o índice lexical (BM25) com os chunks já existentes no ChromaDB.
+
+Necessário uma vez para bases ingeridas antes da busca híbrida; depois disso o
+índice é mantido a cada ingestão e remoção. Percorre a collection original
+"documents" e todos os shards documents_<categoria>[--<tenant>], cada um indexado
+com o nome da própria collection. Chunks já indexados são substituídos.
+
+Uso (a partir de backend/):
+    python -m scripts.backfill_lexical_index
+"""
+from app.services.vector_registry import VectorRegistry
+from app.services.vector_service import VectorService
+
+PAGE_SIZE = 1000
+
+
+def main():
+    vector_service = VectorService()
+    client = VectorRegistry.get_client()
+    lexical_index = VectorRegistry.get_lexical_index()
+
+    # Collection original e shards (as temporárias de manutenção ficam de fora)
+    names = sorted(
+        collection.name for collection in client.list_collections()
+        if collection.name == vector_service.collection_name or vector_service.parse_shard_name(collection.name)
+    )
+
+    for name in names:
+        collection = client.get_collection(name)
+        indexed = 0
+        offset = 0
+        while True:
+            page = collection.get(limit=PAGE_SIZE, offset=offset, include=["documents", "metadatas"])
+            if not page["ids"]:
+                break
+
+            lexical_index.add_chunks(name, page["ids"], page["documents"], page["metadatas"])
+            indexed += len(page["ids"])
+            offset += PAGE_SIZE
+
+        print(f"{name}: chunks indexados: {indexed} | total no índice: {lexical_index.count(name)}")
+
+
+if __name__ == "__main__":
+    main()
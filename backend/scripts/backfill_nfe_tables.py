@@ -0,0 +1,56 @@
+"""Popula as tabelas nfes/nfe_items para NF-e ingeridas antes da migração 5d7c3e9a2f18.
+
+Uso (a partir de backend/):
+    python -m scripts.backfill_nfe_tables
+"""
+import os
+
+from app.database import SessionLocal
+from app.models.document_model import Document
+from app.models.nfe_model import NFe
+from app.enums.document_category_enum import DocumentCategory
+from app.services.document_service import DocumentService
+from app.services.nfe_service import NFeService
+
+
+def main():
+    db = SessionLocal()
+    created = 0
+    skipped = 0
+    try:
+        documents = (
+            db.query(Document)
+            .outerjoin(NFe, NFe.document_id == Document.id)
+            .filter(
+                Document.category == DocumentCategory.NOTAS_FISCAIS,
+                Document.file_type == "xml",
+                NFe.id.is_(None)
+            )
+            .all()
+        )
+
+        for document in documents:
+            if not os.path.exists(document.file_path):
+                skipped += 1
+                continue
+
+            _, nfe_record = DocumentService._parse_xml(document.file_path)
+            if not nfe_record:
+                skipped += 1
+                continue
+
+            NFeService.save_record(db, document.id, nfe_record)
+            created += 1
+
+            if created % 200 == 0:
+                db.commit()
+
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"NF-e estruturadas criadas: {created} | ignoradas: {skipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Benchmark da busca em lote: consultas uma a uma vs. VectorService.similarity_search_batch.
+
+Usa o conjunto de consultas salvo por scripts.bench_vector_search (uma por
+linha) e mede o tempo total e o tempo amortizado por consulta dos dois
+caminhos. Os caches de embeddings e de consultas são desativados para que
+todas as execuções passem pelo modelo e pelo vector store.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_batch_search --queries ./data/bench_queries.txt --limit 200 --k 5
+"""
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", default="./data/bench_queries.txt", help="arquivo com uma consulta por linha")
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    os.environ["EMBEDDING_CACHE"] = "false"
+    os.environ["QUERY_CACHE_SIZE"] = "0"
+    from app.services.vector_registry import VectorRegistry
+    from app.services.vector_service import VectorService
+
+    with open(args.queries, encoding="utf-8") as file:
+        queries = [line.strip() for line in file if line.strip()][:args.limit]
+
+    VectorRegistry.warm_up()
+    vector_service = VectorService()
+
+    def one_by_one():
+        return [vector_service.similarity_search(query, args.k) for query in queries]
+
+    def batch():
+        return vector_service.similarity_search_batch(queries, args.k)
+
+    timings = {"uma a uma": float("inf"), "lote": float("inf")}
+    for _ in range(args.repeat):
+        for label, run in (("uma a uma", one_by_one), ("lote", batch)):
+            start = time.perf_counter()
+            results = run()
+            timings[label] = min(timings[label], time.perf_counter() - start)
+
+    # Os dois caminhos devem retornar os mesmos chunks
+    same = sum(
+        [result["metadata"].get("chunk_id") for result in single] == [result["metadata"].get("chunk_id") for result in batched]
+        for single, batched in zip(one_by_one(), batch())
+    )
+
+    print(f"{len(queries)} consultas | k={args.k} | backend {VectorRegistry.vector_backend}")
+    print(f"{'caminho':<10} | {'total (s)':>9} | {'ms/consulta':>11}")
+    for label, seconds in timings.items():
+        print(f"{label:<10} | {seconds:>9.2f} | {seconds * 1000 / len(queries):>11.2f}")
+    print(f"speedup: {timings['uma a uma'] / timings['lote']:.2f}x | resultados iguais: {same}/{len(queries)}")
+
+
+if __name__ == "__main__":
+    main()
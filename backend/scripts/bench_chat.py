@@ -0,0 +1,124 @@
+"""Benchmark de carga do chat (controller → RAGService → LLM) sem rede, com o provedor fake.
+
+Envia as perguntas para POST /api/v1/chats/ pela própria aplicação ASGI
+(httpx.ASGITransport, sem servidor), com N requisições simultâneas, e mede
+throughput, latência p50/p95/p99 e os status retornados. Cada requisição
+simultânea usa a sua sessão, que é removida ao final. Os caches de consultas
+e de respostas ficam desativados, a menos que --cache seja passado.
+
+O provedor é o de LLM_PROVIDER=fake, com latência, taxa de tokens e taxa de
+erros pedidas nos argumentos; com --provider http, as chamadas vão para
+LLM_HTTP_URL (ex.: scripts.fake_llm_server). Os documentos usados na busca são
+os já indexados (o modelo de embeddings precisa estar disponível localmente).
+
+Uso (a partir de backend/):
+    python -m scripts.bench_chat --requests 200 --concurrency 16 --latency-ms 400 --tokens-per-second 80
+    python -m scripts.bench_chat --error-rate 0.05 --queries ./data/bench_queries.txt
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+import numpy as np
+
+
+async def run(app, questions, concurrency: int):
+    """(latência em segundos, status HTTP) de cada pergunta"""
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        sessions = []
+        for i in range(concurrency):
+            response = await client.post("/api/v1/sessions/", json={"name": f"bench-chat-{i}"})
+            sessions.append(response.json()["id"])
+
+        queue = asyncio.Queue()
+        for question in questions:
+            queue.put_nowait(question)
+        results = []
+
+        async def worker(session_id: str):
+            while not queue.empty():
+                question = queue.get_nowait()
+                start = time.perf_counter()
+                response = await client.post("/api/v1/chats/", params={"session_id": session_id, "question": question})
+                results.append((time.perf_counter() - start, response.status_code))
+
+        try:
+            await asyncio.gather(*(worker(session_id) for session_id in sessions))
+        finally:
+            for session_id in sessions:
+                await client.delete(f"/api/v1/sessions/{session_id}")
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--provider", choices=["fake", "http"], default="fake")
+    parser.add_argument("--queries", default="./data/bench_queries.txt", help="arquivo com uma pergunta por linha")
+    parser.add_argument("--question", help="usa sempre esta pergunta em vez do arquivo")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=400)
+    parser.add_argument("--tokens-per-second", type=float, default=80)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--cache", action="store_true", help="mantém os caches de consultas e de respostas")
+    parser.add_argument("--verbose", action="store_true", help="mostra o log de cada requisição")
+    args = parser.parse_args()
+
+    os.environ["LLM_STUB"] = "false"
+    os.environ["LLM_PROVIDER"] = args.provider
+    os.environ["LLM_FAKE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LLM_FAKE_TOKENS_PER_SECOND"] = str(args.tokens_per_second)
+    os.environ["LLM_FAKE_ERROR_RATE"] = str(args.error_rate)
+    os.environ["LLM_FAKE_SEED"] = str(args.seed)
+    if not args.cache:
+        os.environ["QUERY_CACHE_SIZE"] = "0"
+        os.environ["ANSWER_CACHE_SIZE"] = "0"
+
+    from fastapi import FastAPI
+    from app.controllers import chat_controller, session_controller
+    from app.services.vector_registry import VectorRegistry
+
+    if args.question:
+        questions = [args.question] * args.requests
+    else:
+        with open(args.queries, encoding="utf-8") as file:
+            lines = [line.strip() for line in file if line.strip()]
+        questions = [lines[i % len(lines)] for i in range(args.requests)]
+
+    app = FastAPI()
+    app.include_router(session_controller.router, prefix="/api/v1")
+    app.include_router(chat_controller.router, prefix="/api/v1")
+    VectorRegistry.warm_up()
+
+    start = time.perf_counter()
+    with contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO()):
+        results = asyncio.run(run(app, questions, args.concurrency))
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.asarray([latency for latency, _ in results]) * 1000
+    statuses = {}
+    for _, status_code in results:
+        statuses[status_code] = statuses.get(status_code, 0) + 1
+
+    provider = args.provider
+    if args.provider == "fake":
+        provider += f" (latência {args.latency_ms} ms, {args.tokens_per_second} tokens/s, erros {args.error_rate:.0%})"
+    print(f"{len(results)} requisições | concorrência {args.concurrency} | provedor {provider}")
+    print(f"throughput: {len(results) / elapsed:.1f} req/s | total {elapsed:.2f}s")
+    print(
+        f"latência (ms): p50 {np.percentile(latencies_ms, 50):.1f} | p95 {np.percentile(latencies_ms, 95):.1f} | "
+        f"p99 {np.percentile(latencies_ms, 99):.1f}"
+    )
+    print(f"status: {', '.join(f'{code}: {count}' for code, count in sorted(statuses.items()))}")
+    print(f"cliente LLM: {chat_controller.rag_service.llm_service.client.stats()}")
+
+
+if __name__ == "__main__":
+    main()
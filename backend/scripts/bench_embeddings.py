@@ -0,0 +1,95 @@
+"""Benchmark de embeddings na CPU: HuggingFace (PyTorch) vs. ONNX Runtime fp32 vs. ONNX int8.
+
+Mede a vazão (textos/s) de cada backend sobre trechos sintéticos no formato dos
+chunks de NF-e e legislação, e a concordância com o caminho PyTorch
+(similaridade de cosseno média e mínima entre os vetores do mesmo texto).
+
+Uso (a partir de backend/):
+    python -m scripts.bench_embeddings --texts 512 --batch-size 32 --threads 4
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from app.services.onnx_embeddings import OnnxEmbeddings
+from app.services.vector_registry import VectorRegistry
+
+SNIPPETS = (
+    "Item {i}: Produto de teste {i} - NCM 8415{i:04d} - CFOP 5102 - Qtd {i}.0000 UN - Valor Unit. R$ 10.50",
+    "ICMS: CST 00 - Base R$ {i}.00 - Alíquota 18.00% - Valor R$ {i}.89",
+    "Art. {i}. O contribuinte deverá apurar o imposto devido mensalmente, observado o disposto no § {i}.",
+    "NOTA FISCAL ELETRÔNICA Nº {i} Série 1 - Emitente CNPJ 12.345.678/0001-90 - Destinatário em MG",
+    "PIS: CST 01 - Alíquota 1.65% - Valor R$ 0.17 | COFINS: CST 01 - Alíquota 7.60% - Valor R$ 0.80",
+)
+
+
+def build_texts(count: int, seed: int = 42):
+    """Textos de tamanhos variados (1 a 12 trechos) para simular chunks reais"""
+    rng = random.Random(seed)
+    texts = []
+    for i in range(count):
+        parts = [rng.choice(SNIPPETS).format(i=rng.randint(1, 999)) for _ in range(rng.randint(1, 12))]
+        texts.append("\n".join(parts))
+    return texts
+
+
+def measure(embeddings, texts, repeat: int):
+    """Melhor tempo de embed_documents entre as repetições, com uma execução de aquecimento"""
+    embeddings.embed_documents(texts[:8])
+    best = float("inf")
+    vectors = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        best = min(best, time.perf_counter() - start)
+    return np.asarray(vectors, dtype=np.float32), best
+
+
+def cosine_agreement(reference: np.ndarray, other: np.ndarray):
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    other = other / np.linalg.norm(other, axis=1, keepdims=True)
+    cosines = (reference * other).sum(axis=1)
+    return float(cosines.mean()), float(cosines.min())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, default=512)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    texts = build_texts(args.texts)
+    model_name = VectorRegistry.model_name
+
+    if args.threads:
+        import torch
+        torch.set_num_threads(args.threads)
+
+    backends = [
+        ("pytorch", HuggingFaceEmbeddings(model_name=model_name, encode_kwargs={"batch_size": args.batch_size})),
+        ("onnx fp32", OnnxEmbeddings(model_name, quantize=False, batch_size=args.batch_size, intra_op_threads=args.threads)),
+        ("onnx int8", OnnxEmbeddings(model_name, quantize=True, batch_size=args.batch_size, intra_op_threads=args.threads)),
+    ]
+
+    print(f"{len(texts)} textos | modelo {model_name} | lote {args.batch_size} | threads {args.threads or 'padrão'}")
+    print(f"{'backend':<10} | {'tempo (s)':>9} | {'textos/s':>9} | {'speedup':>7} | {'cos médio':>9} | {'cos mínimo':>10}")
+
+    reference, reference_seconds = None, None
+    for label, embeddings in backends:
+        vectors, seconds = measure(embeddings, texts, args.repeat)
+        if reference is None:
+            reference, reference_seconds = vectors, seconds
+        mean_cos, min_cos = cosine_agreement(reference, vectors)
+        print(
+            f"{label:<10} | {seconds:>9.2f} | {len(texts) / seconds:>9.1f} | "
+            f"{reference_seconds / seconds:>6.2f}x | {mean_cos:>9.5f} | {min_cos:>10.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+"""Microbenchmark do parser de NF-e: NFeParser (streaming) vs. implementação anterior (xmltodict).
+
+Gera NF-e sintéticas com 1, 100 e 990 itens, confere que o texto produzido é
+idêntico nas duas implementações e mede o tempo de cada uma.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_nfe_parser --repeat 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+import xmltodict
+
+from app.services.nfe_parser import NFeParser
+
+ITEM_COUNTS = (1, 100, 990)
+
+
+def build_nfe_xml(n_items: int) -> str:
+    """Monta um XML de NF-e (nfeProc 4.00) com n_items itens"""
+    items = []
+    for i in range(1, n_items + 1):
+        items.append(
+            f'<det nItem="{i}"><prod><cProd>P{i:05d}</cProd><cEAN>SEM GTIN</cEAN>'
+            f'<xProd>Produto de teste {i} &amp; cia</xProd><NCM>{84159000 + i % 7}</NCM>'
+            f'<CFOP>{5102 if i % 2 else 6102}</CFOP><uCom>UN</uCom><qCom>{i}.0000</qCom>'
+            f'<vUnCom>10.5000000000</vUnCom><vProd>{i * 10.5:.2f}</vProd></prod>'
+            f'<imposto><vTotTrib>1.00</vTotTrib>'
+            f'<ICMS><ICMS00><orig>0</orig><CST>00</CST><modBC>3</modBC><vBC>{i * 10.5:.2f}</vBC>'
+            f'<pICMS>18.00</pICMS><vICMS>{i * 1.89:.2f}</vICMS></ICMS00></ICMS>'
+            f'<IPI><cEnq>999</cEnq><IPITrib><CST>50</CST><vBC>{i * 10.5:.2f}</vBC><pIPI>5.00</pIPI>'
+            f'<vIPI>{i * 0.525:.2f}</vIPI></IPITrib></IPI>'
+            f'<PIS><PISAliq><CST>01</CST><vBC>{i * 10.5:.2f}</vBC><pPIS>1.65</pPIS><vPIS>0.17</vPIS></PISAliq></PIS>'
+            f'<COFINS><COFINSAliq><CST>01</CST><vBC>{i * 10.5:.2f}</vBC><pCOFINS>7.60</pCOFINS>'
+            f'<vCOFINS>0.80</vCOFINS></COFINSAliq></COFINS></imposto></det>'
+        )
+
+    ns = ' xmlns="http://www.portalfiscal.inf.br/nfe"'
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        f'<nfeProc{ns} versao="4.00"><NFe{ns}>'
+        '<infNFe Id="NFe35240112345678000190550010000012341000012345" versao="4.00">'
+        '<ide><cUF>35</cUF><natOp>Venda de mercadoria</natOp><mod>55</mod><serie>1</serie>'
+        '<nNF>1234</nNF><dhEmi>2024-01-15T10:30:00-03:00</dhEmi><tpNF>1</tpNF><finNFe>1</finNFe></ide>'
+        '<emit><CNPJ>12345678000190</CNPJ><xNome>Empresa Emitente Ltda</xNome><xFant/>'
+        '<enderEmit><xLgr>Rua A</xLgr><nro>100</nro><xBairro>Centro</xBairro><xMun>São Paulo</xMun>'
+        '<UF>SP</UF><CEP>01000000</CEP></enderEmit><IE>123456789</IE></emit>'
+        '<dest><CNPJ>98765432000110</CNPJ><xNome>Cliente Destinatário SA</xNome>'
+        '<enderDest><xLgr>Av B</xLgr><nro>S/N</nro><xBairro>Bairro</xBairro><xMun>Belo Horizonte</xMun>'
+        '<UF>MG</UF><CEP>30000000</CEP></enderDest><indIEDest>1</indIEDest><IE>0012345</IE></dest>'
+        f'{"".join(items)}'
+        '<total><ICMSTot><vBC>1000.00</vBC><vICMS>180.00</vICMS><vICMSDeson>0.00</vICMSDeson>'
+        '<vBCST>0.00</vBCST><vST>0.00</vST><vProd>1000.00</vProd><vFrete>0.00</vFrete><vSeg>0.00</vSeg>'
+        '<vDesc>0.00</vDesc><vIPI>50.00</vIPI><vPIS>16.50</vPIS><vCOFINS>76.00</vCOFINS>'
+        '<vOutro>0.00</vOutro><vNF>1050.00</vNF></ICMSTot></total>'
+        '<transp><modFrete>0</modFrete></transp>'
+        '<infAdic><infCpl>Documento emitido por ME ou EPP optante pelo Simples Nacional.</infCpl></infAdic>'
+        '</infNFe><Signature xmlns="http://www.w3.org/2000/09/xmldsig#"><SignedInfo/></Signature></NFe>'
+        '<protNFe versao="4.00"><infProt><chNFe>35240112345678000190550010000012341000012345</chNFe>'
+        '</infProt></protNFe></nfeProc>'
+    )
+
+
+def legacy_extract_xml_content(file_path: str) -> str:
+    """Implementação anterior (xmltodict + concatenação de strings), usada como referência"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as file:
+            xml_content = file.read()
+    except UnicodeDecodeError:
+        # Tenta com encoding diferente se UTF-8 falhar
+        try:
+            with open(file_path, 'r', encoding='iso-8859-1') as file:
+                xml_content = file.read()
+        except:
+            with open(file_path, 'r', encoding='latin-1') as file:
+                xml_content = file.read()
+
+    # Remove BOM e caracteres problemáticos no início
+    xml_content = xml_content.strip()
+    if xml_content.startswith('\ufeff'):
+        xml_content = xml_content[1:]
+
+    try:
+        # Converte XML para dicionário
+        data_dict = xmltodict.parse(xml_content)
+    except Exception as e:
+        # Se falhar, retorna o conteúdo como texto simples
+        return f"Erro ao processar XML: {str(e)}\n\nConteúdo original:\n{xml_content[:1000]}..."
+
+    # 1. Obter a parte principal da NF-e (caminho varia dependendo do leiaute)
+    infNFe = data_dict.get('nfeProc', {}).get('NFe', {}).get('infNFe', {})
+
+    if not infNFe:
+        # Tenta outros caminhos comuns
+        infNFe = data_dict.get('NFe', {}).get('infNFe', {})
+        if not infNFe:
+            infNFe = data_dict.get('infNFe', {})
+
+    if not infNFe:
+        return f"Dados fiscais não encontrados ou estrutura inválida.\n\nEstrutura encontrada: {list(data_dict.keys())}"
+
+    # 2. CABEÇALHO DA NOTA
+    ide = infNFe.get('ide', {})
+    summary = "=== NOTA FISCAL ELETRÔNICA ===\n\n"
+    summary += f"Chave de Acesso: {infNFe.get('@Id', 'N/A').replace('NFe', '')}\n"
+    summary += f"Número: {ide.get('nNF', 'N/A')}\n"
+    summary += f"Série: {ide.get('serie', 'N/A')}\n"
+    summary += f"Modelo: {ide.get('mod', 'N/A')}\n"
+    summary += f"Data de Emissão: {ide.get('dhEmi', 'N/A')}\n"
+    summary += f"Data de Saída/Entrada: {ide.get('dhSaiEnt', ide.get('dhEmi', 'N/A'))}\n"
+    summary += f"Natureza da Operação: {ide.get('natOp', 'N/A')}\n"
+    summary += f"Tipo de Operação: {'Saída' if ide.get('tpNF') == '1' else 'Entrada' if ide.get('tpNF') == '0' else 'N/A'}\n"
+    summary += f"Finalidade: {ide.get('finNFe', 'N/A')}\n"
+    summary += f"CFOP Principal: {ide.get('CFOP', 'N/A')}\n\n"
+
+    # 3. EMITENTE
+    emit = infNFe.get('emit', {})
+    enderEmit = emit.get('enderEmit', {})
+    summary += "--- EMITENTE ---\n"
+    summary += f"CNPJ: {emit.get('CNPJ', 'N/A')}\n"
+    summary += f"Razão Social: {emit.get('xNome', 'N/A')}\n"
+    summary += f"Nome Fantasia: {emit.get('xFant', 'N/A')}\n"
+    summary += f"IE: {emit.get('IE', 'N/A')}\n"
+    summary += f"Endereço: {enderEmit.get('xLgr', 'N/A')}, {enderEmit.get('nro', 'N/A')}\n"
+    summary += f"Bairro: {enderEmit.get('xBairro', 'N/A')}\n"
+    summary += f"Município: {enderEmit.get('xMun', 'N/A')} - {enderEmit.get('UF', 'N/A')}\n"
+    summary += f"CEP: {enderEmit.get('CEP', 'N/A')}\n\n"
+
+    # 4. DESTINATÁRIO
+    dest = infNFe.get('dest', {})
+    enderDest = dest.get('enderDest', {})
+    summary += "--- DESTINATÁRIO ---\n"
+    summary += f"CNPJ/CPF: {dest.get('CNPJ', dest.get('CPF', 'N/A'))}\n"
+    summary += f"Nome/Razão Social: {dest.get('xNome', 'N/A')}\n"
+    summary += f"IE: {dest.get('IE', dest.get('indIEDest', 'N/A'))}\n"
+    summary += f"Endereço: {enderDest.get('xLgr', 'N/A')}, {enderDest.get('nro', 'N/A')}\n"
+    summary += f"Bairro: {enderDest.get('xBairro', 'N/A')}\n"
+    summary += f"Município: {enderDest.get('xMun', 'N/A')} - {enderDest.get('UF', 'N/A')}\n"
+    summary += f"CEP: {enderDest.get('CEP', 'N/A')}\n\n"
+
+    # 5. PRODUTOS/SERVIÇOS
+    det = infNFe.get('det', [])
+    if not isinstance(det, list):
+        det = [det]
+
+    summary += "--- PRODUTOS/SERVIÇOS ---\n"
+    for idx, item in enumerate(det, 1):
+        prod = item.get('prod', {})
+        imposto = item.get('imposto', {})
+
+        summary += f"\nItem {idx}:\n"
+        summary += f"  Código: {prod.get('cProd', 'N/A')}\n"
+        summary += f"  Descrição: {prod.get('xProd', 'N/A')}\n"
+        summary += f"  NCM: {prod.get('NCM', 'N/A')}\n"
+        summary += f"  CFOP: {prod.get('CFOP', 'N/A')}\n"
+        summary += f"  Unidade Comercial: {prod.get('uCom', 'N/A')}\n"
+        summary += f"  Quantidade: {prod.get('qCom', 'N/A')}\n"
+        summary += f"  Valor Unitário: R$ {prod.get('vUnCom', 'N/A')}\n"
+        summary += f"  Valor Total: R$ {prod.get('vProd', 'N/A')}\n"
+
+        # IMPOSTOS DETALHADOS
+        summary += f"  IMPOSTOS:\n"
+
+        # ICMS
+        icms = imposto.get('ICMS', {})
+        icms_detail = None
+        for key in icms.keys():
+            if key.startswith('ICMS'):
+                icms_detail = icms[key]
+                break
+
+        if icms_detail:
+            summary += f"    ICMS:\n"
+            summary += f"      Origem: {icms_detail.get('orig', 'N/A')}\n"
+            summary += f"      CST/CSOSN: {icms_detail.get('CST', icms_detail.get('CSOSN', 'N/A'))}\n"
+            summary += f"      Modalidade BC: {icms_detail.get('modBC', 'N/A')}\n"
+            summary += f"      Base de Cálculo: R$ {icms_detail.get('vBC', '0.00')}\n"
+            summary += f"      Alíquota: {icms_detail.get('pICMS', '0.00')}%\n"
+            summary += f"      Valor ICMS: R$ {icms_detail.get('vICMS', '0.00')}\n"
+
+        # IPI
+        ipi = imposto.get('IPI', {})
+        if ipi:
+            ipi_trib = ipi.get('IPITrib', {})
+            if ipi_trib:
+                summary += f"    IPI:\n"
+                summary += f"      CST: {ipi_trib.get('CST', 'N/A')}\n"
+                summary += f"      Base de Cálculo: R$ {ipi_trib.get('vBC', '0.00')}\n"
+                summary += f"      Alíquota: {ipi_trib.get('pIPI', '0.00')}%\n"
+                summary += f"      Valor IPI: R$ {ipi_trib.get('vIPI', '0.00')}\n"
+
+        # PIS
+        pis = imposto.get('PIS', {})
+        pis_detail = None
+        for key in pis.keys():
+            if key.startswith('PIS'):
+                pis_detail = pis[key]
+                break
+
+        if pis_detail:
+            summary += f"    PIS:\n"
+            summary += f"      CST: {pis_detail.get('CST', 'N/A')}\n"
+            summary += f"      Base de Cálculo: R$ {pis_detail.get('vBC', '0.00')}\n"
+            summary += f"      Alíquota: {pis_detail.get('pPIS', '0.00')}%\n"
+            summary += f"      Valor PIS: R$ {pis_detail.get('vPIS', '0.00')}\n"
+
+        # COFINS
+        cofins = imposto.get('COFINS', {})
+        cofins_detail = None
+        for key in cofins.keys():
+            if key.startswith('COFINS'):
+                cofins_detail = cofins[key]
+                break
+
+        if cofins_detail:
+            summary += f"    COFINS:\n"
+            summary += f"      CST: {cofins_detail.get('CST', 'N/A')}\n"
+            summary += f"      Base de Cálculo: R$ {cofins_detail.get('vBC', '0.00')}\n"
+            summary += f"      Alíquota: {cofins_detail.get('pCOFINS', '0.00')}%\n"
+            summary += f"      Valor COFINS: R$ {cofins_detail.get('vCOFINS', '0.00')}\n"
+
+    # 6. TOTAIS
+    total = infNFe.get('total', {}).get('ICMSTot', {})
+    summary += "\n--- TOTAIS DA NOTA ---\n"
+    summary += f"Base de Cálculo ICMS: R$ {total.get('vBC', '0.00')}\n"
+    summary += f"Valor ICMS: R$ {total.get('vICMS', '0.00')}\n"
+    summary += f"Valor ICMS Desonerado: R$ {total.get('vICMSDeson', '0.00')}\n"
+    summary += f"Base de Cálculo ICMS ST: R$ {total.get('vBCST', '0.00')}\n"
+    summary += f"Valor ICMS ST: R$ {total.get('vST', '0.00')}\n"
+    summary += f"Valor Total dos Produtos: R$ {total.get('vProd', '0.00')}\n"
+    summary += f"Valor do Frete: R$ {total.get('vFrete', '0.00')}\n"
+    summary += f"Valor do Seguro: R$ {total.get('vSeg', '0.00')}\n"
+    summary += f"Valor do Desconto: R$ {total.get('vDesc', '0.00')}\n"
+    summary += f"Valor do IPI: R$ {total.get('vIPI', '0.00')}\n"
+    summary += f"Valor do PIS: R$ {total.get('vPIS', '0.00')}\n"
+    summary += f"Valor do COFINS: R$ {total.get('vCOFINS', '0.00')}\n"
+    summary += f"Outras Despesas: R$ {total.get('vOutro', '0.00')}\n"
+    summary += f"VALOR TOTAL DA NOTA: R$ {total.get('vNF', '0.00')}\n"
+
+    # 7. INFORMAÇÕES ADICIONAIS
+    infAdic = infNFe.get('infAdic', {})
+    if infAdic:
+        summary += "\n--- INFORMAÇÕES ADICIONAIS ---\n"
+        if infAdic.get('infCpl'):
+            summary += f"{infAdic.get('infCpl')}\n"
+        if infAdic.get('infAdFisco'):
+            summary += f"Informações Fiscais: {infAdic.get('infAdFisco')}\n"
+
+    return summary.strip()
+
+
+def time_ms(fn, file_path: str, repeat: int):
+    """Retorna (melhor, mediana) em milissegundos"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(file_path)
+        samples.append((time.perf_counter() - start) * 1000)
+    return min(samples), statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    nfe_parser = NFeParser()
+
+    print(f"{'itens':>6} | {'tamanho':>9} | {'anterior (ms)':>22} | {'streaming (ms)':>22} | {'speedup':>7}")
+    print(f"{'':>6} | {'':>9} | {'melhor':>10} {'mediana':>11} | {'melhor':>10} {'mediana':>11} |")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n_items in ITEM_COUNTS:
+            file_path = os.path.join(tmp_dir, f"nfe_{n_items}.xml")
+            with open(file_path, "w", encoding="utf-8") as file:
+                file.write(build_nfe_xml(n_items))
+
+            # O texto gerado precisa ser idêntico ao da implementação anterior
+            expected = legacy_extract_xml_content(file_path)
+            actual, _ = nfe_parser.parse(file_path)
+            if actual != expected:
+                raise SystemExit(f"Saída divergente para {n_items} itens")
+
+            legacy_best, legacy_median = time_ms(legacy_extract_xml_content, file_path, args.repeat)
+            new_best, new_median = time_ms(nfe_parser.parse, file_path, args.repeat)
+
+            size_kb = os.path.getsize(file_path) / 1024
+            print(
+                f"{n_items:>6} | {size_kb:>7.1f}KB | {legacy_best:>10.2f} {legacy_median:>11.2f} | "
+                f"{new_best:>10.2f} {new_median:>11.2f} | {legacy_median / new_median:>6.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
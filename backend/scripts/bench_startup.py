@@ -0,0 +1,68 @@
+"""Compara tempo de carga e memória residente: um modelo de embeddings por serviço vs. VectorRegistry.
+
+Cada modo roda num subprocesso separado para medir a memória de forma isolada:
+- anterior: DocumentService, RAGService (documentos) e RAGService (chat) criavam,
+  cada um, seu próprio HuggingFaceEmbeddings + PersistentClient
+- compartilhado: três VectorService usando o VectorRegistry
+
+Uso (a partir de backend/):
+    python -m scripts.bench_startup
+"""
+import json
+import subprocess
+import sys
+import time
+
+SERVICES = 3
+
+
+def run_legacy():
+    import chromadb
+    from langchain_huggingface import HuggingFaceEmbeddings
+    from app.services.vector_registry import VectorRegistry
+
+    rss_before = VectorRegistry.rss_mb()
+    start = time.perf_counter()
+    instances = []
+    for _ in range(SERVICES):
+        embeddings = HuggingFaceEmbeddings(model_name=VectorRegistry.model_name)
+        embeddings.embed_query("warm-up")
+        instances.append((embeddings, chromadb.PersistentClient(path=VectorRegistry.persist_directory)))
+    return rss_before, time.perf_counter() - start
+
+
+def run_shared():
+    from app.services.vector_registry import VectorRegistry
+    from app.services.vector_service import VectorService
+
+    rss_before = VectorRegistry.rss_mb()
+    start = time.perf_counter()
+    services = [VectorService() for _ in range(SERVICES)]
+    VectorRegistry.warm_up()
+    for service in services:
+        service.embeddings.embed_query("warm-up")
+    return rss_before, time.perf_counter() - start
+
+
+def main():
+    if len(sys.argv) > 2 and sys.argv[1] == "--mode":
+        from app.services.vector_registry import VectorRegistry
+
+        rss_before, seconds = run_legacy() if sys.argv[2] == "legacy" else run_shared()
+        print(json.dumps({"seconds": seconds, "rss_before_mb": rss_before, "rss_after_mb": VectorRegistry.rss_mb()}))
+        return
+
+    for label, mode in (("anterior (1 modelo por serviço)", "legacy"), ("compartilhado (VectorRegistry)", "shared")):
+        output = subprocess.run(
+            [sys.executable, "-m", "scripts.bench_startup", "--mode", mode],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1]
+        stats = json.loads(output)
+        print(
+            f"{label:<34} carga: {stats['seconds']:6.2f}s | "
+            f"RSS: {stats['rss_before_mb']:7.1f} MB → {stats['rss_after_mb']:7.1f} MB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Benchmark de busca vetorial: recall@k contra a busca exata e latência p50/p99 por consulta.
+
+Para uma collection do ChromaDB, compara o HNSW em cada ef_search pedido com
+a busca exata (numpy, mesma métrica da collection, sobre os embeddings
+gravados). Se a collection também existir no backend memmap, ele entra na
+comparação. O ef_search original é restaurado ao final.
+
+O conjunto de consultas fica em um arquivo (uma por linha) para que execuções
+com configurações diferentes sejam comparáveis; com --sample, ele é criado a
+partir de trechos aleatórios dos chunks da collection.
+
+Os shards seguem VectorService.shard_name: documents_<categoria> e, para
+documentos de um tenant, documents_<categoria>--<tenant> (ex.:
+documents_notas_fiscais--acme). "documents" é a collection anterior ao sharding.
+
+Uso (a partir de backend/):
+    python -m scripts.bench_vector_search --collection documents_legislacao --sample 200
+    python -m scripts.bench_vector_search --collection documents_legislacao --k 10 --ef 10,50,100,200
+    python -m scripts.bench_vector_search --collection documents_notas_fiscais--acme --k 10
+"""
+import argparse
+import os
+import random
+import time
+
+import numpy as np
+
+from app.services.memmap_backend import MemmapBackend
+from app.services.vector_registry import VectorRegistry
+
+PAGE_SIZE = 5000
+
+
+def build_query_set(collection, path: str, size: int, seed: int = 42):
+    """Salva trechos aleatórios (início de chunks) como consultas, uma por linha"""
+    total = collection.count()
+    rng = random.Random(seed)
+    queries = []
+    for offset in rng.sample(range(total), min(size, total)):
+        document = collection.get(limit=1, offset=offset, include=["documents"])["documents"][0]
+        words = document.split()
+        start = rng.randint(0, max(len(words) - 12, 0))
+        queries.append(" ".join(words[start:start + 12]))
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(queries) + "\n")
+
+
+def load_vectors(collection):
+    """ids e embeddings gravados na collection"""
+    ids, vectors = [], []
+    while True:
+        page = collection.get(limit=PAGE_SIZE, offset=len(ids), include=["embeddings"])
+        if not len(page["ids"]):
+            break
+        ids.extend(page["ids"])
+        vectors.append(np.asarray(page["embeddings"], dtype=np.float32))
+    return ids, np.vstack(vectors)
+
+
+def exact_search(vectors: np.ndarray, query: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Top-k exato na métrica da collection (índices das linhas)"""
+    if space == "cosine":
+        distances = -(vectors @ query) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query) + 1e-12)
+    elif space == "ip":
+        distances = -(vectors @ query)
+    else:
+        distances = ((vectors - query) ** 2).sum(axis=1)
+    top = np.argpartition(distances, min(k, len(distances) - 1))[:k]
+    return top[np.argsort(distances[top])]
+
+
+def summarize(label: str, latencies, recalls):
+    latencies_ms = np.asarray(latencies) * 1000
+    print(
+        f"{label:<16} | {np.mean(recalls):>9.4f} | {np.percentile(latencies_ms, 50):>8.2f} | "
+        f"{np.percentile(latencies_ms, 99):>8.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", required=True, help="documents_<categoria>[--<tenant>] ou documents")
+    parser.add_argument("--queries", default="./data/bench_queries.txt", help="arquivo com uma consulta por linha")
+    parser.add_argument("--sample", type=int, help="cria (ou recria) o arquivo de consultas com N trechos")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", default="10,50,100,200", help="valores de ef_search, separados por vírgula")
+    args = parser.parse_args()
+
+    client = VectorRegistry.get_client()
+    collection = client.get_collection(args.collection)
+
+    if args.sample:
+        build_query_set(collection, args.queries, args.sample)
+    with open(args.queries, encoding="utf-8") as file:
+        queries = [line.strip() for line in file if line.strip()]
+
+    hnsw = dict((collection.configuration or {}).get("hnsw") or {})
+    space = hnsw.get("space", "l2")
+    original_ef = hnsw.get("ef_search")
+
+    ids, vectors = load_vectors(collection)
+    k = min(args.k, len(ids))
+    query_vectors = np.asarray(VectorRegistry.get_embeddings().embed_documents(queries), dtype=np.float32)
+
+    print(
+        f"{args.collection}: {len(ids)} chunks, dim {vectors.shape[1]} | {len(queries)} consultas | k={k} | "
+        f"space={space} M={hnsw.get('max_neighbors')} construction_ef={hnsw.get('ef_construction')}"
+    )
+    print(f"{'busca':<16} | {'recall@k':>9} | {'p50 (ms)':>8} | {'p99 (ms)':>8}")
+
+    truth, latencies = [], []
+    for query in query_vectors:
+        start = time.perf_counter()
+        top = exact_search(vectors, query, k, space)
+        latencies.append(time.perf_counter() - start)
+        truth.append({ids[row] for row in top})
+    summarize("exata (numpy)", latencies, [1.0] * len(truth))
+
+    try:
+        for ef in [int(value) for value in args.ef.split(",")]:
+            collection.modify(configuration={"hnsw": {"ef_search": ef}})
+            latencies, recalls = [], []
+            for query, expected in zip(query_vectors, truth):
+                start = time.perf_counter()
+                result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+                latencies.append(time.perf_counter() - start)
+                recalls.append(len(expected & set(result["ids"][0])) / k)
+            summarize(f"hnsw ef={ef}", latencies, recalls)
+    finally:
+        if original_ef is not None:
+            collection.modify(configuration={"hnsw": {"ef_search": original_ef}})
+
+    memmap = MemmapBackend(VectorRegistry.memmap_directory, VectorRegistry.get_embeddings)
+    if args.collection in memmap.list_collections():
+        latencies, recalls = [], []
+        for query, expected in zip(query_vectors, truth):
+            start = time.perf_counter()
+            results = memmap.search_by_vector(args.collection, query.tolist(), k)
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len(expected & {result["metadata"].get("chunk_id") for result in results}) / k)
+        summarize("memmap float16", latencies, recalls)
+
+
+if __name__ == "__main__":
+    main()
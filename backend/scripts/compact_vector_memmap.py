@@ -0,0 +1,37 @@
+"""Compacta as collections do backend memmap, removendo as linhas marcadas como tombstone.
+
+Remoções e reingestões só marcam as linhas antigas da matriz; esta rotina
+reescreve vectors.npy com as linhas vivas e renumera a tabela de metadados.
+Pode rodar com a API no ar: a compactação segura o flock exclusivo da
+collection, e os processos da API recarregam a matriz na busca seguinte.
+
+Uso (a partir de backend/):
+    python -m scripts.compact_vector_memmap [--min-tombstone-ratio 0.2] [--collection NOME]
+"""
+import argparse
+
+from app.services.memmap_backend import MemmapBackend
+from app.services.vector_registry import VectorRegistry
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-tombstone-ratio", type=float, default=0.0,
+                        help="só compacta collections com pelo menos esta fração de linhas mortas")
+    parser.add_argument("--collection", action="append", help="collection específica (pode repetir)")
+    args = parser.parse_args()
+
+    backend = MemmapBackend(VectorRegistry.memmap_directory, VectorRegistry.get_embeddings)
+    for name in args.collection or backend.list_collections():
+        stats = backend.collection(name).stats()
+        ratio = stats["tombstones"] / stats["rows"] if stats["rows"] else 0.0
+        if not stats["tombstones"] or ratio < args.min_tombstone_ratio:
+            print(f"{name}: {stats['live']} chunks, {stats['tombstones']} tombstones (ignorada)")
+            continue
+
+        result = backend.compact(name)
+        print(f"{name}: {result['rows_before']} -> {result['rows_after']} linhas")
+
+
+if __name__ == "__main__":
+    main()
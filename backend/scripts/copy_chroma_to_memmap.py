@@ -0,0 +1,42 @@
+"""Copia as collections do ChromaDB para o backend memmap, reaproveitando os embeddings.
+
+Permite trocar VECTOR_BACKEND para memmap sem reprocessar os documentos. Os
+chunks são gravados com o mesmo id (reexecutar substitui as cópias anteriores);
+o índice lexical não muda, pois os nomes das collections são os mesmos.
+
+Uso (a partir de backend/):
+    python -m scripts.copy_chroma_to_memmap [--collection NOME]
+"""
+import argparse
+
+from app.services.memmap_backend import MemmapBackend
+from app.services.vector_registry import VectorRegistry
+
+PAGE_SIZE = 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--collection", action="append", help="collection específica (pode repetir)")
+    args = parser.parse_args()
+
+    client = VectorRegistry.get_client()
+    backend = MemmapBackend(VectorRegistry.memmap_directory, VectorRegistry.get_embeddings)
+
+    for name in args.collection or [collection.name for collection in client.list_collections()]:
+        source = client.get_collection(name)
+        target = backend.collection(name)
+
+        copied = 0
+        while True:
+            page = source.get(limit=PAGE_SIZE, offset=copied, include=["documents", "metadatas", "embeddings"])
+            if not len(page["ids"]):
+                break
+            target.add(page["ids"], page["embeddings"], page["documents"], page["metadatas"])
+            copied += len(page["ids"])
+
+        print(f"{name}: {copied} chunks")
+
+
+if __name__ == "__main__":
+    main()
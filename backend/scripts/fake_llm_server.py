@@ -0,0 +1,78 @@
+"""Serviço HTTP local no lugar do Gemini, para testes de carga com a rede no caminho (LLM_PROVIDER=http).
+
+Responde com o modelo determinístico do LLM_PROVIDER=fake (StubGenerativeModel),
+com a latência, a taxa de tokens e a taxa de erros pedidas. Falhas injetadas
+retornam o status HTTP configurado (429 por padrão), que a API trata como
+erro transitório (retentativas e circuit breaker).
+
+Protocolo (o mesmo do HTTPProvider): POST /generate com prompt,
+system_instruction, generation_config e stream; a resposta é {"text": ...} ou,
+com stream, uma linha JSON {"text": ...} por parte.
+
+Uso (a partir de backend/):
+    python -m scripts.fake_llm_server --port 8001 --latency-ms 400 --tokens-per-second 80 --error-rate 0.02
+    LLM_PROVIDER=http LLM_HTTP_URL=http://localhost:8001 uvicorn app.main:app
+"""
+import argparse
+import json
+from typing import Dict, Optional
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+from app.services.llm_provider import ProviderError
+from app.services.stub_llm import StubGenerativeModel
+
+
+class GenerateRequest(BaseModel):
+    prompt: str
+    system_instruction: Optional[str] = None
+    generation_config: Optional[Dict] = None
+    stream: bool = False
+
+
+def create_app(model: StubGenerativeModel) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+
+    @app.post("/generate")
+    async def generate(request: GenerateRequest):
+        try:
+            if request.stream:
+                parts = model.generate_content(request.prompt, request.generation_config, stream=True)
+                return StreamingResponse(
+                    (json.dumps({"text": part.text}, ensure_ascii=False) + "\n" for part in parts),
+                    media_type="application/x-ndjson"
+                )
+            response = await model.generate_content_async(request.prompt, request.generation_config)
+            return {"text": response.text}
+        except ProviderError as error:
+            return JSONResponse(status_code=error.code or 500, content={"detail": str(error)})
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=0, help="espera até a primeira parte da resposta")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="0 = sem espera por token")
+    parser.add_argument("--error-rate", type=float, default=0, help="fração das chamadas que falham")
+    parser.add_argument("--error-code", type=int, default=429)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    model = StubGenerativeModel(
+        latency_ms=args.latency_ms,
+        tokens_per_second=args.tokens_per_second,
+        error_rate=args.error_rate,
+        error_code=args.error_code,
+        seed=args.seed
+    )
+    uvicorn.run(create_app(model), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
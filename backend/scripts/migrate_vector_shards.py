@@ -0,0 +1,77 @@
+"""Move os chunks da collection única "documents" para os shards por categoria/tenant.
+
+Os embeddings existentes são copiados (sem recalcular) para documents_<categoria>[--<tenant>],
+criados com a configuração HNSW do ambiente, e os chunks migrados são removidos da
+collection original, página a página; o índice lexical acompanha a mudança. Pode
+ser interrompido e executado de novo. Enquanto a collection original existir, as
+buscas continuam consultando-a.
+
+Uso (a partir de backend/):
+    python -m scripts.migrate_vector_shards [--drop-legacy]
+"""
+import argparse
+
+from app.services.vector_registry import VectorRegistry
+from app.services.vector_service import VectorService
+
+PAGE_SIZE = 500
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--drop-legacy", action="store_true", help="remove a collection original vazia ao final")
+    args = parser.parse_args()
+
+    vector_service = VectorService()
+    if not vector_service.sharding_enabled:
+        raise SystemExit("VECTOR_SHARDING está desativado")
+
+    client = VectorRegistry.get_client()
+    lexical_index = VectorRegistry.get_lexical_index()
+
+    legacy_name = vector_service.collection_name
+    if legacy_name not in [collection.name for collection in client.list_collections()]:
+        print("Nada a migrar: a collection original não existe")
+        return
+
+    legacy = client.get_collection(legacy_name)
+    migrated = {}
+    while True:
+        # Os chunks migrados são removidos, então a próxima página é sempre a primeira
+        page = legacy.get(limit=PAGE_SIZE, include=["documents", "metadatas", "embeddings"])
+        if not page["ids"]:
+            break
+
+        by_shard = {}
+        for i, metadata in enumerate(page["metadatas"]):
+            shard = vector_service.shard_name(metadata.get("category"), metadata.get("tenant"))
+            by_shard.setdefault(shard, []).append(i)
+
+        for shard, indices in by_shard.items():
+            ids = [page["ids"][i] for i in indices]
+            documents = [page["documents"][i] for i in indices]
+            metadatas = [page["metadatas"][i] for i in indices]
+
+            # Mesma criação das collections em tempo de execução (espaço, M e ef do HNSW)
+            VectorRegistry.get_collection(shard).upsert(
+                ids=ids,
+                embeddings=[page["embeddings"][i] for i in indices],
+                documents=documents,
+                metadatas=metadatas
+            )
+            # Reindexa no shard (as entradas da collection original são substituídas)
+            lexical_index.add_chunks(shard, ids, documents, metadatas)
+            migrated[shard] = migrated.get(shard, 0) + len(ids)
+
+        legacy.delete(ids=page["ids"])
+
+    for shard, count in sorted(migrated.items()):
+        print(f"{shard}: {count} chunks")
+
+    if args.drop_legacy and legacy.count() == 0:
+        client.delete_collection(legacy_name)
+        print(f"Collection {legacy_name} removida")
+
+
+if __name__ == "__main__":
+    main()
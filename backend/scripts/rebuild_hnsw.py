@@ -0,0 +1,95 @@
+"""Recria o índice HNSW das collections do ChromaDB com a configuração atual, sem recalcular embeddings.
+
+space, M e construction_ef só podem ser definidos na criação da collection:
+os chunks (com os embeddings gravados) são copiados para uma collection
+temporária com a nova configuração, que então substitui a original. Se a
+execução for interrompida, rodar de novo conclui a troca pendente. Execute com a
+API parada (ela mantém referências às collections originais).
+
+A configuração vem de HNSW_SPACE, HNSW_M, HNSW_CONSTRUCTION_EF e HNSW_SEARCH_EF
+(ou dos argumentos, que têm precedência). Todas as collections devem usar o
+mesmo space: as distâncias dos shards são comparadas entre si na busca.
+
+Uso (a partir de backend/):
+    python -m scripts.rebuild_hnsw [--space cosine] [--m 32] [--construction-ef 200] [--search-ef 100]
+                                   [--collection NOME] [--force]
+"""
+import argparse
+
+from app.services.vector_registry import VectorRegistry
+
+PAGE_SIZE = 1000
+REBUILD_SUFFIX = "__rebuild"
+# Parâmetros que exigem recriar o índice (ef_search é alterado na collection existente)
+BUILD_PARAMETERS = ("space", "max_neighbors", "ef_construction")
+
+
+def rebuild(client, name: str, hnsw: dict) -> int:
+    """Copia a collection para uma nova com a configuração pedida e troca os nomes"""
+    temporary_name = name + REBUILD_SUFFIX
+    if temporary_name in [collection.name for collection in client.list_collections()]:
+        client.delete_collection(temporary_name)
+
+    source = client.get_collection(name)
+    target = VectorRegistry.get_collection(temporary_name, hnsw)
+
+    copied = 0
+    while True:
+        page = source.get(limit=PAGE_SIZE, offset=copied, include=["documents", "metadatas", "embeddings"])
+        if not len(page["ids"]):
+            break
+        target.add(
+            ids=page["ids"],
+            embeddings=page["embeddings"],
+            documents=page["documents"],
+            metadatas=page["metadatas"]
+        )
+        copied += len(page["ids"])
+
+    client.delete_collection(name)
+    target.modify(name=name)
+    return copied
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"])
+    parser.add_argument("--m", type=int, dest="max_neighbors")
+    parser.add_argument("--construction-ef", type=int, dest="ef_construction")
+    parser.add_argument("--search-ef", type=int, dest="ef_search")
+    parser.add_argument("--collection", action="append", help="collection específica (pode repetir)")
+    parser.add_argument("--force", action="store_true", help="recria mesmo sem diferença na configuração")
+    args = parser.parse_args()
+
+    hnsw = VectorRegistry.hnsw_configuration()
+    hnsw.update({
+        key: getattr(args, key)
+        for key in (*BUILD_PARAMETERS, "ef_search") if getattr(args, key) is not None
+    })
+
+    client = VectorRegistry.get_client()
+    existing = [collection.name for collection in client.list_collections()]
+
+    # Troca interrompida depois de remover a original: só falta renomear
+    for name in existing:
+        if name.endswith(REBUILD_SUFFIX) and name[:-len(REBUILD_SUFFIX)] not in existing:
+            client.get_collection(name).modify(name=name[:-len(REBUILD_SUFFIX)])
+            print(f"{name[:-len(REBUILD_SUFFIX)]}: troca pendente concluída")
+    existing = [collection.name for collection in client.list_collections() if not collection.name.endswith(REBUILD_SUFFIX)]
+
+    for name in args.collection or existing:
+        current = (client.get_collection(name).configuration or {}).get("hnsw") or {}
+        changed = [key for key in BUILD_PARAMETERS if key in hnsw and current.get(key) != hnsw[key]]
+
+        if changed or args.force:
+            copied = rebuild(client, name, hnsw)
+            print(f"{name}: {copied} chunks reindexados ({', '.join(changed) or 'forçado'})")
+        elif "ef_search" in hnsw:
+            VectorRegistry.get_collection(name, hnsw)
+            print(f"{name}: ef_search = {hnsw['ef_search']}")
+        else:
+            print(f"{name}: configuração inalterada")
+
+
+if __name__ == "__main__":
+    main()
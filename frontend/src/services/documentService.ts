@@ -41,10 +41,15 @@ export function DocumentService() {
     await fetch(`${API_BASE_URL}/documents/${documentId}`, { method: 'DELETE' });
   };
 
+  const getJobStatus = async (jobId: string) => {
+    const response = await fetch(`${API_BASE_URL}/documents/jobs/${jobId}`);
+    return response.json();
+  };
+
   const getVectorStoreInfo = async () => {
     const response = await fetch(`${API_BASE_URL}/documents/vector/info`);
     return response.json();
   };
 
-  return { uploadDocument, getDocuments, getDocument, deleteDocument, getVectorStoreInfo };
+  return { uploadDocument, getDocuments, getDocument, deleteDocument, getJobStatus, getVectorStoreInfo };
 }
\ No newline at end of file